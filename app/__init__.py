@@ -26,7 +26,19 @@ login.login_message = 'Please log in to access this page'
 
 # Import all the models to allow Alembic/Flask-Migrate to recongize schema changes better
 from app.models import TestPoint, Channel, Group, Job, Project, TestEquipment, TestEquipmentType
-from app.models import User, Company, CalibrationRecord, ApprovalRecord, ChannelEquipmentRecord
+from app.models import User, Company, CalibrationRecord, ApprovalRecord, ChannelEquipmentRecord, GroupEvent, Report
+
+# Publishes the changes made to each Group to the users viewing it
+from app.events import hub
+
+# Builds the requested reports in the background
+from app.reports import report_queue
+
+# Rolls the status of each changed Group up through its Job and Project
+from app.rollups import rollup_worker
+
+# Keeps the counts shown on the index page between page views
+from app.dashboard import dashboard_cache
 
 # Initializing the modules within the app
 def create_app(config_class=Config):
@@ -39,6 +51,10 @@ def create_app(config_class=Config):
     app.jinja_env.globals.update(zip=zip)
     app.jinja_env.filters['format_decimal'] = format_decimal    
 
+    # Add the lists of enum values into the jinja template functionality
+    from app.utils import utility_processor
+    app.context_processor(utility_processor)
+
     # Pass the application context to each of the initialize dependencies
     db.init_app(app)
     migrate.init_app(app, db)
@@ -47,6 +63,10 @@ def create_app(config_class=Config):
     bootstrap.init_app(app)
     moment.init_app(app)
     babel.init_app(app)
+    hub.init_app(app)
+    report_queue.init_app(app)
+    rollup_worker.init_app(app)
+    dashboard_cache.init_app(app)
 
     # Register each blueprint section
     from app.errors import bp as errors_bp
@@ -2,6 +2,7 @@ from flask import render_template, redirect, url_for, flash, request
 from werkzeug.urls import url_parse
 from flask_login import login_user, logout_user, current_user
 from app import db
+from app.dashboard import dashboard_cache
 from app.auth import bp
 from app.auth.forms import *
 from app.models import Company, User
@@ -74,6 +75,7 @@ def register():
         )
         user.set_password(form.password.data)
         db.session.add(user)
+        dashboard_cache.invalidate()
         db.session.commit()
 
         # Add the user to the selected company
@@ -0,0 +1,98 @@
+import click, time
+from app.exports import *
+from app.generator import generate_test_data
+from app.reports import report_queue
+from app.utils import check_status_counters, rebuild_status_counters
+
+
+def register(app):
+
+    @app.cli.group()
+    def status():
+        """Status rollup commands."""
+        pass
+
+    @status.command()
+    def rebuild():
+        """Rebuild the status counters of every Channel, Group, Job and Project."""
+        num_items = rebuild_status_counters()
+        click.echo(f'Rebuilt the status counters of {num_items} items.')
+
+    @status.command()
+    def check():
+        """Check the status counters of every item against its Channels and TestPoints."""
+        differences = check_status_counters()
+        for item, name, stored, expected in differences:
+            click.echo(f'{item} has {name} {stored!r}, expected {expected!r}')
+        if len(differences) > 0:
+            raise click.ClickException(f'Found {len(differences)} status counters out of date, '
+                'run "flask status rebuild" to fix them.')
+        click.echo('Every status counter is up to date.')
+
+    @app.cli.group()
+    def report():
+        """Report commands."""
+        pass
+
+    @report.command()
+    def prune():
+        """Remove the expired, least recently used and orphaned report files."""
+        num_removed = report_queue.prune_cache()
+        click.echo(f'Removed {num_removed} report files.')
+
+    @app.cli.group()
+    def export():
+        """Export commands."""
+        pass
+
+    @export.command()
+    @click.argument('project_id', type=int)
+    @click.option('--job', 'job_id', type=int, help='Only export the TestPoints of this Job.')
+    @click.option('--format', 'export_format', type=click.Choice(list(EXPORT_MIMETYPES)), default='csv',
+        help='Export as csv, or as a parquet file when pyarrow is installed.')
+    @click.option('--output', default='-', help='The file to export into, or - for stdout.')
+    def testpoints(project_id, job_id, export_format, output):
+        """Export the raw TestPoint data of a Project."""
+        rows = testpoint_export_rows(testpoint_export_query(project_id, job_id))
+
+        if export_format == 'csv':
+            with click.open_file(output, 'w') as file:
+                for lines in csv_export(rows):
+                    file.write(lines)
+        else:
+            if output == '-':
+                raise click.UsageError('A parquet export needs an --output file.')
+            if not parquet_available():
+                raise click.ClickException('Exporting as parquet requires pyarrow to be installed.')
+            with open(output, 'wb') as file:
+                write_parquet_export(rows, file)
+
+        if output != '-':
+            click.echo(f'Exported the TestPoints of project id-{project_id} to {output}.')
+
+    @app.cli.group()
+    def testdata():
+        """Synthetic test data commands."""
+        pass
+
+    @testdata.command()
+    @click.option('--projects', type=click.IntRange(min=1), default=1, help='The number of Projects.')
+    @click.option('--jobs', type=click.IntRange(min=1), default=3, help='The number of Jobs in each Project.')
+    @click.option('--groups', type=click.IntRange(min=1), default=5, help='The number of Groups in each Job.')
+    @click.option('--channels', type=click.IntRange(min=1), default=100, help='The number of Channels in each Group.')
+    @click.option('--testpoints', type=click.IntRange(min=2), default=5, help='The number of TestPoints in each Channel.')
+    @click.option('--fail-rate', type=click.FloatRange(0, 1), default=0.02,
+        help='The share of measured TestPoints that fail.')
+    @click.option('--equipment', 'equipment_per_type', type=click.IntRange(min=1), default=3,
+        help='The number of TestEquipment of each type.')
+    @click.option('--seed', type=int, help='Seed the random results to generate the same data again.')
+    def generate(projects, jobs, groups, channels, testpoints, fail_rate, equipment_per_type, seed):
+        """Bulk create Projects of tested Channels with equipment and calibration histories."""
+        start = time.perf_counter()
+        try:
+            counts = generate_test_data(projects, jobs, groups, channels, testpoints, fail_rate=fail_rate,
+                equipment_per_type=equipment_per_type, seed=seed)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        click.echo(', '.join(f'{count} {name.replace("_", " ")}' for name, count in counts.items()))
+        click.echo(f'Generated in {time.perf_counter() - start:.1f} seconds.')
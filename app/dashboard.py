@@ -0,0 +1,113 @@
+import threading, time
+from sqlalchemy import event
+from app import db
+from app.utils import *
+
+# The key used to mark a session's changes as needing the dashboard cleared once they are committed
+PENDING_INVALIDATION = 'pending_dashboard_invalidation'
+
+# The number of recently updated Channels listed on the index page
+RECENT_ACTIVITY_SIZE = 10
+
+
+# Counts the records of each table and lists the most recently updated Channels for the index page
+# Note: Every count is taken by a single statement rather than loading the records being counted
+def dashboard_summary():
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import User, Company, Project, Job, Group, Channel, TestEquipment, CalibrationRecord
+
+    tables = {
+        "users": User,
+        "companies": Company,
+        "projects": Project,
+        "jobs": Job,
+        "groups": Group,
+        "channels": Channel,
+        "test_equipment": TestEquipment,
+        "calibration_records": CalibrationRecord
+    }
+    counts = db.session.query(*[db.session.query(db.func.count(model.id)).label(name)
+        for name, model in tables.items()]).one()
+    counts = dict(zip(tables, counts))
+
+    # The TestPoints are already counted by each Project
+    counts["testpoints"] = db.session.query(db.func.sum(Project.num_testpoints)).scalar() or 0
+
+    rows = db.session.query(Channel.name, Channel.status, Channel.last_updated, Group.id, Group.name, Job.name) \
+        .select_from(Channel).join(Group).join(Job) \
+        .order_by(Channel.last_updated.desc(), Channel.id.desc()).limit(RECENT_ACTIVITY_SIZE).all()
+    recent_activity = [{
+        "channel_name": channel_name,
+        "status": status,
+        "last_updated": last_updated,
+        "group_id": group_id,
+        "group_name": group_name,
+        "job_name": job_name
+    } for channel_name, status, last_updated, group_id, group_name, job_name in rows]
+
+    return {"counts": counts, "recent_activity": recent_activity}
+
+
+# Keeps the index page's dashboard for a few seconds between page views within each process
+# Note: Routes that add or remove records invalidate it so their changes show up straight away,
+#       while the recent activity of each measurement is left to catch up once the dashboard expires
+class DashboardCache(object):
+
+    def __init__(self, app=None):
+        self.max_age = None
+        self.summary = None
+        self.expires = 0
+        self.generation = 0
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.max_age = app.config['DASHBOARD_CACHE_SECONDS']
+        self.clear()
+
+    def get(self):
+
+        with self.lock:
+            if self.summary is not None and time.monotonic() < self.expires:
+                return self.summary
+            generation = self.generation
+
+        summary = dashboard_summary()
+
+        # Only keep the summary if nothing was invalidated while it was being built
+        with self.lock:
+            if generation == self.generation:
+                self.summary = summary
+                self.expires = time.monotonic() + self.max_age
+
+        return summary
+
+    # Clears the dashboard now and again once the session's changes are committed,
+    # so that a page view in between can't keep the counts from before the changes
+    def invalidate(self):
+        self.clear()
+        db.session.info[PENDING_INVALIDATION] = self
+
+    def clear(self):
+        with self.lock:
+            self.summary = None
+            self.generation += 1
+
+
+# Clears the dashboard invalidated by a session once its transaction has been committed
+@event.listens_for(db.session, 'after_commit')
+def clear_invalidated_dashboard(session):
+    dashboard = session.info.pop(PENDING_INVALIDATION, None)
+    if dashboard is not None:
+        dashboard.clear()
+
+
+# Drops a session's invalidation if its transaction is rolled back
+@event.listens_for(db.session, 'after_rollback')
+def discard_invalidated_dashboard(session):
+    session.info.pop(PENDING_INVALIDATION, None)
+
+
+dashboard_cache = DashboardCache()
@@ -0,0 +1,188 @@
+import queue, threading, time
+from datetime import datetime, timedelta
+from flask import json
+from sqlalchemy import event
+from app import db
+
+# The key used to hold a session's events until its transaction is committed
+PENDING_EVENTS = 'pending_group_events'
+
+
+# Publishes the changes made to each Group to the users who have its Channels open
+# Note: Events are only delivered once the transaction that published them has been committed
+class EventHub(object):
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.subscribers = {}
+        self.max_subscribers = None
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        # Choose how the events are shared between the app's processes
+        backend_name = app.config['EVENT_BACKEND']
+        if backend_name == 'memory':
+            self.backend = MemoryBackend(self)
+        elif backend_name == 'database':
+            self.backend = DatabaseBackend(self, app)
+        else:
+            raise ValueError(f'Unknown EVENT_BACKEND: {backend_name}')
+        self.max_subscribers = app.config['EVENT_MAX_SUBSCRIBERS']
+
+    def publish(self, group_id, event_type, data):
+        self.backend.publish(group_id, json.dumps({'type': event_type, 'data': data}))
+
+    # Returns the queue of events for a new subscriber, or None once this process has as many as it can hold open
+    def subscribe(self, group_id):
+        subscriber = queue.Queue(maxsize=1000)
+        with self.lock:
+            if self.max_subscribers is not None and self.num_subscribers() >= self.max_subscribers:
+                return None
+            self.subscribers.setdefault(int(group_id), set()).add(subscriber)
+        self.backend.start_listening()
+        return subscriber
+
+    def num_subscribers(self):
+        return sum(len(subscribers) for subscribers in self.subscribers.values())
+
+    def unsubscribe(self, group_id, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(int(group_id), set())
+            subscribers.discard(subscriber)
+            if len(subscribers) == 0:
+                self.subscribers.pop(int(group_id), None)
+
+    # Hands a committed event to every subscriber of the Group in this process
+    def dispatch(self, group_id, message):
+        with self.lock:
+            subscribers = list(self.subscribers.get(int(group_id), []))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # Drop the event for a client that has stopped reading its stream
+                pass
+
+
+# Delivers the events to the subscribers within a single process
+class MemoryBackend(object):
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def publish(self, group_id, message):
+        db.session.info.setdefault(PENDING_EVENTS, []).append((self.hub, group_id, message))
+
+    def start_listening(self):
+        pass
+
+
+# Shares the events between processes by writing them to the group_event table
+# Note: Each process polls the table for new rows, similar to a LISTEN/NOTIFY channel
+class DatabaseBackend(object):
+
+    def __init__(self, hub, app):
+        self.hub = hub
+        self.app = app
+        self.poll_interval = app.config['EVENT_POLL_INTERVAL_SECONDS']
+        self.retention = timedelta(seconds=app.config['EVENT_RETENTION_SECONDS'])
+        self.overlap = timedelta(seconds=app.config['EVENT_OVERLAP_SECONDS'])
+        self.last_event_id = None
+        self.delivered_events = {}
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def publish(self, group_id, message):
+
+        # Import the Model directly here to avoid a circular import
+        from app.models import GroupEvent
+
+        # The event is written as part of the request's transaction
+        db.session.add(GroupEvent(group_id=group_id, message=message))
+
+    # Starts the listener thread the first time a client subscribes within this process
+    def start_listening(self):
+        with self.lock:
+            if self.thread is None:
+                self.skip_existing_events()
+                self.thread = threading.Thread(target=self.listen, daemon=True)
+                self.thread.start()
+
+    def latest_event_id(self):
+
+        # Import the Model directly here to avoid a circular import
+        from app.models import GroupEvent
+
+        return db.session.query(db.func.max(GroupEvent.id)).scalar() or 0
+
+    # Marks every event already written as delivered, so that only the events written from now on are dispatched
+    def skip_existing_events(self):
+
+        # Import the Model directly here to avoid a circular import
+        from app.models import GroupEvent
+
+        self.last_event_id = self.latest_event_id()
+        self.delivered_events = dict(db.session.query(GroupEvent.id, GroupEvent.timestamp)
+            .filter(GroupEvent.timestamp >= datetime.utcnow() - self.overlap).all())
+
+    def listen(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    self.poll()
+                except Exception:
+                    self.app.logger.exception('Error polling the group events')
+                finally:
+                    db.session.remove()
+            time.sleep(self.poll_interval)
+
+    # Dispatches every event written since the last poll and removes any expired events
+    def poll(self):
+
+        # Import the Model directly here to avoid a circular import
+        from app.models import GroupEvent
+
+        # Only deliver the events written after this process started listening
+        if self.last_event_id is None:
+            self.skip_existing_events()
+
+        # Re-read the recent events before the last one delivered too, skipping those already delivered
+        # Note: An event's id is taken when it's written but it's only seen once committed, so an event
+        #       committed late can have a lower id than the events delivered before it
+        cutoff = datetime.utcnow() - self.overlap
+        events = GroupEvent.query.filter(db.or_(GroupEvent.id > self.last_event_id, GroupEvent.timestamp >= cutoff)) \
+            .order_by(GroupEvent.id).all()
+        events = [group_event for group_event in events if group_event.id not in self.delivered_events]
+        for group_event in events:
+            self.hub.dispatch(group_event.group_id, group_event.message)
+            self.delivered_events[group_event.id] = group_event.timestamp
+            self.last_event_id = max(self.last_event_id, group_event.id)
+
+        # Forget the delivered events that are too old to be re-read
+        self.delivered_events = {event_id: timestamp for event_id, timestamp in self.delivered_events.items()
+            if timestamp >= cutoff}
+
+        GroupEvent.query.filter(GroupEvent.timestamp < datetime.utcnow() - self.retention) \
+            .delete(synchronize_session=False)
+        db.session.commit()
+
+        return len(events)
+
+
+# Delivers the events held by a session once its transaction has been committed
+@event.listens_for(db.session, 'after_commit')
+def deliver_pending_events(session):
+    for event_hub, group_id, message in session.info.pop(PENDING_EVENTS, []):
+        event_hub.dispatch(group_id, message)
+
+
+# Discards the events held by a session if its transaction is rolled back
+@event.listens_for(db.session, 'after_rollback')
+def discard_pending_events(session):
+    session.info.pop(PENDING_EVENTS, None)
+
+
+hub = EventHub()
@@ -0,0 +1,143 @@
+import csv, itertools
+from datetime import datetime
+from app import db
+from app.utils import *
+
+# Parquet support is optional, as it depends on pyarrow being installed
+try:
+    import pyarrow, pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# The MIME type of each format the raw TestPoint data can be exported as
+CSV_MIMETYPE = 'text/csv'
+PARQUET_MIMETYPE = 'application/vnd.apache.parquet'
+EXPORT_MIMETYPES = {
+    'csv': CSV_MIMETYPE,
+    'parquet': PARQUET_MIMETYPE
+}
+
+# The number of rows fetched from the database, and encoded, at a time
+EXPORT_BATCH_SIZE = 1000
+
+# The columns of the exported TestPoint data
+EXPORT_COLUMNS = [
+    'project_id', 'project_name', 'job_id', 'job_name', 'group_id', 'group_name',
+    'channel_id', 'channel_name', 'measurement_units', 'injection_units', 'error_type', 'max_error',
+    'testpoint_id', 'nominal_injection_value', 'measured_injection_value',
+    'nominal_test_value', 'measured_test_value', 'error', 'lower_limit', 'upper_limit',
+    'test_result', 'channel_last_updated', 'testpoint_last_updated'
+]
+
+
+# Queries the raw TestPoint data of a Project, or of just one of its Jobs
+# Note: yield_per fetches the rows in batches through a server-side cursor rather than loading them all at once
+def testpoint_export_query(project_id, job_id=None):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import Project, Job, Group, Channel, TestPoint
+
+    query = db.session.query(Project.id, Project.name, Job.id, Job.name, Group.id, Group.name,
+        Channel.id, Channel.name, Channel.measurement_units, Channel.injection_units, Channel.error_type,
+        Channel.max_error, Channel.full_scale_range, TestPoint.id, TestPoint.nominal_injection_value,
+        TestPoint.measured_injection_value, TestPoint.nominal_test_value, TestPoint.measured_test_value,
+        TestPoint.test_result, Channel.last_updated, TestPoint.last_updated) \
+        .select_from(TestPoint).join(Channel).join(Group).join(Job).join(Project) \
+        .filter(Project.id == project_id)
+    if job_id is not None:
+        query = query.filter(Job.id == job_id)
+
+    return query.order_by(TestPoint.id).yield_per(EXPORT_BATCH_SIZE)
+
+
+# Turns each queried row into the values of the exported columns, calculating the error and limits along the way
+# Note: The limits are calculated a batch of rows at a time, the same batches the rows are fetched in
+def testpoint_export_rows(query):
+
+    rows = iter(query)
+    while True:
+        batch = list(itertools.islice(rows, EXPORT_BATCH_SIZE))
+        if len(batch) == 0:
+            break
+
+        columns = list(zip(*batch))
+        limits = calc_testpoint_limits(columns[10], columns[11], columns[12], columns[16], columns[17])
+
+        for (project_id, project_name, job_id, job_name, group_id, group_name, channel_id, channel_name,
+                measurement_units, injection_units, error_type, max_error, full_scale_range, testpoint_id,
+                nominal_injection_value, measured_injection_value, nominal_test_value, measured_test_value,
+                test_result, channel_last_updated, testpoint_last_updated), error, lower_limit, upper_limit in \
+                zip(batch, limits["error"], limits["lower_limit"], limits["upper_limit"]):
+
+            yield (project_id, project_name, job_id, job_name, group_id, group_name,
+                channel_id, channel_name, measurement_units, injection_units, error_type, max_error,
+                testpoint_id, nominal_injection_value, measured_injection_value,
+                nominal_test_value, measured_test_value, error, lower_limit, upper_limit,
+                test_result, channel_last_updated, testpoint_last_updated)
+
+
+# Hands back each line the csv writer produces instead of storing it
+class CsvLine(object):
+    def write(self, line):
+        return line
+
+
+# Encodes the exported rows as csv, a batch of lines at a time
+def csv_export(rows):
+
+    writer = csv.writer(CsvLine())
+    yield writer.writerow(EXPORT_COLUMNS)
+
+    lines = []
+    for row in rows:
+        lines.append(writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row]))
+        if len(lines) == EXPORT_BATCH_SIZE:
+            yield ''.join(lines)
+            lines = []
+
+    if len(lines) > 0:
+        yield ''.join(lines)
+
+
+def parquet_available():
+    return pyarrow is not None
+
+
+# Writes the exported rows into a parquet file, a column at a time for each batch of rows
+def write_parquet_export(rows, file):
+
+    if pyarrow is None:
+        raise RuntimeError('Exporting as parquet requires pyarrow to be installed')
+
+    schema = pyarrow.schema([
+        ('project_id', pyarrow.int64()), ('project_name', pyarrow.string()),
+        ('job_id', pyarrow.int64()), ('job_name', pyarrow.string()),
+        ('group_id', pyarrow.int64()), ('group_name', pyarrow.string()),
+        ('channel_id', pyarrow.int64()), ('channel_name', pyarrow.string()),
+        ('measurement_units', pyarrow.string()), ('injection_units', pyarrow.string()),
+        ('error_type', pyarrow.string()), ('max_error', pyarrow.float64()),
+        ('testpoint_id', pyarrow.int64()), ('nominal_injection_value', pyarrow.float64()),
+        ('measured_injection_value', pyarrow.float64()), ('nominal_test_value', pyarrow.float64()),
+        ('measured_test_value', pyarrow.float64()), ('error', pyarrow.float64()),
+        ('lower_limit', pyarrow.float64()), ('upper_limit', pyarrow.float64()),
+        ('test_result', pyarrow.string()),
+        ('channel_last_updated', pyarrow.timestamp('us')), ('testpoint_last_updated', pyarrow.timestamp('us'))
+    ])
+
+    def table(batch):
+        columns = zip(*batch)
+        return pyarrow.Table.from_arrays([pyarrow.array(column, type=field.type)
+            for column, field in zip(columns, schema)], schema=schema)
+
+    with pyarrow.parquet.ParquetWriter(file, schema) as writer:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == EXPORT_BATCH_SIZE:
+                writer.write_table(table(batch))
+                batch = []
+
+        if len(batch) > 0:
+            writer.write_table(table(batch))
+
+    return file
@@ -0,0 +1,299 @@
+import random, statistics
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from app import db
+from app.utils import *
+
+# The number of rows sent to the database by each batched insert
+GENERATOR_BATCH_SIZE = 10000
+
+# The kinds of Group each generated Job is made of, cycled through in order
+# Note: Each kind is the Channel fields shared by the Group's Channels and the TestEquipmentTypes they require
+GROUP_TEMPLATES = [
+    ('Liquid/Air Pressures', dict(measurement_type=MeasurementType.PRESSURE.value,
+        measurement_units=EngUnits.PSI.value, min_range=0, max_range=100,
+        injection_units=EngUnits.AMPS_MILLI.value, min_injection_range=4, max_injection_range=20,
+        error_type=ErrorType.PERCENT_FULL_SCALE.value, max_error=0.25),
+        [StandardTestEquipmentTypes.DIGITAL_PRESSURE_GAUGE, StandardTestEquipmentTypes.DIGITAL_MULTIMETER]),
+    ('Speeds', dict(measurement_type=MeasurementType.FREQUENCY.value,
+        measurement_units=EngUnits.HERTZ.value, min_range=0, max_range=10000,
+        injection_units=EngUnits.HERTZ.value, min_injection_range=0, max_injection_range=10000,
+        error_type=ErrorType.PERCENT_READING.value, max_error=0.1),
+        [StandardTestEquipmentTypes.SIGNAL_SOURCE, StandardTestEquipmentTypes.OSCILLOSCOPE]),
+    ('Vibrations', dict(measurement_type=MeasurementType.ANALOGUE_INPUT.value,
+        measurement_units=EngUnits.VOLTS_DC.value, min_range=-10, max_range=10,
+        injection_units=EngUnits.VOLTS_DC.value, min_injection_range=-10, max_injection_range=10,
+        error_type=ErrorType.ENG_UNITS.value, max_error=0.05),
+        [StandardTestEquipmentTypes.DC_VOLTAGE_SOURCE]),
+    ('Temperatures', dict(measurement_type=MeasurementType.TEMPERATURE.value,
+        measurement_units=EngUnits.DEGREES_CELSIUS.value, min_range=-50, max_range=150,
+        injection_units=EngUnits.OHMS.value, min_injection_range=80.31, max_injection_range=157.33,
+        error_type=ErrorType.ENG_UNITS.value, max_error=0.5),
+        [StandardTestEquipmentTypes.DECADE_BOX]),
+    ('Strain Gauges', dict(measurement_type=MeasurementType.ANALOGUE_INPUT.value,
+        measurement_units=EngUnits.VOLTS_MILLI.value, min_range=0, max_range=30,
+        injection_units=EngUnits.VOLTS_MILLI.value, min_injection_range=0, max_injection_range=30,
+        error_type=ErrorType.PERCENT_FULL_SCALE.value, max_error=0.1),
+        [StandardTestEquipmentTypes.BRIDGE_SIMULATOR]),
+]
+
+# The (stage, phase) of each generated Job, cycled through in order
+JOB_TEMPLATES = [
+    (JobStage.IN_HOUSE.value, JobPhase.COMMISSIONING.value),
+    (JobStage.ON_SITE.value, JobPhase.COMMISSIONING.value),
+    (JobStage.ON_SITE.value, JobPhase.ATP.value)
+]
+
+
+# Sends rows to the database in batches through a single executemany per batch
+class BatchInserter(object):
+
+    def __init__(self, table, batch_size=GENERATOR_BATCH_SIZE):
+        self.table = table
+        self.batch_size = batch_size
+        self.rows = []
+        self.num_rows = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.rows) > 0:
+            db.session.execute(self.table.insert(), self.rows)
+            self.num_rows += len(self.rows)
+            self.rows = []
+
+
+# Chooses how far through testing each Group is, where some Groups are yet to be started and others are finished
+def group_progress(rng):
+
+    draw = rng.random()
+    if draw < 0.15:
+        return 0.0
+    elif draw < 0.35:
+        return 1.0
+    return rng.random()
+
+
+# Bulk creates a synthetic set of Projects x Jobs x Groups x Channels x TestPoints for benchmarking
+# Note: The TestPoints of each tested Channel are measured with a normally distributed error scaled so that roughly
+#       fail_rate of them fall outside their tolerance, and every status counter is filled in as the rows are inserted
+def generate_test_data(num_projects, num_jobs, num_groups, num_channels, num_testpoints, fail_rate=0.02,
+    equipment_per_type=3, calibration_years=3, days=90, seed=None):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import TestPoint, Channel, Group, Job, Project, Company, User, TestEquipment, TestEquipmentType
+    from app.models import CalibrationRecord, ChannelEquipmentRecord, ApprovalRecord
+    from app.models import project_members, company_projects, project_equipment, channel_required_equipment
+
+    if num_testpoints < 2:
+        raise ValueError('Each Channel needs at least 2 TestPoints to spread over its range')
+    if not 0 < fail_rate < 1:
+        raise ValueError(f'The fail rate must be between 0 and 1, not {fail_rate}')
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    start = now - timedelta(days=days)
+
+    # Measurement errors are drawn in units of each TestPoint's max error, so a draw beyond 1 fails
+    error_sigma = 1 / statistics.NormalDist().inv_cdf(1 - fail_rate / 2)
+
+    # Create a Client and Supplier with a User each to sign off the Channels
+    run = Company.query.count() + 1
+    client = Company(name=f'Generated Client {run}', category=CompanyCategory.CLIENT.value)
+    supplier = Company(name=f'Generated Supplier {run}', category=CompanyCategory.SUPPLIER.value)
+    db.session.add_all([client, supplier])
+    db.session.flush()
+    password_hash = generate_password_hash('test')
+    users = {}
+    for company in [client, supplier]:
+        username = f'generated{company.category.lower()}{company.id}'
+        users[company.category] = User(username=username, first_name='Generated', last_name=company.category,
+            email=f'{username}@example.com', company_id=company.id, password_hash=password_hash)
+    db.session.add_all(users.values())
+    db.session.flush()
+
+    # Create the TestEquipment of each standard type with a yearly calibration history
+    addStandardTestEquipmentTypes()
+    equipment_type_ids = {t.name: t.id for t in TestEquipmentType.query.all()}
+    equipment = {}
+    for type_name, type_id in equipment_type_ids.items():
+        for i in range(equipment_per_type):
+            t = TestEquipment(name=type_name, manufacturer='ACME Co.', model_num=f'{type_id:03d}-{i:03d}',
+                serial_num=f'{run:04d}{type_id:03d}{i:03d}', asset_id=f'GEN {run}-{type_id}-{i}',
+                test_equipment_type_id=type_id)
+            db.session.add(t)
+            equipment.setdefault(type_id, []).append(t)
+    db.session.flush()
+
+    calibration_records = BatchInserter(CalibrationRecord.__table__)
+    due_dates = {}
+    for type_equipment in equipment.values():
+        for t in type_equipment:
+            calibration_date = now - timedelta(days=rng.randint(0, 364))
+            for year in range(calibration_years):
+                calibration_records.add(dict(test_equipment_id=t.id,
+                    calibration_date=calibration_date - timedelta(days=365 * year),
+                    calibration_due_date=calibration_date + timedelta(days=365 * (1 - year))))
+            due_dates[t.id] = calibration_date + timedelta(days=365)
+    calibration_records.flush()
+
+    inserters = {
+        'testpoints': BatchInserter(TestPoint.__table__),
+        'required_test_equipment': BatchInserter(channel_required_equipment),
+        'equipment_records': BatchInserter(ChannelEquipmentRecord.__table__),
+        'approval_records': BatchInserter(ApprovalRecord.__table__)
+    }
+    num_channels_added = 0
+
+    for p in range(num_projects):
+        project = Project(name=f'Generated Project {run}-{p + 1}', number=run * 1000 + p + 1)
+        db.session.add(project)
+        db.session.flush()
+        db.session.execute(company_projects.insert(), [
+            dict(company_id=company.id, project_id=project.id) for company in [client, supplier]])
+        db.session.execute(project_members.insert(), [
+            dict(project_id=project.id, user_id=user.id) for user in users.values()])
+        db.session.execute(project_equipment.insert(), [
+            dict(project_id=project.id, test_equipment_id=t.id) for ts in equipment.values() for t in ts])
+
+        for j in range(num_jobs):
+            stage, phase = JOB_TEMPLATES[j % len(JOB_TEMPLATES)]
+            job = Job(project_id=project.id, name='TDAS', stage=stage, phase=phase, last_updated=start)
+            db.session.add(job)
+            db.session.flush()
+            required_client_approval = (phase == JobPhase.ATP.value)
+
+            for g in range(num_groups):
+                group_name, channel_fields, required_types = GROUP_TEMPLATES[g % len(GROUP_TEMPLATES)]
+                group = Group(name=group_name, job_id=job.id, last_updated=start)
+                db.session.add(group)
+                db.session.flush()
+                required_type_ids = [equipment_type_ids[t.value] for t in required_types]
+                full_scale_range = channel_fields['max_range'] - channel_fields['min_range']
+                testpoint_values = calc_testpoint_values(num_testpoints, TestPointListType.STANDARD.value,
+                    channel_fields['min_injection_range'], channel_fields['max_injection_range'],
+                    channel_fields['min_range'], channel_fields['max_range'])
+
+                # Test the first part of the Group's Channels, leaving the Channel at the boundary part way through
+                tested = group_progress(rng) * num_channels
+                num_measured = [min(num_testpoints, max(0, round((tested - c) * num_testpoints)))
+                    for c in range(num_channels)]
+
+                # Measure every tested TestPoint of the Group and evaluate the results together
+                nominal_test_values = [test_value for c in range(num_channels)
+                    for injection_value, test_value in testpoint_values[:num_measured[c]]]
+                max_errors = calc_testpoint_limits(
+                    [channel_fields['error_type']] * len(nominal_test_values),
+                    [channel_fields['max_error']] * len(nominal_test_values),
+                    [full_scale_range] * len(nominal_test_values),
+                    nominal_test_values, [None] * len(nominal_test_values))['max_error']
+                measured_test_values = [nominal + max_error * rng.gauss(0, error_sigma)
+                    for nominal, max_error in zip(nominal_test_values, max_errors)]
+                limits = calc_testpoint_limits(
+                    [channel_fields['error_type']] * len(nominal_test_values),
+                    [channel_fields['max_error']] * len(nominal_test_values),
+                    [full_scale_range] * len(nominal_test_values),
+                    nominal_test_values, measured_test_values)
+
+                # Insert the Group's Channels with the counters and status of their results
+                channels = []
+                channel_results = []
+                measurements = iter(zip(measured_test_values, limits['error'], limits['result']))
+                for c in range(num_channels):
+                    results = [next(measurements) for i in range(num_measured[c])]
+                    stats = {TestResult.UNTESTED.value: num_testpoints - num_measured[c],
+                        TestResult.PASS.value: 0, TestResult.FAIL.value: 0}
+                    for measured, error, result in results:
+                        stats[result] += 1
+                    last_updated = start + timedelta(seconds=rng.randint(0, days * 86400)) \
+                        if num_measured[c] > 0 else start
+                    channels.append(dict(channel_fields,
+                        name=f'{group_name[:3].upper()}{c + 1:05d}',
+                        group_id=group.id,
+                        full_scale_range=full_scale_range,
+                        last_updated=last_updated,
+                        status=testpoint_status(stats, num_testpoints),
+                        num_untested=stats[TestResult.UNTESTED.value],
+                        num_passed=stats[TestResult.PASS.value],
+                        num_failed=stats[TestResult.FAIL.value],
+                        required_supplier_approval=True,
+                        required_client_approval=required_client_approval
+                    ))
+                    channel_results.append(results)
+                db.session.execute(Channel.__table__.insert(), channels)
+                channel_ids = [channel_id for channel_id, in db.session.query(Channel.id)
+                    .filter(Channel.group_id == group.id).order_by(Channel.id)]
+                num_channels_added += len(channel_ids)
+
+                for channel_id, channel, results in zip(channel_ids, channels, channel_results):
+                    last_updated = channel['last_updated']
+
+                    for i, (injection_value, test_value) in enumerate(testpoint_values):
+                        testpoint = dict(channel_id=channel_id, last_updated=last_updated,
+                            nominal_injection_value=injection_value, nominal_test_value=test_value,
+                            measured_injection_value=None, measured_test_value=None, measured_error=None,
+                            test_result=TestResult.UNTESTED.value)
+                        if i < len(results):
+                            measured, error, result = results[i]
+                            testpoint.update(measured_injection_value=injection_value,
+                                measured_test_value=round(measured, 6),
+                                measured_error=round(error, MEASURED_ERROR_DECIMALS), test_result=result)
+                        inserters['testpoints'].add(testpoint)
+
+                    # Record the TestEquipment each tested Channel was tested with
+                    for type_id in required_type_ids:
+                        inserters['required_test_equipment'].add(dict(channel_id=channel_id,
+                            test_equipment_type_id=type_id))
+                        if len(results) > 0:
+                            t = rng.choice(equipment[type_id])
+                            inserters['equipment_records'].add(dict(channel_id=channel_id,
+                                test_equipment_type_id=type_id, test_equipment_id=t.id,
+                                timestamp=last_updated, calibration_due_date=due_dates[t.id]))
+
+                    # Sign off every passed Channel
+                    if channel['status'] == TestResult.PASS.value:
+                        for category, user in users.items():
+                            if category == CompanyCategory.SUPPLIER.value or required_client_approval:
+                                inserters['approval_records'].add(dict(channel_id=channel_id, user_id=user.id,
+                                    timestamp=last_updated, company_category=category))
+
+                # Roll the Group's Channels up through the Group, Job and Project counters
+                stats = channel_stats([])
+                for channel in channels:
+                    stats[channel['status']] += 1
+                set_status_counters(group, stats)
+                group.status = rollup_status(stats, num_channels)
+                group.num_testpoints = num_channels * num_testpoints
+                group.last_updated = max([channel['last_updated'] for channel in channels], default=start)
+                for item in [job, project]:
+                    for status, counter in STATUS_COUNTERS.items():
+                        setattr(item, counter, (getattr(item, counter) or 0) + stats[status])
+                    item.num_testpoints = (item.num_testpoints or 0) + group.num_testpoints
+                job.last_updated = max(job.last_updated, group.last_updated)
+
+            job_stats = counter_stats(job)
+            job.status = rollup_status(job_stats, sum(job_stats.values()))
+
+            # Save each Job as it is finished to keep the transaction small
+            for inserter in inserters.values():
+                inserter.flush()
+            db.session.commit()
+
+        project_stats = counter_stats(project)
+        project.status = rollup_status(project_stats, sum(project_stats.values()))
+        db.session.commit()
+
+    return {
+        'projects': num_projects,
+        'jobs': num_projects * num_jobs,
+        'groups': num_projects * num_jobs * num_groups,
+        'channels': num_channels_added,
+        'testpoints': inserters['testpoints'].num_rows,
+        'test_equipment': sum(len(ts) for ts in equipment.values()),
+        'calibration_records': calibration_records.num_rows,
+        'equipment_records': inserters['equipment_records'].num_rows,
+        'approval_records': inserters['approval_records'].num_rows
+    }
@@ -0,0 +1,244 @@
+import csv, io, itertools, zipfile
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from app import db
+from app.utils import *
+
+# The columns of an imported Channel list
+# - A Channel's required TestEquipmentTypes are listed by name, separated by semicolons
+IMPORT_COLUMNS = [
+    'name', 'measurement_type', 'measurement_units', 'min_range', 'max_range', 'full_scale_range',
+    'max_error', 'error_type', 'min_injection_range', 'max_injection_range', 'injection_units',
+    'num_testpoints', 'required_test_equipment'
+]
+REQUIRED_COLUMNS = [
+    'name', 'measurement_type', 'measurement_units', 'min_range', 'max_range', 'max_error',
+    'error_type', 'min_injection_range', 'max_injection_range', 'injection_units', 'num_testpoints'
+]
+NUMBER_COLUMNS = ['min_range', 'max_range', 'full_scale_range', 'max_error', 'min_injection_range', 'max_injection_range']
+
+# The values allowed in each enum column, matched regardless of case
+ENUM_COLUMNS = {
+    'measurement_type': MeasurementType,
+    'measurement_units': EngUnits,
+    'injection_units': EngUnits,
+    'error_type': ErrorType
+}
+
+# The same limits on the number of TestPoints as the Add Channel form
+MIN_TESTPOINTS = 2
+MAX_TESTPOINTS = 10
+
+# The number of rows validated and inserted at a time, each batch is saved in its own transaction
+IMPORT_BATCH_SIZE = 1000
+
+# The errors raised while reading a file which isn't a readable csv or xlsx file
+IMPORT_FILE_ERRORS = (csv.Error, UnicodeDecodeError, zipfile.BadZipFile, InvalidFileException)
+
+
+# Turns a column heading such as 'Measurement Type' into its column name
+def column_name(heading):
+    return str(heading).strip().lower().replace(' ', '_') if heading is not None else None
+
+
+# Returns None for an empty cell, otherwise the cell's value with any whitespace removed
+def cell_value(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value if value != '' else None
+    return value
+
+
+# Reads each row of a csv file as a dict keyed by its column names, along with the row's number in the file
+def read_csv_rows(file):
+
+    reader = csv.reader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+    columns = [column_name(heading) for heading in next(reader, [])]
+    for row_number, values in enumerate(reader, start=2):
+        row = {column: cell_value(value) for column, value in zip(columns, values)}
+        if any(value is not None for value in row.values()):
+            yield row_number, row
+
+
+# Reads each row of the first sheet of an Excel workbook
+# Note: A read-only workbook loads the rows lazily rather than the whole sheet at once
+def read_xlsx_rows(file):
+
+    # A zip archive without the parts of a workbook fails with the errors of a missing part rather than a bad file
+    try:
+        wb = load_workbook(file, read_only=True, data_only=True)
+    except (KeyError, OSError) as e:
+        raise InvalidFileException(f'The file is not an Excel workbook: {e}')
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        columns = [column_name(heading) for heading in next(rows, [])]
+        for row_number, values in enumerate(rows, start=2):
+            row = {column: cell_value(value) for column, value in zip(columns, values)}
+            if any(value is not None for value in row.values()):
+                yield row_number, row
+    finally:
+        wb.close()
+
+
+def read_import_rows(file, filename):
+    if filename.lower().endswith('.xlsx'):
+        return read_xlsx_rows(file)
+    return read_csv_rows(file)
+
+
+# Imports a list of Channels into a Group, skipping and reporting any row which isn't valid
+class ChannelImport(object):
+
+    def __init__(self, group):
+
+        # Import the Models directly here to avoid a circular import
+        from app.models import Channel, TestEquipmentType
+
+        self.group = group
+        self.num_imported = 0
+        self.errors = []
+
+        # Look up everything a row is checked against once for the whole import
+        self.names = {name for name, in db.session.query(Channel.name).filter(Channel.group_id == group.id)}
+        self.test_equipment_type_ids = {name.lower(): test_equipment_type_id
+            for test_equipment_type_id, name in db.session.query(TestEquipmentType.id, TestEquipmentType.name)}
+        self.enum_values = {column: {item.value.lower(): item.value for item in enum}
+            for column, enum in ENUM_COLUMNS.items()}
+
+        # Channels with the same ranges share the same standard TestPoint values
+        self.testpoint_values = {}
+
+    def add_error(self, row_number, message):
+        self.errors.append((row_number, message))
+
+    # Imports the rows a batch at a time, saving each batch of valid Channels in a single transaction
+    def import_rows(self, rows):
+
+        rows = iter(rows)
+        first_row = next(rows, None)
+        if first_row is None:
+            self.add_error(1, 'The file has no Channels to import')
+            return self
+
+        # Check the file has every required column before reading any further
+        missing_columns = [column for column in REQUIRED_COLUMNS if column not in first_row[1]]
+        if len(missing_columns) > 0:
+            self.add_error(1, f'Missing the required columns: {", ".join(missing_columns)}')
+            return self
+
+        rows = itertools.chain([first_row], rows)
+        while True:
+            batch = list(itertools.islice(rows, IMPORT_BATCH_SIZE))
+            if len(batch) == 0:
+                break
+
+            channel_rows = self.validate_batch(batch)
+            if len(channel_rows) > 0:
+                bulk_add_channel_rows(self.group, channel_rows)
+                db.session.commit()
+                self.num_imported += len(channel_rows)
+
+        return self
+
+    # Checks a batch of rows one column at a time, returning the Channel rows of the valid rows
+    def validate_batch(self, batch):
+
+        row_errors = [[] for row in batch]
+        values = {column: [row.get(column) for row_number, row in batch] for column in IMPORT_COLUMNS}
+
+        # Every required column must be filled in
+        for column in REQUIRED_COLUMNS:
+            for errors, value in zip(row_errors, values[column]):
+                if value is None:
+                    errors.append(f'{column} is required')
+
+        # Each enum column must hold one of the enum's values
+        for column, allowed in self.enum_values.items():
+            for i, value in enumerate(values[column]):
+                if value is not None:
+                    values[column][i] = allowed.get(str(value).lower())
+                    if values[column][i] is None:
+                        row_errors[i].append(f'{column} "{value}" must be one of: {", ".join(allowed.values())}')
+
+        # Each number column must hold a number
+        for column in NUMBER_COLUMNS:
+            for i, value in enumerate(values[column]):
+                if value is not None:
+                    try:
+                        values[column][i] = float(value)
+                    except (TypeError, ValueError):
+                        values[column][i] = None
+                        row_errors[i].append(f'{column} "{value}" is not a number')
+
+        for i, value in enumerate(values['num_testpoints']):
+            if value is not None:
+                try:
+                    values['num_testpoints'][i] = int(float(value))
+                except (TypeError, ValueError):
+                    values['num_testpoints'][i] = None
+                    row_errors[i].append(f'num_testpoints "{value}" is not a number')
+                    continue
+                if not MIN_TESTPOINTS <= values['num_testpoints'][i] <= MAX_TESTPOINTS:
+                    row_errors[i].append(f'num_testpoints must be between {MIN_TESTPOINTS} and {MAX_TESTPOINTS}')
+
+        channel_rows = []
+        for i, (row_number, row) in enumerate(batch):
+            errors = row_errors[i]
+            fields = {column: values[column][i] for column in IMPORT_COLUMNS}
+
+            # Check the values against each other
+            name = fields['name']
+            if name is not None:
+                name = str(name)
+                if name in self.names:
+                    errors.append(f'A channel named "{name}" already exists in the group')
+            if None not in (fields['min_range'], fields['max_range']) and fields['min_range'] >= fields['max_range']:
+                errors.append('max_range must be greater than min_range')
+            if None not in (fields['min_injection_range'], fields['max_injection_range']) and \
+                    fields['min_injection_range'] >= fields['max_injection_range']:
+                errors.append('max_injection_range must be greater than min_injection_range')
+            if fields['max_error'] is not None and fields['max_error'] < 0:
+                errors.append('max_error can\'t be negative')
+            if fields['error_type'] == ErrorType.PERCENT_FULL_SCALE.value and fields['full_scale_range'] is None:
+                errors.append(f'full_scale_range is required when the error_type is {ErrorType.PERCENT_FULL_SCALE.value}')
+
+            test_equipment_type_ids = []
+            if fields['required_test_equipment'] is not None:
+                for test_equipment_type in str(fields['required_test_equipment']).split(';'):
+                    test_equipment_type_id = self.test_equipment_type_ids.get(test_equipment_type.strip().lower())
+                    if test_equipment_type_id is None:
+                        errors.append(f'Unknown test equipment type "{test_equipment_type.strip()}"')
+                    elif test_equipment_type_id not in test_equipment_type_ids:
+                        test_equipment_type_ids.append(test_equipment_type_id)
+
+            if len(errors) > 0:
+                self.add_error(row_number, '; '.join(errors))
+                continue
+
+            # Reuse the TestPoint values of any earlier Channel with the same ranges
+            testpoint_key = (fields['num_testpoints'], fields['min_injection_range'], fields['max_injection_range'],
+                fields['min_range'], fields['max_range'])
+            if testpoint_key not in self.testpoint_values:
+                self.testpoint_values[testpoint_key] = calc_testpoint_values(fields['num_testpoints'],
+                    TestPointListType.STANDARD.value, *testpoint_key[1:])
+
+            self.names.add(name)
+            channel_rows.append((
+                dict(
+                    name=name,
+                    measurement_type=fields['measurement_type'],
+                    measurement_units=fields['measurement_units'],
+                    min_range=fields['min_range'],
+                    max_range=fields['max_range'],
+                    full_scale_range=fields['full_scale_range'],
+                    max_error=fields['max_error'],
+                    error_type=fields['error_type'],
+                    min_injection_range=fields['min_injection_range'],
+                    max_injection_range=fields['max_injection_range'],
+                    injection_units=fields['injection_units']
+                ),
+                self.testpoint_values[testpoint_key],
+                test_equipment_type_ids
+            ))
+
+        return channel_rows
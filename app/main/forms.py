@@ -1,9 +1,10 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileRequired, FileAllowed
 from wtforms import StringField, SubmitField, IntegerField, SelectField, HiddenField
 from wtforms.fields.core import FieldList, FloatField, FormField
 from wtforms.fields.simple import TextAreaField
 from wtforms.fields.html5 import DateField
-from wtforms.validators import InputRequired, ValidationError, DataRequired
+from wtforms.validators import InputRequired, ValidationError, DataRequired, NumberRange
 from app.models import *
 from app.utils import *
 
@@ -20,7 +21,7 @@ MEASUREMENT_TYPE_CHOICES = EMPTY_SELECT_CHOICE + [(t.value, t.value) for t in Me
 ENG_UNITS_CHOICES = EMPTY_SELECT_CHOICE + [(units.value, units.value) for units in EngUnits]
 ERROR_TYPE_CHOICES = [(e.value, e.value) for e in ErrorType]
 NUM_TESTPOINTS_CHOICES = number_list_choices(2, 10, 1)
-QUANTITY_CHOICES = number_list_choices(1, 100, 1)
+MAX_CHANNEL_QUANTITY = 2000
 SUFFIX_CHOICES = number_list_choices(1, 100, 3)
 TESTPOINT_LIST_TYPE_CHOICES = [(t.value, t.value) for t in TestPointListType]
 TEST_EQUIPMENT_TYPE_CHOICES = EMPTY_SELECT_CHOICE + [(t.value, t.value) for t in StandardTestEquipmentTypes]
@@ -100,8 +101,8 @@ class AddChannelForm(FlaskForm):
     name = StringField('Name', render_kw=CUSTOM_FORM_CLASS, validators=[DataRequired()])
     suffix = SelectField('Suffix', render_kw=CUSTOM_SELECT_CLASS,
         choices=SUFFIX_CHOICES, validators=[DataRequired()])
-    quantity = SelectField('Quantity', render_kw=CUSTOM_SELECT_CLASS,
-        choices=QUANTITY_CHOICES, validators=[DataRequired()])
+    quantity = IntegerField('Quantity', render_kw=CUSTOM_FORM_CLASS, default=1,
+        validators=[DataRequired(), NumberRange(min=1, max=MAX_CHANNEL_QUANTITY)])
 
     # Measurement Info
     measurement_type = SelectField('Type', render_kw=CUSTOM_SELECT_CLASS,
@@ -136,6 +137,11 @@ class AddChannelForm(FlaskForm):
     pass
 
 
+class ImportChannelsForm(FlaskForm):
+    file = FileField('Channel List', validators=[FileRequired(), FileAllowed(['csv', 'xlsx'], 'Only .csv and .xlsx files can be imported')])
+    submit = SubmitField('Import Channels', render_kw=PRIMARY_SUBMIT_BUTTON_CLASS)
+
+
 class TestPointForm(FlaskForm):
     injection_value = FloatField('Injection Value', render_kw=CUSTOM_FORM_CLASS)
     test_value = FloatField('Test Value', render_kw=CUSTOM_FORM_CLASS)
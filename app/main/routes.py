@@ -1,16 +1,20 @@
 from time import strptime
-from flask import render_template, url_for, request, redirect, flash, jsonify, current_app
-from flask.helpers import send_from_directory
+from flask import render_template, url_for, request, redirect, flash, jsonify, current_app, Response, abort, stream_with_context
+from flask.helpers import send_file
 from flask_login import current_user, login_required
-from datetime import datetime
+from datetime import datetime, timedelta
 from app import db
+from app.dashboard import dashboard_cache
+from app.events import hub
+from app.exports import *
+from app.imports import *
+from app.reports import REPORT_MIMETYPES, report_queue
 from app.main import bp
 from app.models import *
 from app.main.forms import *
 from app.utils import *
 from wtforms.fields.core import BooleanField
-import logging, openpyxl, os
-from openpyxl.styles import Alignment, Font, Border, Side
+import logging, os, queue, tempfile
 
 # Import the logger assigned to the application
 logger = logging.getLogger(__name__)
@@ -19,33 +23,8 @@ logger = logging.getLogger(__name__)
 @bp.route('/index', methods=['GET', 'POST'])
 def index():
 
-    summary = {}
-
-    users = User.query.all()
-    summary["users"] = users
-
-    companies = Company.query.all()
-    summary["companies"] = companies
-
-    projects = Project.query.all()
-    summary["projects"] = projects
-
-    jobs = Job.query.all()
-    summary["jobs"] = jobs
-
-    groups = Group.query.all()
-    summary["groups"] = groups
-
-    channels = Channel.query.all()
-    summary["channels"] = channels
-
-    test_equipment = TestEquipment.query.all()
-    summary["test_equipment"] = test_equipment
-
-    calibration_records = CalibrationRecord.query.all()
-    summary["calibration_records"] = calibration_records
-
-    logger.debug(f'Projects = {summary["projects"]}')
+    # Count the records of each table rather than loading them, reusing the counts for a few seconds
+    summary = dashboard_cache.get()
 
     return render_template('index.html', title='Home', summary=summary)
 
@@ -98,6 +77,7 @@ def add_company():
         )
 
         db.session.add(company)
+        dashboard_cache.invalidate()
         db.session.commit()
         flash(f'Company "{company.name}" has been added to the database.')
 
@@ -126,6 +106,7 @@ def add_project():
             number=form.number.data
         )
         db.session.add(project)
+        dashboard_cache.invalidate()
         db.session.commit()
 
         # Add the specified Companies to the project
@@ -148,7 +129,10 @@ def projects():
 
     projects = Project.query.all()
 
-    return render_template('projects.html', title='Projects List', projects=projects)
+    # Read the progress of every project from its stored counters rather than per row in the template
+    summaries = progress_summaries(projects)
+
+    return render_template('projects.html', title='Projects List', projects=projects, summaries=summaries)
 
 
 @bp.route('/projects/<project_id>/add_job', methods=['GET', 'POST'])
@@ -192,6 +176,7 @@ def add_job(project_id):
             phase=form.phase.data            
         )
         db.session.add(job)
+        dashboard_cache.invalidate()
         db.session.commit()
         flash(f'Job "{job.stage} {job.phase}" has been added to the {job.project.name} project.')
         
@@ -207,7 +192,10 @@ def jobs(project_id):
     project = Project.query.filter_by(id=project_id).first()
     jobs = Job.query.filter_by(project_id=project_id).all()
 
-    return render_template('jobs.html', title='Job List', jobs=jobs, project=project)
+    # Read the progress of every job from its stored counters rather than per row in the template
+    summaries = progress_summaries(jobs)
+
+    return render_template('jobs.html', title='Job List', jobs=jobs, project=project, summaries=summaries)
 
 
 @bp.route('/job/<job_id>/add_group', methods=['GET', 'POST'])
@@ -229,6 +217,7 @@ def add_group(job_id):
             job_id=form.job_id.data
         )
         db.session.add(group)
+        dashboard_cache.invalidate()
         db.session.commit()
         flash(f'Group "{group.name}" has been added to the {group.job.stage} {group.job.phase} job for the {group.job.project.name} project.')
 
@@ -243,7 +232,10 @@ def groups(job_id):
     job = Job.query.filter_by(id=job_id).first()
     groups = Group.query.filter_by(job_id=job_id).all()
 
-    return render_template('groups.html', title='Group List', groups=groups, job=job)
+    # Read the progress of every group from its stored counters rather than per row in the template
+    summaries = progress_summaries(groups)
+
+    return render_template('groups.html', title='Group List', groups=groups, job=job, summaries=summaries)
 
 
 @bp.route('/group/<group_id>/add_channel', methods=['GET', 'POST'])
@@ -302,7 +294,7 @@ def add_channel(group_id):
         # Extract the list of custom TestPoints if selected in the form
         injection_values = []
         test_values = []
-        if testpoint_list_type == TestPointListType.CUSTOM:
+        if testpoint_list_type == TestPointListType.CUSTOM.value:
             for i, values in enumerate(testpoint_list_data):
                 injection_values.append(values["injection_value"])
                 test_values.append(values["test_value"])
@@ -313,19 +305,17 @@ def add_channel(group_id):
             if form.data['checkbox_' + test_equipment_type.name]:
                 required_test_equipment_types.append(test_equipment_type)
                 
-        # Setup variables to prep for the iteration through channel creation
-        start = suffix
-        end = suffix + quantity
-
-        for i in range(start, end):
+        # Create the new name for each channel, padding every number to the width of the largest
+        width = max(3, len(str(suffix + quantity - 1)))
+        names = [base_name + f'{i:0{width}d}' for i in range(suffix, suffix + quantity)]
 
-            # Create the new name for the channel
-            name = base_name + f'{i:03d}'
+        # Every new channel shares the same nominal TestPoint values
+        testpoint_values = calc_testpoint_values(num_testpoints, testpoint_list_type,
+            min_injection_range, max_injection_range, min_range, max_range, injection_values, test_values)
 
-            # Create the new channel and add it to the database
-            channel = Channel(
-                name=name,
-                group_id=group_id,
+        # Add all the new channels in a single transaction
+        group = Group.query.filter_by(id=group_id).first_or_404()
+        bulk_add_channels(group, names, dict(
                 measurement_type=measurement_type,
                 measurement_units=measurement_units,
                 min_range=min_range,
@@ -336,23 +326,11 @@ def add_channel(group_id):
                 min_injection_range=min_injection_range,
                 max_injection_range=max_injection_range,
                 injection_units=injection_units,
-            )
-            db.session.add(channel)
-            db.session.commit()            
-
-            # Build the list of TestPoints for the new channel
-            channel.build_testpoint_list(num_testpoints, testpoint_list_type,
-                injection_values, test_values)
-
-            # Add the required TestEquipmentType for the new channel
-            for test_equipment_type in required_test_equipment_types:
-                channel.add_test_equipment_type(test_equipment_type)
-
-            # Add the required Approvals for the new channel
-            channel.update_required_approvals()
-            db.session.commit()
+            ), testpoint_values, required_test_equipment_types)
+        dashboard_cache.invalidate()
+        db.session.commit()
         
-        flash(f'{quantity} new channels have been added to the {channel.group.name} group each with {num_testpoints} testpoints.')
+        flash(f'{quantity} new channels have been added to the {group.name} group each with {num_testpoints} testpoints.')
         
         return redirect(url_for(f'main.channels', group_id=group_id))
 
@@ -373,27 +351,54 @@ def add_channel(group_id):
     return render_template('add_channel.html', title='Add Channel', form=form, test_equipment_types=test_equipment_types)
 
 
-@bp.route('/group/<group_id>/channels', methods=['GET', 'POST'])
+@bp.route('/group/<group_id>/import_channels', methods=['GET', 'POST'])
 @login_required
-def channels(group_id):
+def import_channels(group_id):
 
-    # Get a list of all the specified Group's Channels
-    group = Group.query.filter_by(id=group_id).first()
-    channels = Channel.query.filter_by(group_id=group_id).order_by('name').all()
+    group = Group.query.filter_by(id=group_id).first_or_404()
+    form = ImportChannelsForm()
+    channel_import = None
+
+    if form.validate_on_submit():
+
+        # Stream the uploaded Channel list into the Group, a batch of rows at a time
+        upload = form.file.data
+        channel_import = ChannelImport(group)
+        try:
+            channel_import.import_rows(read_import_rows(upload.stream, upload.filename))
+            dashboard_cache.invalidate()
+        except IMPORT_FILE_ERRORS as e:
+            db.session.rollback()
+            channel_import.add_error(None, f'The file could not be read: {e}')
+
+        flash(f'{channel_import.num_imported} new channels have been added to the {group.name} group, '
+            f'{len(channel_import.errors)} rows had errors.')
+
+    return render_template('import_channels.html', title='Import Channels', group=group, form=form,
+        channel_import=channel_import, import_columns=IMPORT_COLUMNS)
+
+
+# Builds the template variables needed to render a list of Channel rows
+# Note: first_index keeps the form field ids unique when rows are appended a page at a time
+def build_channel_rows(group, channels, first_index=0):
+
+    project = group.job.project
+
+    # Prefetch everything displayed for the Channels so the template doesn't query per channel
+    views = channel_views(channels)
+    equipment_choices = test_equipment_choices(project)
 
     # Create the master form to add each channel_form into
     channels_form = ChannelsForm()
+    channels_form.channels.last_index = first_index - 1
 
-    for channel in channels:
-
-        # Get a list of all the TestPoints in each Channel
-        testpoints = channel.testpoints
+    for channel, view in zip(channels, views):
 
         # Create the channel_form to add each testpoint_form into
         channel_form = ChannelForm()
         channel_form.notes.data = channel.notes
 
-        for testpoint in testpoints:
+        for testpoint in view["testpoints"]:
 
             # Create the testpoint_form for each testpoint
             testpoint_form = TestPointForm()
@@ -404,12 +409,63 @@ def channels(group_id):
         # Add the channel_form into the master channels_form
         channels_form.channels.append_entry(channel_form)
 
-    return render_template('channels.html', title='Channel List', channels=channels,
-        channels_form=channels_form, group=group, timestamp=datetime.now())
+    return dict(channels=channels, views=views, channels_form=channels_form, group=group,
+        equipment_choices=equipment_choices, supplier=project.supplier(), client=project.client())
+
+
+@bp.route('/group/<group_id>/channels', methods=['GET', 'POST'])
+@login_required
+def channels(group_id):
+
+    # Get a list of all the specified Group's Channels
+    group = Group.query.filter_by(id=group_id).first()
+    query = Channel.query.filter_by(group_id=group_id).order_by('name')
+
+    # Only render the first page of Channels when a page is requested, the rest are lazy-loaded
+    page = request.args.get('page', type=int)
+    if page is None:
+        channels = query.all()
+        first_index = 0
+        next_url = None
+    else:
+        per_page = current_app.config['ITEMS_PER_PAGE']
+        pagination = query.paginate(page, per_page, False)
+        channels = pagination.items
+        first_index = (pagination.page - 1) * per_page
+        next_url = url_for('main.channel_rows', group_id=group.id, page=pagination.next_num) \
+            if pagination.has_next else None
+
+    rows = build_channel_rows(group, channels, first_index)
+
+    return render_template('channels.html', title='Channel List', next_url=next_url,
+        timestamp=datetime.utcnow(), **rows)
+
+
+@bp.route('/group/<group_id>/channel_rows', methods=['GET'])
+@login_required
+def channel_rows(group_id):
+
+    # Get the requested page of the specified Group's Channels
+    group = Group.query.filter_by(id=group_id).first_or_404()
+    page = request.args.get('page', 1, type=int)
+    per_page = current_app.config['ITEMS_PER_PAGE']
+    pagination = Channel.query.filter_by(group_id=group_id).order_by('name').paginate(page, per_page, False)
+
+    rows = build_channel_rows(group, pagination.items, (pagination.page - 1) * per_page)
+
+    response = {
+        'html': render_template('channel_rows.html', **rows),
+        'page': pagination.page,
+        'num_channels': pagination.total,
+        'next_url': url_for('main.channel_rows', group_id=group.id, page=pagination.next_num) \
+            if pagination.has_next else None
+    }
+    return jsonify(response)
 
 
 @bp.route('/delete_channel', methods=['POST'])
 @login_required
+@unit_of_work
 def delete_channel():
 
     # Extract the request's form dictionary
@@ -422,10 +478,17 @@ def delete_channel():
         # Get the channel from the ajax request
         channel = Channel.query.filter_by(id=data[CHANNEL_ID]).first()
 
+        # Remove the channel and its testpoints from the counters of its parents
+        channel.group.record_channel_status(channel.status, None)
+        channel.group.record_testpoint_count(-channel.num_testpoints())
+
+        # Let the other users viewing the Group know the channel has been deleted
+        hub.publish(channel.group_id, 'channel_deleted', {'channel_id': channel.id})
+
         # Delete the channel and all its dependencies
         channel.delete_all_records()
         db.session.delete(channel)
-        db.session.commit()
+        dashboard_cache.invalidate()
     else:
         raise ValueError(f'{CHANNEL_ID} not found in ajax request:\n{data}')
         
@@ -436,6 +499,7 @@ def delete_channel():
 
 @bp.route('/delete_testpoint', methods=['POST'])
 @login_required
+@unit_of_work
 def delete_testpoint():
 
     # Extract the request's form dictionary
@@ -452,13 +516,16 @@ def delete_testpoint():
 
         # Delete the TestPoint from the Channel
         channel.remove_testpoint(testpoint)
-        db.session.commit()
 
         # Update the Channel and its parent items
         last_updated = datetime.utcnow()
         channel.last_updated = last_updated
         channel.update_each_parent_status(last_updated)
 
+        # Let the other users viewing the Group know about the changes
+        hub.publish(channel.group_id, 'testpoint_deleted', {'channel_id': channel.id, 'testpoint_id': testpoint.id})
+        hub.publish(channel.group_id, 'channel', channel_change(channel))
+
         response = {
             "message": f'TestPoint for {channel} has been successfully deleted.',
             "last_updated": last_updated,
@@ -475,6 +542,7 @@ def delete_testpoint():
 
 @bp.route('/update_channel', methods=['POST'])
 @login_required
+@unit_of_work
 def update_channel():
 
     # Channel Field Constants
@@ -548,7 +616,6 @@ def update_channel():
                 calibration_due_date=new_test_equipment.due_date()
             )
             channel.equipment_records.append(record)
-            db.session.commit()
 
         if key == SUPPLIER_APPROVAL or key == CLIENT_APPROVAL:
 
@@ -557,16 +624,15 @@ def update_channel():
                 channel.add_approval(current_user)
             else:
                 channel.remove_approval(current_user)
-            db.session.commit()
 
         if key == ADD_TESTPOINT:
 
             # Extract the TestPoint data from the request
             if NOMINAL_INJECTION_VALUE in data:
-                nominal_injection_value = data[NOMINAL_INJECTION_VALUE]
+                nominal_injection_value = float(data[NOMINAL_INJECTION_VALUE])
 
             if NOMINAL_TEST_VALUE in data:
-                nominal_test_value = data[NOMINAL_TEST_VALUE]
+                nominal_test_value = float(data[NOMINAL_TEST_VALUE])
 
             # TODO: Add a check for if the nominal_injection_value is > the max_range or < min_range, to update
 
@@ -576,7 +642,6 @@ def update_channel():
                 nominal_test_value = nominal_test_value
             )
             channel.add_testpoint(new_testpoint)
-            db.session.commit()
         
         if key == NEW_CHANNEL_NAME:
             channel.name = none_if_empty(value)
@@ -591,11 +656,12 @@ def update_channel():
         updated_fields.append(key)
     
     # Update the status and last_updated time on each parent item
+    # Note: The changes are saved in a single commit once the request has finished
     channel.last_updated = last_updated
     channel.update_each_parent_status(last_updated)
 
-    # Save the changes to the database
-    db.session.commit()
+    # Let the other users viewing the Group know about the changes
+    hub.publish(channel.group_id, 'channel', channel_change(channel))
 
     # Load the last_updated time into the json payload for a successful ajax request
     response = {
@@ -632,6 +698,7 @@ def update_channel():
 
 @bp.route('/update_testpoint', methods=['POST'])
 @login_required
+@unit_of_work
 def update_testpoint():
     
     # TestPoint and Channel Field Constants
@@ -645,16 +712,11 @@ def update_testpoint():
     LAST_UPDATED = 'last_updated'
 
     # Other constants
-    MESSAGE = 'message'
     PROGRESS = 'progress'
     NUM_PASSED = 'num_passed'
 
-    # Variables to keep track of the updated fields
-    updated_fields = []
-    num_fields = 0
-
-    # Evaluation variables
-    has_channel = False
+    # Only the measured values are entered by the user, the error and result are evaluated below
+    MEASURED_FIELDS = [MEASURED_INJECTION_VALUE, MEASURED_TEST_VALUE]
 
     # Extract the request's form dictionary
     data = request.form.to_dict()
@@ -662,119 +724,255 @@ def update_testpoint():
     # Check which TestPoint is being updated
     if TESTPOINT_ID in data:        
 
-        # Remove the testpoint_id from the data to check how many parameters are being updated
-        testpoint = TestPoint.query.filter_by(id=request.form[TESTPOINT_ID]).first()
+        # Remove the testpoint_id from the data to check which parameters are being updated
+        testpoint = TestPoint.query.filter_by(id=request.form[TESTPOINT_ID]).first_or_404()
         data.pop(TESTPOINT_ID)
     else:
         raise ValueError(f'{TESTPOINT_ID} not found in ajax request:\n{data}')
         
     if CHANNEL_ID in data:        
 
-        # Remove the channel_id from the data to check how many parameters are being updated
-        channel = Channel.query.filter_by(id=request.form[CHANNEL_ID]).first()
-        data.pop(CHANNEL_ID)
-        has_channel = True
+        # Remove the channel_id from the data to check which parameters are being updated
+        # Note: The counters are adjusted rather than recounted, so only the TestPoint's own Channel can be changed
+        channel = testpoint.channel
+        if str(channel.id) != data.pop(CHANNEL_ID):
+            return jsonify({'message': f'TestPoint {testpoint.id} is not on Channel {request.form[CHANNEL_ID]}'}), 400
     else:
         raise ValueError(f'{CHANNEL_ID} not found in ajax request:\n{data}')
-    
-    # Calculate the new number of variables to iterate over
-    num_fields = len(data)
-
-    # Iterate through each field in the request and update the TestPoint accordingly
-    for key, value in data.items():
-
-        if key == MEASURED_INJECTION_VALUE:            
-            testpoint.measured_injection_value = none_if_empty(value)
 
-        if key == MEASURED_TEST_VALUE:
-            testpoint.measured_test_value = none_if_empty(value)
+    # Check that only measured values are being updated
+    unknown_fields = [key for key in data if key not in MEASURED_FIELDS]
+    if len(unknown_fields) > 0:
+        raise ValueError(f'Only the measured values of a TestPoint can be updated, not: {unknown_fields}')
 
-        if key == MEASURED_ERROR:
-            testpoint.measured_error = none_if_empty(value)
+    # Keep track of the previous result and status to only send back what has changed
+    previous_error = testpoint.measured_error
+    previous_result = testpoint.test_result
+    previous_status = channel.status
 
-        if key == TEST_RESULT:
-            testpoint.test_result = value
+    if MEASURED_INJECTION_VALUE in data:
+        testpoint.measured_injection_value = float_or_none(data[MEASURED_INJECTION_VALUE])
 
-        # Add the processed key to the list of updated fields
-        updated_fields.append(key)
-
-    # Check to make sure any fields got updated
-    num_updated = len(updated_fields)
-    if not num_updated == num_fields:
-        raise ValueError(f'Error updating TestPoint fields. Only {num_updated}/{num_fields} updated successfully.')
+    # Evaluate the measured error and result of a new measured test value against the Channel's tolerance
+    if MEASURED_TEST_VALUE in data:
+        testpoint.measured_test_value = float_or_none(data[MEASURED_TEST_VALUE])
+        testpoint.evaluate()
 
     # Update the last_updated time now that changes have been made
     last_updated = datetime.utcnow()
     testpoint.last_updated = last_updated
+    channel.record_testpoint_result(previous_result, testpoint.test_result)
 
     # Update the status and last_update time of the updated channel, group, job and project
-    if has_channel:
-        channel.last_updated = last_updated
-        channel.update_each_parent_status(last_updated)
+    # Note: The changes are saved in a single commit once the request has finished
+    channel.last_updated = last_updated
+    channel.update_each_parent_status(last_updated)
 
-    # Save the changes to the database
-    db.session.commit()
+    # Let the other users viewing the Group know about the changes
+    hub.publish(channel.group_id, 'testpoint', testpoint_change(testpoint))
+    hub.publish(channel.group_id, 'channel', channel_change(channel))
+
+    # Only send back the fields that have changed, along with the last_updated time
+    response = {LAST_UPDATED: last_updated}
+    if testpoint.measured_error != previous_error:
+        response[MEASURED_ERROR] = testpoint.measured_error
+    if testpoint.test_result != previous_result:
+        response[TEST_RESULT] = testpoint.test_result
+        response[PROGRESS] = channel.testpoint_progress()
+        response[NUM_PASSED] = counter_stats(channel)[TestResult.PASS.value]
+    if channel.status != previous_status:
+        response[STATUS] = channel.status
 
-    # Load the last_updated time into the json payload for a successful ajax request
+    return jsonify(response)
+
+
+@bp.route('/update_testpoints', methods=['POST'])
+@login_required
+@unit_of_work
+def update_testpoints():
+
+    # TestPoint Field Constants
+    TESTPOINTS = 'testpoints'
+    TESTPOINT_ID = 'testpoint_id'
+    MEASURED_INJECTION_VALUE = 'measured_injection_value'
+    MEASURED_TEST_VALUE = 'measured_test_value'
+    LAST_UPDATED = 'last_updated'
+
+    # Other constants
+    MESSAGE = 'message'
+    ERRORS = 'errors'
+    CHANNELS = 'channels'
+
+    # Only the measured values are sent by the rig, the error and result are evaluated below
+    MEASURED_FIELDS = [MEASURED_INJECTION_VALUE, MEASURED_TEST_VALUE]
+
+    # Extract the request's json records
+    # ex. {"testpoints": [{"testpoint_id": 1, "measured_test_value": 10.02}, ...]}
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get(TESTPOINTS), list):
+        return jsonify({MESSAGE: f'Expected a json object with a list of {TESTPOINTS}'}), 400
+    records = data[TESTPOINTS]
+    if len(records) > current_app.config['TESTPOINT_BATCH_MAX_SIZE']:
+        return jsonify({MESSAGE: f'Too many {TESTPOINTS}, the most that can be updated at once is '
+            f'{current_app.config["TESTPOINT_BATCH_MAX_SIZE"]}'}), 413
+
+    # Check every record before applying any of them, so that the batch is saved in full or not at all
+    errors = []
+    updates = {}
+    for i, record in enumerate(records):
+        if not isinstance(record, dict) or TESTPOINT_ID not in record:
+            errors.append(f'Record {i} has no {TESTPOINT_ID}')
+            continue
+
+        unknown_fields = [key for key in record if key not in MEASURED_FIELDS and key != TESTPOINT_ID]
+        if len(unknown_fields) > 0:
+            errors.append(f'Record {i} can only update the measured values of a TestPoint, not: {unknown_fields}')
+            continue
+
+        try:
+            testpoint_id = int(record[TESTPOINT_ID])
+            values = {key: float_or_none(record[key]) for key in MEASURED_FIELDS if key in record}
+        except (TypeError, ValueError):
+            errors.append(f'Record {i} has a value that is not a number')
+            continue
+
+        # A later reading of the same TestPoint replaces an earlier one
+        updates.setdefault(testpoint_id, {}).update(values)
+
+    # Load every TestPoint and its Channel in a single query
+    testpoints = TestPoint.query.options(db.joinedload(TestPoint.channel)) \
+        .filter(TestPoint.id.in_(updates)).all() if len(updates) > 0 else []
+    missing_ids = set(updates) - {testpoint.id for testpoint in testpoints}
+    errors += [f'TestPoint {testpoint_id} does not exist' for testpoint_id in sorted(missing_ids)]
+
+    if len(errors) > 0:
+        return jsonify({MESSAGE: 'No TestPoints were updated', ERRORS: errors}), 400
+
+    # Apply the measured values and evaluate the results of the whole batch at once
+    last_updated = datetime.utcnow()
+    previous_results = {testpoint.id: testpoint.test_result for testpoint in testpoints}
+    evaluated = []
+    for testpoint in testpoints:
+        values = updates[testpoint.id]
+        if MEASURED_INJECTION_VALUE in values:
+            testpoint.measured_injection_value = values[MEASURED_INJECTION_VALUE]
+        if MEASURED_TEST_VALUE in values:
+            testpoint.measured_test_value = values[MEASURED_TEST_VALUE]
+            evaluated.append(testpoint)
+        testpoint.last_updated = last_updated
+    evaluate_testpoints(evaluated)
+
+    # Move each TestPoint between its Channel's result counters
+    channels = {}
+    for testpoint in testpoints:
+        channels[testpoint.channel_id] = testpoint.channel
+        testpoint.channel.record_testpoint_result(previous_results[testpoint.id], testpoint.test_result)
+
+    # Roll the status up once for each Channel, Group, Job and Project rather than once for each TestPoint
+    # Note: The changes are saved in a single commit once the request has finished
+    Channel.update_parent_statuses(list(channels.values()), last_updated)
+
+    # Let the other users viewing each Group know about the changes
+    for testpoint in testpoints:
+        hub.publish(testpoint.channel.group_id, 'testpoint', testpoint_change(testpoint))
+    for channel in channels.values():
+        hub.publish(channel.group_id, 'channel', channel_change(channel))
+
+    # Send back the evaluated results along with the new status of each Channel
     response = {
-        MESSAGE: f'{testpoint} has successfully updated the following fields: {updated_fields}',
         LAST_UPDATED: last_updated,
-        PROGRESS: channel.testpoint_progress(),
-        STATUS: channel.status,
-        NUM_PASSED: channel.testpoint_stats()[TestResult.PASS.value]
+        TESTPOINTS: [{
+            TESTPOINT_ID: testpoint.id,
+            'measured_error': testpoint.measured_error,
+            'test_result': testpoint.test_result
+        } for testpoint in evaluated],
+        CHANNELS: [{
+            'channel_id': channel.id,
+            'status': channel.status
+        } for channel in channels.values()]
     }
 
     return jsonify(response)
 
 
 @bp.route('/get_updated_group_data', methods=['GET', 'POST'])
+@login_required
 def get_updated_group_data():
 
     # Extract the request's form dictionary
     data = request.form.to_dict()
-    print(data)
-
-    # Extract the data from the request
-    group = Group.query.filter_by(id=data["group_id"]).first()
-    page_load_timestamp_raw = data["page_load_timestamp"]
-    page_load_timestamp = datetime.strptime(page_load_timestamp_raw, '%Y-%m-%d %H:%M:%S.%f')
-
-    # Dynamically compile a list of items updated by the current_user to exclude them from the query?
-    # May not be able to if another user edits a testpoint/channel after the current user has
-    # Should maybe add a last_updated_by_user field on each channel and testpoint?
-
-    channels_to_update = []
-    testpoints_to_update = []
+    GROUP_ID = 'group_id'
+    CURSOR = 'cursor'
+    PAGE_LOAD_TIMESTAMP = 'page_load_timestamp'
 
-    # Find all the channels and testpoints which have been updated after the page was loaded
-    # Note: This intent is to find all changes from other users that are not visibile to the current_user
-    for channel in group.channels.all():
+    group = Group.query.filter_by(id=data.get(GROUP_ID)).first_or_404()
 
-        # Find all the channels which have been updated after the page was loaded
-        if channel.last_updated > page_load_timestamp:
-            channels_to_update.append(channel.id)
-        
-        for testpoint in channel.testpoints.all():
-            
-            # Find all testpoints which have been updated after the page was loaded
-            if testpoint.last_updated > page_load_timestamp:
-                testpoints_to_update.append(testpoint.id)
-
-                # Get: 
+    # Continue from the cursor of the previous poll, or from when the page was loaded on the first poll
+    raw_cursor = data.get(CURSOR) or data.get(PAGE_LOAD_TIMESTAMP)
+    if raw_cursor is None:
+        return jsonify({'message': f'{CURSOR} not found in ajax request'}), 400
+    try:
+        cursor = datetime.fromisoformat(raw_cursor)
+    except ValueError:
+        return jsonify({'message': f'{CURSOR} is not a valid timestamp: {raw_cursor}'}), 400
 
-    
-    print(f'Channel IDs to update: {channels_to_update}')
-    print(f'TestPoint IDs to update: {testpoints_to_update}')
+    # Take the next cursor before querying so that no change is missed between polls
+    # Note: The overlap catches changes that were timestamped before the cursor but committed after it
+    next_cursor = datetime.utcnow()
+    overlap = timedelta(seconds=current_app.config['CHANGE_FEED_OVERLAP_SECONDS'])
+    changes = group_changes(group.id, cursor - overlap)
 
     response = {
         'message': 'Successfully fetched for group data',
         'group': group.name,
-        'page_load_timestamp': page_load_timestamp
+        'cursor': str(next_cursor),
+        'channels': changes['channels'],
+        'testpoints': changes['testpoints']
     }
 
     return jsonify(response)
 
 
+@bp.route('/group/<group_id>/events', methods=['GET'])
+@login_required
+def group_events(group_id):
+
+    # Subscribe to the changes published for the Group
+    group = Group.query.filter_by(id=group_id).first_or_404()
+    group_id = group.id
+    subscriber = hub.subscribe(group_id)
+    heartbeat = current_app.config['EVENT_HEARTBEAT_SECONDS']
+    closes_at = datetime.utcnow() + timedelta(seconds=current_app.config['EVENT_STREAM_MAX_SECONDS'])
+
+    # Turn the client away once this process holds as many streams as it can, telling it to poll instead
+    # Note: A 204 response stops the browser from reconnecting the stream
+    if subscriber is None:
+        return Response(status=204)
+
+    # Release the database connection as the stream may stay open for hours
+    db.session.remove()
+
+    def stream():
+        try:
+            # Tell the browser how long to wait before reconnecting
+            yield 'retry: 3000\n\n'
+
+            # Close the stream once it's been open for its maximum time, for the browser to reconnect
+            remaining = (closes_at - datetime.utcnow()).total_seconds()
+            while remaining > 0:
+                try:
+                    yield f'data: {subscriber.get(timeout=min(heartbeat, remaining))}\n\n'
+                except queue.Empty:
+                    # Send a comment to keep the connection open through any proxies
+                    yield ': heartbeat\n\n'
+                remaining = (closes_at - datetime.utcnow()).total_seconds()
+        finally:
+            hub.unsubscribe(group_id, subscriber)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(stream(), mimetype='text/event-stream', headers=headers)
+
+
 @bp.route('/add_test_equipment', methods=['GET', 'POST'])
 @login_required
 def add_test_equipment():
@@ -803,6 +1001,7 @@ def add_test_equipment():
             test_equipment_id=test_equipment.id
         )
         test_equipment.add_calibration_record(calibration_record)
+        dashboard_cache.invalidate()
         db.session.commit()
 
         # Add the new TestEquipment to the list of TestEquipmentTypes 
@@ -836,6 +1035,7 @@ def add_calibration_record(test_equipment_id):
             test_equipment_id=test_equipment_id
         )
         db.session.add(calibration_record)
+        dashboard_cache.invalidate()
         db.session.commit()
         flash(f'Calibration Record has been added for "{test_equipment}" with a due date of {calibration_record.calibration_due_date}.')
 
@@ -998,157 +1198,119 @@ def test2():
 
     return render_template('test2.html', title="Test Items")
 
+# The status of a queued report along with the urls for following its progress
+def report_response(report):
+
+    response = {
+        'report_id': report.id,
+        'job_id': report.job_id,
+        'project_id': report.project_id,
+        'export_format': report.export_format,
+        'status': report.status,
+        'error': report.error,
+        'status_url': url_for('main.report_status', report_id=report.id),
+        'download_url': url_for('main.download_report', report_id=report.id) \
+            if report.status == ReportStatus.DONE.value else None
+    }
+    return response
+
+
+# Scripts are given the queued report's id straight away, while users are shown a page which downloads it once ready
+def queued_report_response(report, name, back_url):
+
+    response = report_response(report)
+    if request.method == 'POST':
+        return jsonify(response), 200 if report.status == ReportStatus.DONE.value else 202
+
+    return render_template('report.html', title=f'{name} Report', name=name, back_url=back_url, report=response)
+
+
 @bp.route('/generate_channel_report/<job_id>', methods=['GET', 'POST'])
+@login_required
 def generate_channel_report(job_id):
 
-    def apply_horizontal_border(sheet, border_type, border_style, row_num, start_col, end_col):
-
-        # Define the border formats
-        side = Side(border_style=border_style, color="000000")        
-        if border_type == TOP_BORDER_TYPE:
-            border = Border(top=side)
-        elif border_type == BOTTOM_BORDER_TYPE:
-            border = Border(bottom=side)
-
-        # Apply the border
-        # Note: Adding +1 due to starting at index 1
-        for i in range(end_col - start_col + 1):
-            sheet.cell(row=row_num, column=start_col + i).border = border
-
-    def create_header_row(sheet, row_num):
-
-        # Fill the values into the cells
-        sheet[f'A{row_num}'] = '#'
-        sheet[f'B{row_num}'] = 'Channel Information'
-        sheet[f'D{row_num}'] = 'Injection Value'
-        sheet[f'E{row_num}'] = 'Lower Limit'
-        sheet[f'F{row_num}'] = 'Measurement Value'
-        sheet[f'G{row_num}'] = 'Upper Limit'
-        sheet[f'H{row_num}'] = 'Result'
-        sheet[f'I{row_num}'] = 'Notes'
-
-        # Format the cells
-        cols = ['A', 'B', 'D', 'E', 'F', 'G', 'H', 'I']
-        for col in cols:     
-            sheet[f'{col}{row_num}'].style = '20 % - Accent1'
-            sheet[f'{col}{row_num}'].alignment = Alignment(horizontal='center', vertical='center')
-            sheet[f'{col}{row_num}'].border = thin_border
-
-        sheet.merge_cells(f'B{row_num}:C{row_num}')
-        sheet.column_dimensions['I'].width = 20
-
-        return row_num + 1
-
-    def create_group_row(sheet, group, row_num):
-
-        # Define some constants for the formatting
-        START_COL = 1
-        END_COL = 9
-
-        # Merge all the cells in the row for an full divider
-        sheet.merge_cells(f'A{row_num}:I{row_num}')
-
-        # Create and format the row for the Group
-        sheet[f'A{row_num}'].style = '20 % - Accent3'
-        sheet[f'A{row_num}'] = group.name
-        sheet[f'A{row_num}'].alignment = Alignment(vertical='center')
-        sheet[f'A{row_num}'].font = Font(bold=True)
-
-        return row_num + 1
-
-    def create_channel_row(sheet, channel, row_num):
-
-        # Change out the Eng Units type for the Channel's actual units
-        error_type = channel.error_type
-        if error_type == 'Eng Units':
-            error_type = channel.measurement_units
-
-        # Define some constants for the Channel border
-        START_COL = 1
-        END_COL = 9
-        apply_horizontal_border(sheet, TOP_BORDER_TYPE, "double", row_num, START_COL, END_COL)
-
-        # Fill the values into the cells
-        sheet[f'A{row_num}'] = channel.id
-        sheet[f'B{row_num}'] = f'Name: {channel.name}'
-        sheet[f'C{row_num}'] = f'Tolerance: {channel.max_error} {error_type}'
-        sheet[f'B{row_num+1}'] = f'Drawing Ref: ___________________'
-        sheet[f'C{row_num+1}'] = f'Interface: ____________________'
-        sheet[f'B{row_num+2}'] = f'DC Voltage Source: _____________'
-        sheet[f'C{row_num+2}'] = f'Cal Due Date: ________________'
-        sheet[f'B{row_num+3}'] = f'MDS: _________________________'
-        sheet[f'C{row_num+3}'] = f'Rolls-Royce: _________________'
-
-        # Format the cells            
-        sheet[f'A{row_num}'].alignment = Alignment(horizontal='center', vertical='center')
-
-        return row_num
-
-    def create_testpoint_row(sheet, channel, testpoint, row_num):
-
-        # Fill the values into the cells
-        sheet[f'D{row_num}'] = f'{testpoint.nominal_injection_value} {channel.injection_units}'
-        sheet[f'E{row_num}'] = f'{testpoint.lower_limit()} {channel.measurement_units}'
-        sheet[f'F{row_num}'] = f'{channel.measurement_units}'
-        sheet[f'G{row_num}'] = f'{testpoint.upper_limit()} {channel.measurement_units}'
-
-        # Format the cells
-        sheet[f'F{row_num}'].alignment = Alignment(horizontal='right', vertical='center', indent=1)
-        sheet[f'F{row_num}'].border = thin_border
-        cols = ['D', 'E', 'G', 'H']
-        for col in cols:
-            sheet[f'{col}{row_num}'].alignment = Alignment(horizontal='center', vertical='center')
-            sheet[f'{col}{row_num}'].border = thin_border   
-
-        return row_num + 1
-
-    # Setup the workbook to prepare for the report
-    wb = openpyxl.Workbook()
-    sheet = wb.active
-    sheet.title = 'Report'
-    sheet = wb[sheet.title]
-
-    # Constants
-    NUM_CHANNEL_HEADER_ROWS = 5
-    TOP_BORDER_TYPE = 1
-    BOTTOM_BORDER_TYPE = 2
-
-    # Setup some initial formatting for the report
-    thin = Side(border_style="thin", color="000000")
-    thin_border = Border(top=thin, left=thin, right=thin, bottom=thin)
-    row_num = 1
-    row_num = create_header_row(sheet, row_num)    
-
-    # Iterate through each Group and its Channels within the Job
-    job = Job.query.filter_by(id=job_id).first()
-    for group in job.groups.all():
-        row_num = create_group_row(sheet, group, row_num)
+    job = Job.query.filter_by(id=job_id).first_or_404()
+
+    # Queue the report to be built in the background, unless one has already been built from the same data
+    report = report_queue.request_report(job_id=job.id)
+
+    return queued_report_response(report, job.name, url_for('main.jobs', project_id=job.project_id))
 
-        for channel in group.channels.all():
-            row_num = create_channel_row(sheet, channel, row_num)
-            
-            # Column formatting
-            sheet['A1'].alignment = Alignment(horizontal='center', vertical='center')
-            sheet['A1'].font = Font(bold=True)
 
-            # Starting row
-            start_row = row_num
+@bp.route('/generate_project_report/<project_id>', methods=['GET', 'POST'])
+@login_required
+def generate_project_report(project_id):
+
+    project = Project.query.filter_by(id=project_id).first_or_404()
+
+    # The report is either a single workbook with a sheet per Job or a zip holding a workbook for each Job
+    export_format = request.args.get('format', 'xlsx')
+    if export_format not in REPORT_MIMETYPES:
+        abort(400)
+
+    # Queue the report to be built in the background, unless one has already been built from the same data
+    report = report_queue.request_report(project_id=project.id, export_format=export_format)
+
+    return queued_report_response(report, project.name, url_for('main.jobs', project_id=project.id))
+
+
+@bp.route('/report/<report_id>/status')
+@login_required
+def report_status(report_id):
 
-            for testpoint in channel.testpoints.all():
-                row_num = create_testpoint_row(sheet, channel, testpoint, row_num)
+    report = Report.query.filter_by(id=report_id).first_or_404()
+    return jsonify(report_response(report))
 
-            # Set the row for the next Channel if the number of TestPoints interferes with the Channel Information
-            num_testpoints = channel.num_testpoints()
-            if num_testpoints < NUM_CHANNEL_HEADER_ROWS:
-                row_num = start_row + NUM_CHANNEL_HEADER_ROWS
 
-    # Save the new report to the static directory
-    directory = current_app.config["TMP_DIRECTORY"]
-    filename = 'Job_Report_' + datetime.now().strftime("%m-%d-%Y_%H%M%S") + '.xlsx'
-    wb.save(directory + filename)
+@bp.route('/report/<report_id>/download')
+@login_required
+def download_report(report_id):
+
+    report = Report.query.filter_by(id=report_id).first_or_404()
+
+    # Only finished reports can be downloaded
+    if report.status != ReportStatus.DONE.value:
+        return jsonify(report_response(report)), 409
+
+    # Build the report again if it has since been evicted from the cache
+    path = report_queue.path(report)
+    if not os.path.exists(path):
+        if report.project_id is not None:
+            return redirect(url_for('main.generate_project_report', project_id=report.project_id,
+                format=report.export_format))
+        return redirect(url_for('main.generate_channel_report', job_id=report.job_id))
+    report_queue.touch(report)
 
     # Send the report back to the user
-    try:
-        return send_from_directory(directory=directory, filename=filename, as_attachment=True)
-    except FileNotFoundError:
-        return render_template('errors/404.html'), 404
\ No newline at end of file
+    prefix = 'Project_Report_' if report.project_id is not None else 'Job_Report_'
+    filename = prefix + report.completed.strftime("%m-%d-%Y_%H%M%S") + '.' + report.export_format
+    return send_file(path, mimetype=REPORT_MIMETYPES[report.export_format], as_attachment=True,
+        attachment_filename=filename)
+
+
+@bp.route('/projects/<project_id>/export_testpoints')
+@login_required
+def export_testpoints(project_id):
+
+    project = Project.query.filter_by(id=project_id).first_or_404()
+
+    # The raw TestPoint data of the whole Project, or of just one of its Jobs
+    export_format = request.args.get('format', 'csv')
+    job_id = request.args.get('job_id', None, type=int)
+    if export_format not in EXPORT_MIMETYPES:
+        abort(400)
+    rows = testpoint_export_rows(testpoint_export_query(project.id, job_id))
+    filename = f'TestPoints_{project.id}_' + datetime.now().strftime("%m-%d-%Y_%H%M%S") + '.' + export_format
+
+    # Stream the csv as the rows are fetched, so the memory used stays flat however large the Project is
+    if export_format == 'csv':
+        headers = {'Content-Disposition': f'attachment; filename={filename}'}
+        return Response(stream_with_context(csv_export(rows)), mimetype=CSV_MIMETYPE, headers=headers)
+
+    # A parquet file can only be sent once it is complete, as its footer describes every batch of rows
+    if not parquet_available():
+        abort(501)
+    export = tempfile.TemporaryFile()
+    write_parquet_export(rows, export)
+    export.seek(0)
+    return send_file(export, mimetype=PARQUET_MIMETYPE, as_attachment=True, attachment_filename=filename)
@@ -3,6 +3,7 @@ from time import time
 from flask import current_app
 from flask_login import UserMixin
 from app import db, login
+from app.rollups import rollup_worker
 from app.utils import *
 import jwt, logging, pprint
 from hashlib import md5
@@ -16,7 +17,10 @@ logger = logging.getLogger(__name__)
 project_members = db.Table(
     'project_members', db.Model.metadata,
     db.Column('project_id', db.Integer, db.ForeignKey('project.id')),
-    db.Column('user_id', db.Integer, db.ForeignKey('user.id'))
+    db.Column('user_id', db.Integer, db.ForeignKey('user.id')),
+    # Serves both the Project's list of members and each User's list of projects
+    db.Index('ix_project_members_project_id_user_id', 'project_id', 'user_id'),
+    db.Index('ix_project_members_user_id', 'user_id')
 )
 
 # Stores all the Companies involved in a project
@@ -24,25 +28,38 @@ company_projects = db.Table(
     'company_projects', db.Model.metadata,
     db.Column('company_id', db.Integer, db.ForeignKey('company.id')),
     db.Column('project_id', db.Integer, db.ForeignKey('project.id')),
+    # Serves both the Company's list of projects and each Project's list of companies
+    db.Index('ix_company_projects_company_id_project_id', 'company_id', 'project_id'),
+    db.Index('ix_company_projects_project_id', 'project_id')
 )
 
 # Stores all the TestEquipment used for a project
 project_equipment = db.Table(
     'project_equipment', db.Model.metadata,
     db.Column('project_id', db.Integer, db.ForeignKey('project.id')),
-    db.Column('test_equipment_id', db.Integer, db.ForeignKey('test_equipment.id'))
+    db.Column('test_equipment_id', db.Integer, db.ForeignKey('test_equipment.id')),
+    # Serves both the Project's list of test equipment and each TestEquipment's list of projects
+    db.Index('ix_project_equipment_project_id_test_equipment_id', 'project_id', 'test_equipment_id'),
+    db.Index('ix_project_equipment_test_equipment_id', 'test_equipment_id')
 )
 
 # Stores all the required TestEquipmentTypes for testing a channel
 channel_required_equipment = db.Table(
     'channel_required_equipment', db.Model.metadata,
     db.Column('channel_id', db.Integer, db.ForeignKey('channel.id')),
-    db.Column('test_equipment_type_id', db.Integer, db.ForeignKey('test_equipment_type.id'))
+    db.Column('test_equipment_type_id', db.Integer, db.ForeignKey('test_equipment_type.id')),
+    # Serves both the Channel's required equipment and each TestEquipmentType's list of channels
+    db.Index('ix_channel_required_equipment_channel_id_test_equipment_type_id', 'channel_id', 'test_equipment_type_id'),
+    db.Index('ix_channel_required_equipment_test_equipment_type_id', 'test_equipment_type_id')
 )
 
 
 class TestPoint(db.Model):
     __tablename__ = 'testpoint'
+    __table_args__ = (
+        # Serves the change feed's search for a Channel's recently updated TestPoints
+        db.Index('ix_testpoint_channel_id_last_updated', 'channel_id', 'last_updated'),
+    )
     # Basic Info
     id = db.Column(db.Integer, primary_key=True)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
@@ -77,26 +94,8 @@ class TestPoint(db.Model):
     # Calculates the maximum error for a measurement based on the error type
     def calc_max_error(self):
         channel = self.channel
-        error_type = channel.error_type
-        max_error = channel.max_error
-
-        # Returns an error in the engineering units provided
-        # ex. max_error = +/- 0.05 VDC
-        if error_type == ErrorType.ENG_UNITS.value: 
-            return max_error
-
-        # Returns an error calculated from the channel's full scale range
-        # ex. max_error of 0.05 %FS is equivalent to 0.125 psi on a 0-250 psi full scale range
-        elif error_type == ErrorType.PERCENT_FULL_SCALE.value:
-            return channel.full_scale_range * (max_error / 100)
-
-        # Returns an error based on the measured/read value being evaluated
-        # ex. max_error of 0.1 %RDG is equivalent to 0.015 Hz at a measured value of 15 Hz
-        elif error_type == ErrorType.PERCENT_READING.value:
-            if self.measured_test_value == None:
-                return self.nominal_test_value * (max_error / 100)
-            else:
-                return self.measured_test_value * (max_error / 100)
+        return calc_max_error(channel.error_type, channel.max_error, channel.full_scale_range,
+            self.nominal_test_value, self.measured_test_value)
 
     # Calculates the lower limit of an acceptable measurement
     def lower_limit(self):
@@ -106,9 +105,20 @@ class TestPoint(db.Model):
     def upper_limit(self):
         return self.nominal_test_value + self.calc_max_error()
 
+    # Evaluates the measured test value against the Channel's tolerance, storing the measured error and result
+    def evaluate(self):
+        self.measured_error, self.test_result = evaluate_measurement(self.channel, self.nominal_test_value,
+            self.measured_test_value)
+
 
 class Channel(db.Model):
     __tablename__ = 'channel'
+    __table_args__ = (
+        # Serves the change feed's search for a Group's recently updated Channels
+        db.Index('ix_channel_group_id_last_updated', 'group_id', 'last_updated'),
+        # Serves the index page's list of the most recently updated Channels
+        db.Index('ix_channel_last_updated', 'last_updated'),
+    )
     # Basic Info
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(64))
@@ -133,6 +143,12 @@ class Channel(db.Model):
     # Metrics
     status = db.Column(db.String(32), default=TestResult.UNTESTED.value)
 
+    # Status Counters
+    # - A running tally of the channel's TestPoint results that is adjusted as each result changes
+    num_untested = db.Column(db.Integer, default=0)
+    num_passed = db.Column(db.Integer, default=0)
+    num_failed = db.Column(db.Integer, default=0)
+
     # Summary Info
     interface = db.Column(db.String(32))
     notes = db.Column(db.String(128))
@@ -168,8 +184,11 @@ class Channel(db.Model):
         for approval_record in self.approval_records.all():
             self.approval_records.remove(approval_record)
 
+        # Reset the TestPoint result counters now that the TestPoints are gone
+        set_status_counters(self, {})
+
     def num_testpoints(self):
-        return len(self.testpoints.all())
+        return self.testpoints.count()
 
     def measurement_range(self):
         return self.max_range - self.min_range
@@ -182,53 +201,41 @@ class Channel(db.Model):
 
     def add_testpoint(self, testpoint):
         self.testpoints.append(testpoint)
+        self.record_testpoint_result(None, testpoint.test_result or TestResult.UNTESTED.value)
 
     def remove_testpoint(self, testpoint):
         if self.has_testpoint(testpoint):
             self.testpoints.remove(testpoint)
+            self.record_testpoint_result(testpoint.test_result or TestResult.UNTESTED.value, None)
+
+    def record_testpoint_result(self, previous_result, new_result):
+
+        # Move the TestPoint between the result counters
+        adjust_status_counters(self, previous_result, new_result)
+
+        # Count a TestPoint being added or removed in each parent item
+        if (previous_result is None) != (new_result is None) and self.group is not None:
+            self.group.record_testpoint_count(1 if previous_result is None else -1)
 
     def build_testpoint_list(self, num_testpoints, testpoint_list_type, injection_value_list, test_value_list):
         
         # Debugging variables
         num_added = 0
 
-        # Builds a list of custom testpoints defined by the user when a new channel is created
-        if testpoint_list_type == TestPointListType.CUSTOM.value:
-            for i in range(num_testpoints):
-                testpoint = TestPoint(
-                    channel_id = self.id,
-                    nominal_injection_value = injection_value_list[i],
-                    nominal_test_value = test_value_list[i]
-                )
-                self.testpoints.append(testpoint)
-                num_added +=1
-        
-        # Builds a default list of testpoints with an equal delta between the points
-        elif testpoint_list_type == TestPointListType.STANDARD.value:            
-
-            # Calculates the nominal signal injection values
-            injection_range = self.injection_range()
-            delta = injection_range / (num_testpoints - 1)
-            injection_values = [self.min_injection_range]
-            for i in range(1, num_testpoints):
-                injection_values.append(injection_values[i-1] + delta)
-
-            # Calculates the nominal test values for the channel's measurement points
-            measurement_range = self.measurement_range()
-            delta = measurement_range / (num_testpoints - 1)
-            test_values = [self.min_range]
-            for i in range(1, num_testpoints):
-                test_values.append(test_values[i-1] + delta)
-
-            # Generate each TestPoint and add them to the channel
-            for i in range(num_testpoints):
-                testpoint = TestPoint(
-                    channel_id = self.id,
-                    nominal_injection_value = injection_values[i],
-                    nominal_test_value = test_values[i]
-                )
-                self.add_testpoint(testpoint)
-                num_added += 1
+        # Calculate the nominal values of each testpoint from the user's list or the channel's ranges
+        testpoint_values = calc_testpoint_values(num_testpoints, testpoint_list_type,
+            self.min_injection_range, self.max_injection_range, self.min_range, self.max_range,
+            injection_value_list, test_value_list)
+
+        # Generate each TestPoint and add them to the channel
+        for injection_value, test_value in testpoint_values:
+            testpoint = TestPoint(
+                channel_id = self.id,
+                nominal_injection_value = injection_value,
+                nominal_test_value = test_value
+            )
+            self.add_testpoint(testpoint)
+            num_added += 1
         
         num_leftover = num_testpoints - num_added
         if num_leftover > 0:
@@ -238,28 +245,22 @@ class Channel(db.Model):
     def testpoint_stats(self):
 
         # Statistics tracking variables
-        num_untested = 0
-        num_passed = 0
-        num_failed = 0
+        stats = {
+            TestResult.UNTESTED.value: 0,
+            TestResult.PASS.value: 0,
+            TestResult.FAIL.value: 0
+        }
+
+        # Count the testpoints with each result in a single GROUP BY query
+        results = self.testpoints.with_entities(TestPoint.test_result, db.func.count(TestPoint.id)) \
+            .group_by(TestPoint.test_result).order_by(None).all()
 
         # Tally up the results
-        for testpoint in self.testpoints.all():
+        for test_result, count in results:
+            if test_result in stats:
+                stats[test_result] += count
 
-            test_result = testpoint.test_result
-
-            if test_result == TestResult.UNTESTED.value:
-                num_untested += 1
-            elif test_result == TestResult.PASS.value:
-                num_passed += 1
-            elif test_result == TestResult.FAIL.value:
-                num_failed += 1
-        
-        # Compile and return the results
-        return {
-            TestResult.UNTESTED.value: num_untested,
-            TestResult.PASS.value: num_passed,
-            TestResult.FAIL.value: num_failed
-        }
+        return stats
 
     def update_status(self):
 
@@ -267,34 +268,84 @@ class Channel(db.Model):
         stats = self.testpoint_stats()
         num_testpoints = self.num_testpoints()
         
-        # Determine the new status
-        if num_testpoints == stats[TestResult.UNTESTED.value]:
-            self.status = TestResult.UNTESTED.value
-
-        elif num_testpoints == stats[TestResult.PASS.value]:
-            self.status = TestResult.PASS.value
+        # Determine the new status and resync the result counters
+        self.status = testpoint_status(stats, num_testpoints)
+        set_status_counters(self, stats)
 
-        elif stats[TestResult.FAIL.value] > 0:
-            self.status = TestResult.FAIL.value
-
-        else:
-            self.status = Status.IN_PROGRESS.value
+    def update_each_parent_status(self, timestamp):
 
-        # Save the results
-        db.session.commit()
+        # Save the TestPoint result counters first, re-reading the status in case another request has since changed it
+        # Note: The UPDATE of the counters locks the Channel's row, so no other request can change it until commit
+        if flush_counters(self):
+            db.session.expire(self, ['status'])
+        previous_status = self.status
+        stats = counter_stats(self)
+        self.status = testpoint_status(stats, sum(stats.values()))
+
+        # Leave the parent items to be rolled up by the background worker in the coalesced mode
+        if rollup_worker.coalesced:
+            rollup_worker.mark_dirty(self.group_id, timestamp)
+            return
 
-    def update_each_parent_status(self, timestamp):
-        
-        # Update the status of each item
-        self.update_status()
-        self.group.update_status()
-        self.group.job.update_status()
-        self.group.job.project.update_status()
+        # Pass any change in status up through the counters of each parent item
+        self.group.record_channel_status(previous_status, self.status)
 
         # Update the last_updated timestamp of each item
         self.group.last_updated = timestamp
         self.group.job.last_updated = timestamp
 
+    # Same as update_each_parent_status for a batch of Channels, but updating each Group, Job and Project only once
+    # Note: The counters of every item are incremented together and then read back with a single query for each
+    #       kind of item, rather than once for each Channel
+    @classmethod
+    def update_parent_statuses(cls, channels, timestamp):
+
+        # Save the TestPoint result counters first, re-reading each status in case another request has since changed it
+        for channel in channels:
+            channel.last_updated = timestamp
+        db.session.flush()
+        channels = reload_items(cls, [channel.id for channel in channels])
+
+        # Tally how many Channels of each Group have moved from one status to another
+        group_changes = defaultdict(lambda: defaultdict(int))
+        for channel in channels:
+            previous_status = channel.status
+            stats = counter_stats(channel)
+            channel.status = testpoint_status(stats, sum(stats.values()))
+            if channel.status != previous_status:
+                group_changes[channel.group_id][previous_status] -= 1
+                group_changes[channel.group_id][channel.status] += 1
+
+        # Leave the parent items to be rolled up by the background worker in the coalesced mode
+        if rollup_worker.coalesced:
+            for group_id in {channel.group_id for channel in channels}:
+                rollup_worker.mark_dirty(group_id, timestamp)
+            return
+
+        # Pass the changes up through the counters of each Group, Job and Project, totalling them for each parent
+        groups = reload_items(Group, {channel.group_id for channel in channels})
+        job_changes = defaultdict(lambda: defaultdict(int))
+        for group in groups:
+            add_status_changes(group, group_changes[group.id], job_changes[group.job_id])
+            group.last_updated = timestamp
+
+        jobs = reload_items(Job, job_changes)
+        project_changes = defaultdict(lambda: defaultdict(int))
+        for job in jobs:
+            add_status_changes(job, job_changes[job.id], project_changes[job.project_id])
+            job.last_updated = timestamp
+
+        projects = reload_items(Project, project_changes)
+        for project in projects:
+            add_status_changes(project, project_changes[project.id], None)
+
+        # Save every counter at once, then read them back to update the status of each item
+        db.session.flush()
+        for item_class, items in [(Group, groups), (Job, jobs), (Project, projects)]:
+            for item in reload_items(item_class, [item.id for item in items]):
+                stats = counter_stats(item)
+                item.status = rollup_status(stats, sum(stats.values()))
+
     def testpoint_progress(self):
 
         # Get the testpoint stats
@@ -302,11 +353,7 @@ class Channel(db.Model):
         num_testpoints = self.num_testpoints()
 
         # Calculate and return the progress bar percentages
-        return {
-            "percent_untested": calc_percent(stats[TestResult.UNTESTED.value], num_testpoints),
-            "percent_passed": calc_percent(stats[TestResult.PASS.value], num_testpoints),
-            "percent_failed": calc_percent(stats[TestResult.FAIL.value], num_testpoints),
-        }
+        return calc_testpoint_progress(stats, num_testpoints)
 
     def has_test_equipment_type(self, test_equipment_type):
         return test_equipment_type in self.required_test_equipment
@@ -372,8 +419,18 @@ class Group(db.Model):
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(16), default=Status.NOT_STARTED.value)
 
+    # Status Counters
+    # - A running tally of the status of each channel underneath, adjusted as each channel's status changes
+    num_untested = db.Column(db.Integer, default=0)
+    num_passed = db.Column(db.Integer, default=0)
+    num_failed = db.Column(db.Integer, default=0)
+    num_in_progress = db.Column(db.Integer, default=0)
+    # - The number of testpoints underneath, adjusted as testpoints are added and removed
+    num_testpoints = db.Column(db.Integer, default=0)
+
     # Job Relationship
-    job_id = db.Column(db.Integer, db.ForeignKey('job.id'))
+    # - Indexed for the Job's list of Groups and the joins from a Job or Project down to its Channels
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'), index=True)
     job = db.relationship('Job', back_populates='groups')
 
     # Channel Relationship
@@ -383,12 +440,12 @@ class Group(db.Model):
         return f'<Group {self.name}>'
 
     def num_channels(self):
-        return len(self.channels.all())
+        return self.channels.count()
 
     def channel_stats(self):
 
-        # Return the analyzed list of all the channels in the Group
-        return channel_stats(self.channels.all())
+        # Return the analyzed query of all the channels in the Group
+        return channel_stats(self.channels)
 
     def update_status(self):
 
@@ -396,17 +453,23 @@ class Group(db.Model):
         stats = self.channel_stats()
         num_channels = self.num_channels()
 
-        # Determine the new status
-        if num_channels == stats[TestResult.UNTESTED.value]:
-            self.status = Status.NOT_STARTED.value
+        # Determine the new status and resync the status counters
+        self.status = rollup_status(stats, num_channels)
+        set_status_counters(self, stats)
 
-        elif num_channels == stats[TestResult.PASS.value]:
-            self.status = Status.COMPLETE.value
+    def record_channel_status(self, previous_status, new_status, count=1):
 
-        else:
-            self.status = Status.IN_PROGRESS.value
-        
-        db.session.commit()
+        # Move the Channels between the status counters of the Group and each of its parents
+        adjust_status_counters(self, previous_status, new_status, count)
+        stats = counter_stats(self)
+        self.status = rollup_status(stats, sum(stats.values()))
+        self.job.record_channel_status(previous_status, new_status, count)
+
+    def record_testpoint_count(self, num_testpoints):
+
+        # Add the number of TestPoints added, or removed if negative, to the Group and each of its parents
+        increment_counter(self, 'num_testpoints', num_testpoints)
+        self.job.record_testpoint_count(num_testpoints)
 
     def channel_progress(self):
 
@@ -423,8 +486,18 @@ class Job(db.Model):
     status = db.Column(db.String(16), default=Status.NOT_STARTED.value)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Status Counters
+    # - A running tally of the status of each channel underneath, adjusted as each channel's status changes
+    num_untested = db.Column(db.Integer, default=0)
+    num_passed = db.Column(db.Integer, default=0)
+    num_failed = db.Column(db.Integer, default=0)
+    num_in_progress = db.Column(db.Integer, default=0)
+    # - The number of testpoints underneath, adjusted as testpoints are added and removed
+    num_testpoints = db.Column(db.Integer, default=0)
+
     # Project Relationship
-    project_id = db.Column(db.Integer, db.ForeignKey('project.id'))
+    # - Indexed for the Project's list of Jobs and the joins from a Project down to its Channels
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'), index=True)
     project = db.relationship('Project', back_populates='jobs')
 
     # Group Relationship
@@ -435,21 +508,16 @@ class Job(db.Model):
 
     def channels(self):
 
-        # List of all the job's channels
-        channels = []
-        
-        for group in self.groups.all():
-            # Add the group's list of channels to the job's list of channels
-            channels += group.channels.all()
-        
-        return channels
+        # Query of all the job's channels joined through its groups, in the order of its groups
+        # Note: Returns a query rather than a list so that it can be filtered, counted or streamed with yield_per()
+        return Channel.query.join(Group).filter(Group.job_id == self.id).order_by(Group.id, Channel.id)
 
     def num_channels(self):
-        return len(self.channels())
+        return self.channels().order_by(None).count()
 
     def channel_stats(self):
 
-        # Return the analyzed list of all the channels in the Job
+        # Return the analyzed query of all the channels in the Job
         return channel_stats(self.channels())
 
     def update_status(self):
@@ -458,18 +526,23 @@ class Job(db.Model):
         stats = self.channel_stats()
         num_channels = self.num_channels()
 
-        # Determine the new status
-        if num_channels == stats[TestResult.UNTESTED.value]:
-            self.status = Status.NOT_STARTED.value
+        # Determine the new status and resync the status counters
+        self.status = rollup_status(stats, num_channels)
+        set_status_counters(self, stats)
+
+    def record_channel_status(self, previous_status, new_status, count=1):
 
-        elif num_channels == stats[TestResult.PASS.value]:
-            self.status = Status.COMPLETE.value
+        # Move the Channels between the status counters of the Job and its Project
+        adjust_status_counters(self, previous_status, new_status, count)
+        stats = counter_stats(self)
+        self.status = rollup_status(stats, sum(stats.values()))
+        self.project.record_channel_status(previous_status, new_status, count)
 
-        else:
-            self.status = Status.IN_PROGRESS.value
+    def record_testpoint_count(self, num_testpoints):
 
-        # Save the changes
-        db.session.commit()
+        # Add the number of TestPoints added, or removed if negative, to the Job and its Project
+        increment_counter(self, 'num_testpoints', num_testpoints)
+        self.project.record_testpoint_count(num_testpoints)
 
     def channel_progress(self):
 
@@ -484,6 +557,15 @@ class Project(db.Model):
     number = db.Column(db.Integer)
     status = db.Column(db.String(16), default=Status.NOT_STARTED.value)
 
+    # Status Counters
+    # - A running tally of the status of each channel underneath, adjusted as each channel's status changes
+    num_untested = db.Column(db.Integer, default=0)
+    num_passed = db.Column(db.Integer, default=0)
+    num_failed = db.Column(db.Integer, default=0)
+    num_in_progress = db.Column(db.Integer, default=0)
+    # - The number of testpoints underneath, adjusted as testpoints are added and removed
+    num_testpoints = db.Column(db.Integer, default=0)
+
     # Relationships
     jobs = db.relationship('Job', back_populates='project', lazy='dynamic')
     members = db.relationship('User', secondary=project_members, back_populates='projects', lazy='dynamic')
@@ -523,21 +605,17 @@ class Project(db.Model):
 
     def channels(self):
 
-        # List of all the projects channels
-        channels = []
-
-        for job in self.jobs.all():
-            # Add the jobs's list of channels to the projects's list of channels
-            channels += job.channels()
-        
-        return channels
+        # Query of all the project's channels joined through its jobs and groups, in the order of its jobs and groups
+        # Note: Returns a query rather than a list so that it can be filtered, counted or streamed with yield_per()
+        return Channel.query.join(Group).join(Job).filter(Job.project_id == self.id) \
+            .order_by(Job.id, Group.id, Channel.id)
 
     def num_channels(self):
-        return len(self.channels())
+        return self.channels().order_by(None).count()
 
     def channel_stats(self):
 
-        # Return the analyszed list of all the channels in the Project
+        # Return the analyzed query of all the channels in the Project
         return channel_stats(self.channels())
 
     def update_status(self):
@@ -546,18 +624,21 @@ class Project(db.Model):
         stats = self.channel_stats()
         num_channels = self.num_channels()
 
-        # Determine the new status
-        if num_channels == stats[TestResult.UNTESTED.value]:
-            self.status = Status.NOT_STARTED.value
+        # Determine the new status and resync the status counters
+        self.status = rollup_status(stats, num_channels)
+        set_status_counters(self, stats)
+
+    def record_channel_status(self, previous_status, new_status, count=1):
 
-        elif num_channels == stats[TestResult.PASS.value]:
-            self.status = Status.COMPLETE.value
+        # Move the Channels between the status counters of the Project
+        adjust_status_counters(self, previous_status, new_status, count)
+        stats = counter_stats(self)
+        self.status = rollup_status(stats, sum(stats.values()))
 
-        else:
-            self.status = Status.IN_PROGRESS.value
+    def record_testpoint_count(self, num_testpoints):
 
-        # Save the changes
-        db.session.commit()
+        # Add the number of TestPoints added, or removed if negative, to the Project
+        increment_counter(self, 'num_testpoints', num_testpoints)
 
     def channel_progress(self):
 
@@ -654,7 +735,7 @@ class User(UserMixin, db.Model):
     token_expiration = db.Column(db.DateTime)
 
     # Company Relationship
-    company_id = db.Column(db.Integer, db.ForeignKey('company.id'))
+    company_id = db.Column(db.Integer, db.ForeignKey('company.id'), index=True)
     company = db.relationship('Company', back_populates='employees')
 
     # Relationships
@@ -714,7 +795,7 @@ class TestEquipment(db.Model):
     serial_num = db.Column(db.String(32))
 
     # TestEquipmentType Relationship
-    test_equipment_type_id = db.Column(db.Integer, db.ForeignKey('test_equipment_type.id'))
+    test_equipment_type_id = db.Column(db.Integer, db.ForeignKey('test_equipment_type.id'), index=True)
     test_equipment_type = db.relationship('TestEquipmentType', back_populates='test_equipment')
 
     # Other Relationships
@@ -767,6 +848,10 @@ class TestEquipmentType(db.Model):
 
 class CalibrationRecord(db.Model):
     __tablename__ = 'calibration_record'
+    __table_args__ = (
+        # Finds the latest calibration due date of each TestEquipment
+        db.Index('ix_calibration_record_test_equipment_id_calibration_due_date', 'test_equipment_id', 'calibration_due_date'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     calibration_date = db.Column(db.DateTime)
     calibration_due_date = db.Column(db.DateTime)
@@ -784,6 +869,11 @@ class CalibrationRecord(db.Model):
 # Ex. Channel id-4 was tested with DMM id-1 at '16:03 July 2, 2021' where DMM id-1 is due for calibration on 00:00 Nov 12, 2021
 class ChannelEquipmentRecord(db.Model):
     __tablename__ = 'channel_equipment_record'
+    __table_args__ = (
+        # Finds the TestEquipment most recently used for each type of equipment required by a Channel
+        db.Index('ix_channel_equipment_record_channel_id_test_equipment_type_id_timestamp',
+            'channel_id', 'test_equipment_type_id', 'timestamp'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     calibration_due_date = db.Column(db.DateTime)
@@ -796,7 +886,7 @@ class ChannelEquipmentRecord(db.Model):
     test_equipment_type_id = db.Column(db.Integer, db.ForeignKey('test_equipment_type.id'))
 
     # TestEquipment Relationship
-    test_equipment_id = db.Column(db.Integer, db.ForeignKey('test_equipment.id'))
+    test_equipment_id = db.Column(db.Integer, db.ForeignKey('test_equipment.id'), index=True)
     test_equipment = db.relationship('TestEquipment', back_populates='channel_equipment_records')
 
     def __repr__(self):
@@ -805,6 +895,10 @@ class ChannelEquipmentRecord(db.Model):
 
 class ApprovalRecord(db.Model):
     __tablename__ = 'approval_record'
+    __table_args__ = (
+        # Checks whether a User has already approved a Channel
+        db.Index('ix_approval_record_channel_id_user_id', 'channel_id', 'user_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     company_category = db.Column(db.String(16))
@@ -814,9 +908,53 @@ class ApprovalRecord(db.Model):
     channel = db.relationship('Channel', back_populates='approval_records')
 
     # User Relationship
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), index=True)
     user = db.relationship('User', back_populates='approval_records')
 
     def __repr__(self):
         return f'<ApprovalRecord for channel id-{self.channel_id} signed by user id-{self.user_id} at {self.timestamp}>'    
 
+
+
+class GroupEvent(db.Model):
+    __tablename__ = 'group_event'
+    id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(db.DateTime, index=True, default=datetime.utcnow)
+
+    # The json encoded change published to the users viewing the Group
+    message = db.Column(db.Text)
+
+    # Group Relationship
+    group_id = db.Column(db.Integer, db.ForeignKey('group.id'))
+
+    def __repr__(self):
+        return f'<GroupEvent id-{self.id} for group id-{self.group_id} at {self.timestamp}>'
+
+
+class Report(db.Model):
+    __tablename__ = 'report'
+    __table_args__ = (
+        # Finds any report already built from the same version of a Job's data
+        db.Index('ix_report_job_id_data_version', 'job_id', 'data_version'),
+        db.Index('ix_report_project_id_data_version', 'project_id', 'data_version'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    data_version = db.Column(db.String(40))
+    export_format = db.Column(db.String(8), default='xlsx')
+    status = db.Column(db.String(16), default=ReportStatus.QUEUED.value)
+    error = db.Column(db.Text)
+    requested = db.Column(db.DateTime, default=datetime.utcnow)
+    completed = db.Column(db.DateTime)
+
+    # Job Relationship
+    # - Only set for the report of a single Job
+    job_id = db.Column(db.Integer, db.ForeignKey('job.id'))
+
+    # Project Relationship
+    # - Only set for the report of a whole Project
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id'))
+
+    def __repr__(self):
+        if self.project_id is not None:
+            return f'<Report id-{self.id} for project id-{self.project_id} ({self.status})>'
+        return f'<Report id-{self.id} for job id-{self.job_id} ({self.status})>'
@@ -0,0 +1,561 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from copy import copy
+from datetime import datetime, timedelta
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+from openpyxl.styles.builtins import styles as builtin_styles
+from app import db
+from app.rollups import rollup_worker
+from app.utils import *
+import glob, hashlib, io, multiprocessing, os, re, threading, zipfile
+
+# The MIME type of each format a report can be exported as
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+ZIP_MIMETYPE = 'application/zip'
+REPORT_MIMETYPES = {
+    'xlsx': XLSX_MIMETYPE,
+    'zip': ZIP_MIMETYPE
+}
+
+# Report layout constants
+NUM_REPORT_COLUMNS = 9
+NUM_CHANNEL_HEADER_ROWS = 5
+
+
+# Builds the shared named styles used by every cell in a report
+# Note: A workbook stores each named style once, rather than a copy of the formatting for every cell
+def report_styles():
+
+    thin = Side(border_style="thin", color="000000")
+    double = Side(border_style="double", color="000000")
+    thin_border = Border(top=thin, left=thin, right=thin, bottom=thin)
+    center = Alignment(horizontal='center', vertical='center')
+
+    header = copy(builtin_styles['20 % - Accent1'])
+    header.name = 'Report Header'
+    header.alignment = center
+    header.border = thin_border
+
+    header_number = copy(header)
+    header_number.name = 'Report Header Number'
+    header_number.font = Font(bold=True)
+
+    group = copy(builtin_styles['20 % - Accent3'])
+    group.name = 'Report Group'
+    group.alignment = Alignment(vertical='center')
+    group.font = Font(bold=True)
+
+    return [
+        header,
+        header_number,
+        group,
+        NamedStyle(name='Report Channel', border=Border(top=double)),
+        NamedStyle(name='Report Channel Number', border=Border(top=double), alignment=center),
+        NamedStyle(name='Report TestPoint', border=thin_border, alignment=center),
+        NamedStyle(name='Report Measurement', border=thin_border,
+            alignment=Alignment(horizontal='right', vertical='center', indent=1))
+    ]
+
+
+# Creates a workbook that streams each row to disk as it is written
+def create_report_workbook():
+
+    wb = Workbook(write_only=True)
+    for style in report_styles():
+        wb.add_named_style(style)
+
+    return wb
+
+
+# Fetches the plain values shown in a Job's report one Group at a time
+# Note: Only columns are loaded, so no ORM objects are kept in the session while the report is built
+def job_report_groups(job_id):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import Group, Channel, TestPoint
+
+    groups = db.session.query(Group.id, Group.name).filter(Group.job_id == job_id).order_by(Group.id).all()
+    for group_id, group_name in groups:
+
+        # Load the Channels of the Group
+        channels = []
+        channels_by_id = {}
+        rows = db.session.query(Channel.id, Channel.name, Channel.max_error, Channel.error_type,
+            Channel.full_scale_range, Channel.measurement_units, Channel.injection_units) \
+            .filter(Channel.group_id == group_id).order_by(Channel.id).all()
+        for channel_id, name, max_error, error_type, full_scale_range, measurement_units, injection_units in rows:
+
+            # Change out the Eng Units type for the Channel's actual units
+            error_units = measurement_units if error_type == ErrorType.ENG_UNITS.value else error_type
+
+            channel = {
+                "id": channel_id,
+                "name": name,
+                "tolerance": f'{max_error} {error_units}',
+                "measurement_units": measurement_units,
+                "injection_units": injection_units,
+                "error_type": error_type,
+                "max_error": max_error,
+                "full_scale_range": full_scale_range,
+                "testpoints": []
+            }
+            channels.append(channel)
+            channels_by_id[channel_id] = channel
+
+        # Load the TestPoints of every Channel in the Group and calculate all their limits at once
+        rows = db.session.query(TestPoint.channel_id, TestPoint.nominal_injection_value,
+            TestPoint.nominal_test_value, TestPoint.measured_test_value) \
+            .join(Channel).filter(Channel.group_id == group_id) \
+            .order_by(TestPoint.channel_id, TestPoint.id).all()
+        testpoint_channels = [channels_by_id[channel_id] for channel_id, *values in rows]
+        limits = calc_testpoint_limits(
+            [channel["error_type"] for channel in testpoint_channels],
+            [channel["max_error"] for channel in testpoint_channels],
+            [channel["full_scale_range"] for channel in testpoint_channels],
+            [nominal_test_value for channel_id, nominal_injection_value, nominal_test_value, measured_test_value in rows],
+            [measured_test_value for channel_id, nominal_injection_value, nominal_test_value, measured_test_value in rows])
+        for channel, row, lower_limit, upper_limit in \
+                zip(testpoint_channels, rows, limits["lower_limit"], limits["upper_limit"]):
+            channel["testpoints"].append({
+                "nominal_injection_value": row[1],
+                "lower_limit": lower_limit,
+                "upper_limit": upper_limit
+            })
+
+        yield {"name": group_name, "channels": channels}
+
+
+# Lays out the rows of a Job's report as plain (value, style) cells
+# Note: Each row is paired with the span of columns to merge across it, if any
+def job_sheet_rows(groups):
+
+    # The header row
+    header = ['#', 'Channel Information', None, 'Injection Value', 'Lower Limit',
+        'Measurement Value', 'Upper Limit', 'Result', 'Notes']
+    yield [(header[0], 'Report Header Number')] + [(value, 'Report Header') for value in header[1:]], ('B', 'C')
+
+    for group in groups:
+
+        # A full width divider for each Group
+        yield [(group["name"], 'Report Group')] + [(None, 'Report Group')] * (NUM_REPORT_COLUMNS - 1), ('A', 'I')
+
+        for channel in group["channels"]:
+
+            # The Channel Information fills the first rows of the Channel beside its TestPoints
+            information = [
+                (f'Name: {channel["name"]}', f'Tolerance: {channel["tolerance"]}'),
+                ('Drawing Ref: ___________________', 'Interface: ____________________'),
+                ('DC Voltage Source: _____________', 'Cal Due Date: ________________'),
+                ('MDS: _________________________', 'Rolls-Royce: _________________')
+            ]
+            testpoints = channel["testpoints"]
+            units = channel["measurement_units"]
+
+            for i in range(max(len(testpoints), NUM_CHANNEL_HEADER_ROWS)):
+
+                # The first row of each Channel has a double border along its top
+                top_style = 'Report Channel' if i == 0 else None
+                row = [(channel["id"], 'Report Channel Number') if i == 0 else (None, None)]
+                if i < len(information):
+                    row += [(information[i][0], top_style), (information[i][1], top_style)]
+                else:
+                    row += [(None, None), (None, None)]
+
+                if i < len(testpoints):
+                    testpoint = testpoints[i]
+                    row += [
+                        (f'{testpoint["nominal_injection_value"]} {channel["injection_units"]}', 'Report TestPoint'),
+                        (f'{testpoint["lower_limit"]} {units}', 'Report TestPoint'),
+                        (f'{units}', 'Report Measurement'),
+                        (f'{testpoint["upper_limit"]} {units}', 'Report TestPoint'),
+                        (None, 'Report TestPoint')
+                    ]
+                else:
+                    row += [(None, top_style)] * 5
+
+                row.append((None, top_style))
+                yield row, None
+
+
+# Writes the laid out rows of a Job's report into a new sheet of a write-only workbook
+def write_job_sheet(wb, title, rows):
+
+    sheet = wb.create_sheet(title)
+    sheet.column_dimensions['I'].width = 20
+
+    def cell(value, style):
+        c = WriteOnlyCell(sheet, value=value)
+        if style is not None:
+            c.style = style
+        return c
+
+    for row_num, (row, merge) in enumerate(rows, start=1):
+        sheet.append([cell(value, style) for value, style in row])
+        if merge is not None:
+            sheet.merged_cells.add(f'{merge[0]}{row_num}:{merge[1]}{row_num}')
+
+    return sheet
+
+
+# Streams a Job's report into a file-like object
+def build_job_report(job_id, file):
+
+    wb = create_report_workbook()
+    write_job_sheet(wb, 'Report', job_sheet_rows(job_report_groups(job_id)))
+    wb.save(file)
+
+    return file
+
+
+# The workbooks of a Project's zip report are built by a pool of processes, each handed the plain rows of a single Job
+# Note: The pool is started the first time it's needed and kept for the life of the process
+sheet_pool = None
+sheet_pool_lock = threading.Lock()
+
+def get_sheet_pool(num_workers):
+
+    global sheet_pool
+    with sheet_pool_lock:
+        if sheet_pool is None:
+            sheet_pool = ProcessPoolExecutor(max_workers=num_workers,
+                mp_context=multiprocessing.get_context('spawn'))
+
+    return sheet_pool
+
+def build_job_workbook(title, groups):
+
+    wb = create_report_workbook()
+    write_job_sheet(wb, title, job_sheet_rows(groups))
+    file = io.BytesIO()
+    wb.save(file)
+
+    return file.getvalue()
+
+
+# Names a Job's sheet within a Project's report, within the limits Excel places on sheet names
+def job_sheet_title(job_id, name):
+    name = re.sub(r'[\\/*?:\[\]]', '', name or 'Job')
+    return f'{job_id} - {name}'[:31]
+
+
+# Builds the workbook of each Job in order, handing them to the pool once their rows have been fetched
+# Note: Only max_pending Jobs are fetched ahead of the workbooks written, so a large Project is never held in memory
+def build_job_workbooks(jobs, pool, max_pending):
+
+    pending = deque()
+    for job_id, title in jobs:
+        pending.append((title, pool.submit(build_job_workbook, title, list(job_report_groups(job_id)))))
+        if len(pending) >= max_pending:
+            title, future = pending.popleft()
+            yield title, future.result()
+
+    while len(pending) > 0:
+        title, future = pending.popleft()
+        yield title, future.result()
+
+
+# Streams a Project's report into a file-like object, as either a single workbook with a sheet per Job
+# or a zip holding a workbook for each Job
+# Note: A single workbook is written by this process as each Job's rows are fetched, as its sheets can't be
+#       written in parallel, while the zip's workbooks are built by the pool when one is given
+def build_project_report(project_id, file, export_format, pool=None, max_pending=2):
+
+    # Import the Model directly here to avoid a circular import
+    from app.models import Job
+
+    jobs = [(job_id, job_sheet_title(job_id, name)) for job_id, name in
+        db.session.query(Job.id, Job.name).filter(Job.project_id == project_id).order_by(Job.id).all()]
+
+    if export_format == 'zip':
+        if pool is not None:
+            workbooks = build_job_workbooks(jobs, pool, max_pending)
+        else:
+            workbooks = ((title, build_job_workbook(title, job_report_groups(job_id))) for job_id, title in jobs)
+        with zipfile.ZipFile(file, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for title, workbook in workbooks:
+                archive.writestr(f'{title}.xlsx', workbook)
+    else:
+        wb = create_report_workbook()
+        for job_id, title in jobs:
+            write_job_sheet(wb, title, job_sheet_rows(job_report_groups(job_id)))
+
+        # A workbook needs at least one sheet, even when the Project has no Jobs
+        if len(jobs) == 0:
+            write_job_sheet(wb, 'Report', job_sheet_rows([]))
+        wb.save(file)
+
+    return file
+
+
+# Fingerprints the rows shown in a report, so a built report can be reused until any of them change
+# Note: Each row's last_updated timestamp catches edits, while the row counts catch deletions
+def report_data_version(group_filter, *details):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import Group, Channel, TestPoint
+
+    groups = db.session.query(db.func.count(Group.id), db.func.max(Group.last_updated)) \
+        .filter(group_filter).one()
+    channels = db.session.query(db.func.count(Channel.id), db.func.max(Channel.last_updated)) \
+        .join(Group).filter(group_filter).one()
+    testpoints = db.session.query(db.func.count(TestPoint.id), db.func.max(TestPoint.last_updated)) \
+        .join(Channel).join(Group).filter(group_filter).one()
+
+    fingerprint = repr((tuple(groups), tuple(channels), tuple(testpoints)) + details)
+    return hashlib.sha1(fingerprint.encode()).hexdigest()[:16]
+
+def job_data_version(job_id):
+
+    # Import the Model directly here to avoid a circular import
+    from app.models import Group
+
+    return report_data_version(Group.job_id == job_id)
+
+def project_data_version(project_id):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import Group, Job
+
+    # The Jobs themselves are included as each one is named within the report
+    jobs = db.session.query(Job.id, Job.name).filter(Job.project_id == project_id).order_by(Job.id).all()
+    return report_data_version(Group.job_id.in_([job_id for job_id, name in jobs]), tuple(map(tuple, jobs)))
+
+
+# Removes a file which may have already been removed by another process
+def remove_file(path):
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+# The file a report is cached in for a single version of its data
+def report_path(directory, job_id, project_id, data_version, export_format):
+    if project_id is not None:
+        return os.path.join(directory, f'Project_{project_id}_{data_version}.{export_format}')
+    return os.path.join(directory, f'Job_{job_id}_{data_version}.{export_format}')
+
+
+# Builds a queued report into the cache, recording its progress against the Report
+def run_report(app, report_id, directory):
+
+    # Import the Model directly here to avoid a circular import
+    from app.models import Report
+
+    with app.app_context():
+        report = Report.query.get(report_id)
+        path = report_path(directory, report.job_id, report.project_id, report.data_version, report.export_format)
+        partial = f'{path}.{os.getpid()}-{threading.get_ident()}.part'
+        try:
+            report.status = ReportStatus.RUNNING.value
+            db.session.commit()
+
+            # Write into a partial file first so a half built report is never downloaded
+            os.makedirs(directory, exist_ok=True)
+            with open(partial, 'wb') as file:
+                if report.project_id is not None:
+                    num_workers = app.config['REPORT_SHEET_WORKERS']
+                    pool = get_sheet_pool(num_workers) if report.export_format == 'zip' else None
+                    build_project_report(report.project_id, file, report.export_format, pool, num_workers)
+                else:
+                    build_job_report(report.job_id, file)
+            os.replace(partial, path)
+
+            report.status = ReportStatus.DONE.value
+            report.completed = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            app.logger.exception(f'Error building {report}')
+            db.session.rollback()
+            if os.path.exists(partial):
+                os.remove(partial)
+            report.status = ReportStatus.FAILED.value
+            report.error = str(e)
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+
+# The app used by each worker of a process pool
+# Note: Each process creates its own app and database connections, so no ORM objects cross between processes
+process_app = None
+
+def init_report_process(database_uri):
+
+    # Import the app factory directly here to avoid a circular import
+    from app import create_app
+
+    global process_app
+    process_app = create_app()
+    process_app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+
+def run_report_in_process(report_id, directory):
+    run_report(process_app, report_id, directory)
+
+
+# Queues each requested report to be built in the background by a pool of workers
+# Note: The progress of each report is kept in the report table, so any of the app's processes can serve its status and download
+class ReportQueue(object):
+
+    def __init__(self, app=None):
+        self.app = None
+        self.executor = None
+        self.futures = {}
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        self.app = app
+        self.tmp_directory = app.config['TMP_DIRECTORY']
+        self.directory = os.path.join(self.tmp_directory, 'reports')
+        self.timeout = timedelta(seconds=app.config['REPORT_TIMEOUT_SECONDS'])
+        self.max_cache_size = app.config['REPORT_CACHE_MAX_BYTES']
+        self.max_cache_age = timedelta(seconds=app.config['REPORT_CACHE_MAX_AGE_SECONDS'])
+
+        # Choose whether the reports are built by threads or separate processes
+        self.executor_name = app.config['REPORT_EXECUTOR']
+        if self.executor_name not in ['thread', 'process']:
+            raise ValueError(f'Unknown REPORT_EXECUTOR: {self.executor_name}')
+        self.num_workers = app.config['REPORT_WORKERS']
+        self.executor = None
+
+    # Starts the pool of workers the first time a report is queued within this process
+    def start_workers(self):
+        with self.lock:
+            if self.executor is None:
+                if self.executor_name == 'thread':
+                    self.executor = ThreadPoolExecutor(max_workers=self.num_workers,
+                        thread_name_prefix='report')
+                else:
+                    self.executor = ProcessPoolExecutor(max_workers=self.num_workers,
+                        mp_context=multiprocessing.get_context('spawn'), initializer=init_report_process,
+                        initargs=(self.app.config['SQLALCHEMY_DATABASE_URI'],))
+
+        return self.executor
+
+    def path(self, report):
+        return report_path(self.directory, report.job_id, report.project_id, report.data_version, report.export_format)
+
+    # Whether a report has been, or is still being, built from the current version of its Job's data
+    def is_usable(self, report):
+        if report.status == ReportStatus.DONE.value:
+            return os.path.exists(self.path(report))
+        return report.requested > datetime.utcnow() - self.timeout
+
+    # Marks a cached report as recently used, so it is the last to be evicted
+    def touch(self, report):
+        try:
+            os.utime(self.path(report))
+        except FileNotFoundError:
+            pass
+
+    # Returns a report of the Job's or Project's current data, only queueing a new one when none has been built already
+    def request_report(self, job_id=None, project_id=None, export_format='xlsx'):
+
+        # Import the Model directly here to avoid a circular import
+        from app.models import Report
+
+        # Roll up any status changes still waiting on the background worker, so the data version is final
+        rollup_worker.flush()
+
+        if project_id is not None:
+            data_version = project_data_version(project_id)
+        else:
+            data_version = job_data_version(job_id)
+
+        report = Report.query.filter_by(job_id=job_id, project_id=project_id, export_format=export_format,
+            data_version=data_version).filter(Report.status != ReportStatus.FAILED.value) \
+            .order_by(Report.id.desc()).first()
+        if report is not None and self.is_usable(report):
+            self.touch(report)
+            return report
+
+        # Make room for the new report within the cache
+        self.prune_cache()
+
+        # Commit the Report before it is queued, as the worker reads it within its own session
+        report = Report(job_id=job_id, project_id=project_id, export_format=export_format, data_version=data_version)
+        db.session.add(report)
+        db.session.commit()
+        self.submit(report.id)
+
+        return report
+
+    # Keeps the cached reports within their size and age limits by removing the least recently used first
+    # Note: Any file which no finished Report refers to is an orphan, such as one left behind by a failed build
+    def prune_cache(self):
+
+        # Import the Model directly here to avoid a circular import
+        from app.models import Report
+
+        now = datetime.utcnow()
+        num_removed = 0
+
+        # Remove the reports saved straight into the tmp directory before the reports were cached
+        for path in glob.glob(os.path.join(self.tmp_directory, 'Job_Report_*.xlsx')):
+            num_removed += remove_file(path)
+
+        # Sort the cached reports from the least to the most recently used
+        finished = db.session.query(Report.job_id, Report.project_id, Report.data_version, Report.export_format) \
+            .filter(Report.status == ReportStatus.DONE.value).all()
+        known_paths = {report_path(self.directory, *report) for report in finished}
+        cached = []
+        if os.path.isdir(self.directory):
+            for entry in os.scandir(self.directory):
+                stat = entry.stat()
+                last_used = datetime.utcfromtimestamp(stat.st_mtime)
+
+                # Leave any file still being built alone, as its Report may not be committed yet
+                if last_used > now - self.timeout:
+                    cached.append((last_used, stat.st_size, entry.path))
+                elif entry.path not in known_paths or last_used < now - self.max_cache_age:
+                    num_removed += remove_file(entry.path)
+                else:
+                    cached.append((last_used, stat.st_size, entry.path))
+
+        # Evict the least recently used reports until the cache fits within its size limit
+        cached.sort()
+        cache_size = sum(size for last_used, size, path in cached)
+        kept_paths = set()
+        for last_used, size, path in cached:
+            if cache_size > self.max_cache_size and not path.endswith('.part'):
+                num_removed += remove_file(path)
+                cache_size -= size
+            else:
+                kept_paths.add(path)
+
+        # Forget every settled Report whose file is no longer cached
+        reports = db.session.query(Report.id, Report.status, Report.job_id, Report.project_id, Report.data_version,
+            Report.export_format).filter(Report.requested < now - self.timeout).all()
+        report_ids = [report[0] for report in reports
+            if report[1] != ReportStatus.DONE.value or report_path(self.directory, *report[2:]) not in kept_paths]
+        if len(report_ids) > 0:
+            Report.query.filter(Report.id.in_(report_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+        return num_removed
+
+    def submit(self, report_id):
+
+        executor = self.start_workers()
+        if self.executor_name == 'thread':
+            future = executor.submit(run_report, self.app, report_id, self.directory)
+        else:
+            future = executor.submit(run_report_in_process, report_id, self.directory)
+
+        self.futures[report_id] = future
+        future.add_done_callback(lambda f: self.futures.pop(report_id, None))
+
+    # Waits for a report queued by this process to finish building
+    def wait(self, report_id, timeout=None):
+        future = self.futures.get(report_id)
+        if future is not None:
+            future.result(timeout)
+
+
+report_queue = ReportQueue()
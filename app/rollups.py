@@ -0,0 +1,110 @@
+import threading, time
+from sqlalchemy import event
+from app import db
+from app.utils import *
+
+# The key used to hold the Groups a session has marked dirty until its transaction is committed
+PENDING_ROLLUPS = 'pending_status_rollups'
+
+
+# Rolls the status of the Groups changed by each TestPoint write up through their Jobs and Projects
+# Note: In the 'immediate' mode every write rolls its own change up the tree, in the 'coalesced' mode a write only
+#       marks its Channel's Group dirty and a background worker rolls up every dirty Group together
+class RollupWorker(object):
+
+    def __init__(self, app=None):
+        self.app = None
+        self.coalesced = False
+        self.interval = None
+        self.dirty = {}
+        self.thread = None
+        self.lock = threading.Lock()
+        self.rollup_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+
+        mode = app.config['STATUS_ROLLUP']
+        if mode not in ['immediate', 'coalesced']:
+            raise ValueError(f'Unknown STATUS_ROLLUP: {mode}')
+
+        self.app = app
+        self.coalesced = mode == 'coalesced'
+        self.interval = app.config['STATUS_ROLLUP_INTERVAL_SECONDS']
+
+    # Marks a Group as needing its status rolled up once the session's transaction has been committed
+    def mark_dirty(self, group_id, timestamp):
+        groups = db.session.info.setdefault(PENDING_ROLLUPS, {}).setdefault(self, {})
+        groups[group_id] = max(timestamp, groups.get(group_id, timestamp))
+
+    # Hands the committed dirty Groups to the worker, keeping the latest change to each Group
+    def add_dirty(self, groups):
+
+        with self.lock:
+            for group_id, timestamp in groups.items():
+                self.dirty[group_id] = max(timestamp, self.dirty.get(group_id, timestamp))
+
+            # Start the worker the first time a Group is marked dirty within this process
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+        self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait()
+
+            # Let the changes gather for an interval so that each item is rolled up at most once an interval
+            time.sleep(self.interval)
+            self.wakeup.clear()
+
+            with self.app.app_context():
+                try:
+                    self.flush()
+                except Exception:
+                    self.app.logger.exception('Error rolling up the status of the dirty groups')
+                finally:
+                    db.session.remove()
+
+    # Rolls up every dirty Group straight away, for anything that needs the exact status such as a report or test
+    # Note: Any uncommitted changes within the session are saved along with the rollup
+    def flush(self):
+
+        with self.rollup_lock:
+            with self.lock:
+                dirty, self.dirty = self.dirty, {}
+            if len(dirty) == 0:
+                return 0
+
+            try:
+                rollup_group_status(dirty)
+                db.session.commit()
+            except:
+                db.session.rollback()
+
+                # Keep the Groups dirty to be rolled up by the next attempt
+                with self.lock:
+                    for group_id, timestamp in dirty.items():
+                        self.dirty[group_id] = max(timestamp, self.dirty.get(group_id, timestamp))
+                raise
+
+            return len(dirty)
+
+
+# Hands the Groups marked dirty by a session to their worker once its transaction has been committed
+@event.listens_for(db.session, 'after_commit')
+def add_pending_rollups(session):
+    for rollup_worker, groups in session.info.pop(PENDING_ROLLUPS, {}).items():
+        rollup_worker.add_dirty(groups)
+
+
+# Discards the Groups marked dirty by a session if its transaction is rolled back
+@event.listens_for(db.session, 'after_rollback')
+def discard_pending_rollups(session):
+    session.info.pop(PENDING_ROLLUPS, None)
+
+
+rollup_worker = RollupWorker()
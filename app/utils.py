@@ -1,6 +1,16 @@
 import enum, math
 from app import db
+from sqlalchemy import inspect
+from sqlalchemy.sql import ClauseElement
+from collections import defaultdict
 from datetime import datetime
+from functools import lru_cache, wraps
+
+# NumPy is optional, the limits of a batch of TestPoints are calculated in pure Python without it
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 class TestResult(enum.Enum):
     UNTESTED = "Untested"
@@ -68,42 +78,90 @@ class StandardTestEquipmentTypes(enum.Enum):
     RESOLVER_SIMULATOR = "Resolver Simulator"
     DECADE_BOX = "Decade Box"
 
+class ReportStatus(enum.Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    DONE = "Done"
+    FAILED = "Failed"
+
+
+# Makes the lists of each enum's values available to every template
+def utility_processor():
+
+    def measurement_types():
+        return [measurement_type.value for measurement_type in MeasurementType]
+
+    def eng_units():
+        return [unit.value for unit in EngUnits]
+
+    def error_types():
+        return [error_type.value for error_type in ErrorType]
+
+    return dict(
+        measurement_types=measurement_types,
+        eng_units=eng_units,
+        error_types=error_types
+    )
+
 
 # Returns None if a value is empty
 def none_if_empty(value):
     return None if value == "" else value
 
 
-# Calculates some statistics on a list fo channels
+# Converts a submitted number into a float, treating an empty or NaN value as no value
+def float_or_none(value):
+    value = none_if_empty(value)
+    if value is None:
+        return None
+
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+# Decorator that saves all the changes made by a view in a single commit once it has finished
+# Note: Any error raised by the view rolls back every change made during the request
+def unit_of_work(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            response = f(*args, **kwargs)
+            db.session.commit()
+        except:
+            db.session.rollback()
+            raise
+        return response
+    return decorated_function
+
+
+# Calculates some statistics on a list or query of channels
+# Note: A query is tallied by the database with a single GROUP BY rather than loading each channel
 def channel_stats(channels):
 
-        # Statistics tracking variables
-        num_untested = 0
-        num_passed = 0
-        num_failed = 0
-        num_in_progress = 0
-
-        # Tally up the status
-        for channel in channels:
-
-            status = channel.status
-
-            if status == TestResult.UNTESTED.value:
-                num_untested += 1
-            elif status == TestResult.PASS.value:
-                num_passed += 1
-            elif status == TestResult.FAIL.value:
-                num_failed += 1
-            elif status == Status.IN_PROGRESS.value:
-                num_in_progress += 1
-        
-        # Compile and return the results
-        return {
-            TestResult.UNTESTED.value: num_untested,
-            TestResult.PASS.value: num_passed,
-            TestResult.FAIL.value: num_failed,
-            Status.IN_PROGRESS.value: num_in_progress
-        }
+    # Import the Model directly here to avoid a circular import
+    from app.models import Channel
+
+    # Statistics tracking variables
+    stats = {
+        TestResult.UNTESTED.value: 0,
+        TestResult.PASS.value: 0,
+        TestResult.FAIL.value: 0,
+        Status.IN_PROGRESS.value: 0
+    }
+
+    # Count the channels of each status
+    if isinstance(channels, list):
+        counts = [(channel.status, 1) for channel in channels]
+    else:
+        counts = channels.with_entities(Channel.status, db.func.count(Channel.id)) \
+            .group_by(Channel.status).order_by(None).all()
+
+    # Tally up the status
+    for status, count in counts:
+        if status in stats:
+            stats[status] += count
+
+    return stats
 
 
 # Returns the channel progress for a given set of channels
@@ -113,6 +171,12 @@ def channel_progress(item):
     stats = item.channel_stats()
     num_channels = item.num_channels()
 
+    return calc_channel_progress(stats, num_channels)
+
+
+# Calculates the progress bar width percentages from a set of channel stats
+def calc_channel_progress(stats, num_channels):
+
     if num_channels == 0:
         return {
         "percent_untested": 100,
@@ -129,6 +193,776 @@ def channel_progress(item):
         }
 
 
+# Calculates the progress bar width percentages from a set of testpoint stats
+def calc_testpoint_progress(stats, num_testpoints):
+    return {
+        "percent_untested": calc_percent(stats[TestResult.UNTESTED.value], num_testpoints),
+        "percent_passed": calc_percent(stats[TestResult.PASS.value], num_testpoints),
+        "percent_failed": calc_percent(stats[TestResult.FAIL.value], num_testpoints),
+    }
+
+
+# Calculates the channel stats and progress of a list of Projects, Jobs or Groups in a single query
+# Note: Returns a summary of each item keyed by its id for the listing pages to display
+def bulk_channel_progress(items):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import Channel, Group, Job, Project
+
+    if len(items) == 0:
+        return {}
+
+    # Find the column that links each channel back to the type of item being listed
+    item_type = type(items[0])
+    if item_type == Group:
+        item_id = Channel.group_id
+        query = db.session.query(item_id, Channel.status, db.func.count(Channel.id))
+    elif item_type == Job:
+        item_id = Group.job_id
+        query = db.session.query(item_id, Channel.status, db.func.count(Channel.id)) \
+            .select_from(Channel).join(Group)
+    elif item_type == Project:
+        item_id = Job.project_id
+        query = db.session.query(item_id, Channel.status, db.func.count(Channel.id)) \
+            .select_from(Channel).join(Group).join(Job)
+    else:
+        raise ValueError(f'Unable to calculate the channel progress of {item_type}')
+
+    # Start each item with empty stats so that items without any channels are still summarized
+    stats = {item.id: channel_stats([]) for item in items}
+    num_channels = {item.id: 0 for item in items}
+
+    # Count the channels of each status for every item at once
+    counts = query.filter(item_id.in_(stats.keys())).group_by(item_id, Channel.status).all()
+    for id, status, count in counts:
+        num_channels[id] += count
+        if status in stats[id]:
+            stats[id][status] += count
+
+    # Compile the summary of each item
+    return {
+        id: {
+            "stats": stats[id],
+            "num_channels": num_channels[id],
+            "progress": calc_channel_progress(stats[id], num_channels[id])
+        } for id in stats
+    }
+
+
+# Prefetches everything the channels page displays about a list of channels in a handful of queries
+# Note: Returns a view of each channel in the same order as the list of channels
+def channel_views(channels):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import TestPoint, TestEquipmentType, ChannelEquipmentRecord, ApprovalRecord
+    from app.models import channel_required_equipment
+    from sqlalchemy.orm import joinedload
+
+    # Start each channel with an empty view
+    channel_ids = [channel.id for channel in channels]
+    views = {
+        channel.id: {
+            "testpoints": [],
+            "test_equipment": [],
+            "supplier_approval_record": None,
+            "client_approval_record": None
+        } for channel in channels
+    }
+
+    if len(channel_ids) == 0:
+        return []
+
+    # Load every TestPoint on the page in a single query and calculate all their limits at once
+    # Note: Each testpoint.channel is found in the session's identity map rather than queried again
+    testpoints = TestPoint.query.filter(TestPoint.channel_id.in_(channel_ids)) \
+        .order_by(TestPoint.channel_id, TestPoint.nominal_injection_value).all()
+    limits = calc_testpoint_limits(
+        [testpoint.channel.error_type for testpoint in testpoints],
+        [testpoint.channel.max_error for testpoint in testpoints],
+        [testpoint.channel.full_scale_range for testpoint in testpoints],
+        [testpoint.nominal_test_value for testpoint in testpoints],
+        [testpoint.measured_test_value for testpoint in testpoints])
+    for testpoint, max_error, lower_limit, upper_limit in \
+            zip(testpoints, limits["max_error"], limits["lower_limit"], limits["upper_limit"]):
+        views[testpoint.channel_id]["testpoints"].append({
+            "testpoint": testpoint,
+            "max_error": max_error,
+            "lower_limit": lower_limit,
+            "upper_limit": upper_limit
+        })
+
+    # Load the most recent TestEquipment used for each of the channel's required TestEquipmentTypes
+    current_test_equipment = {}
+    records = ChannelEquipmentRecord.query.options(joinedload(ChannelEquipmentRecord.test_equipment)) \
+        .filter(ChannelEquipmentRecord.channel_id.in_(channel_ids)) \
+        .order_by(ChannelEquipmentRecord.timestamp.desc()).all()
+    for record in records:
+        current_test_equipment.setdefault((record.channel_id, record.test_equipment_type_id), record.test_equipment)
+
+    # Load the required TestEquipmentTypes of each channel
+    required_test_equipment = db.session.query(channel_required_equipment.c.channel_id, TestEquipmentType) \
+        .join(TestEquipmentType, TestEquipmentType.id == channel_required_equipment.c.test_equipment_type_id) \
+        .filter(channel_required_equipment.c.channel_id.in_(channel_ids)) \
+        .order_by(TestEquipmentType.name).all()
+    for channel_id, test_equipment_type in required_test_equipment:
+        views[channel_id]["test_equipment"].append({
+            "test_equipment_type": test_equipment_type,
+            "current_test_equipment": current_test_equipment.get((channel_id, test_equipment_type.id))
+        })
+
+    # Load the first Supplier and Client approval of each channel along with the Users who signed them
+    approval_records = ApprovalRecord.query.options(joinedload(ApprovalRecord.user)) \
+        .filter(ApprovalRecord.channel_id.in_(channel_ids)) \
+        .order_by(ApprovalRecord.id).all()
+    for record in approval_records:
+        if record.company_category == CompanyCategory.SUPPLIER.value:
+            key = "supplier_approval_record"
+        elif record.company_category == CompanyCategory.CLIENT.value:
+            key = "client_approval_record"
+        else:
+            continue
+        if views[record.channel_id][key] is None:
+            views[record.channel_id][key] = record
+
+    # Summarize the TestPoint results of each channel
+    for view in views.values():
+        stats = tally_testpoint_results([t["testpoint"] for t in view["testpoints"]])
+        view["num_testpoints"] = len(view["testpoints"])
+        view["num_passed"] = stats[TestResult.PASS.value]
+        view["progress"] = calc_testpoint_progress(stats, view["num_testpoints"])
+
+    return [views[channel_id] for channel_id in channel_ids]
+
+
+# Tallies up the results of a list of already loaded testpoints
+def tally_testpoint_results(testpoints):
+
+    stats = {
+        TestResult.UNTESTED.value: 0,
+        TestResult.PASS.value: 0,
+        TestResult.FAIL.value: 0
+    }
+    for testpoint in testpoints:
+        if testpoint.test_result in stats:
+            stats[testpoint.test_result] += 1
+
+    return stats
+
+
+# Prefetches the TestEquipment assigned to a project along with each item's latest calibration due date
+# Note: Returns a list of choices for each TestEquipmentType keyed by its name
+def test_equipment_choices(project):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import TestEquipment, CalibrationRecord
+
+    test_equipment = project.test_equipment.order_by(TestEquipment.id).all()
+    if len(test_equipment) == 0:
+        return {}
+
+    # Find the latest calibration due date of every TestEquipment at once
+    due_dates = dict(db.session.query(CalibrationRecord.test_equipment_id,
+        db.func.max(CalibrationRecord.calibration_due_date)) \
+        .filter(CalibrationRecord.test_equipment_id.in_([t.id for t in test_equipment])) \
+        .group_by(CalibrationRecord.test_equipment_id).all())
+
+    choices = defaultdict(list)
+    for t in test_equipment:
+        choices[t.name].append({
+            "test_equipment": t,
+            "due_date": due_dates.get(t.id)
+        })
+
+    return dict(choices)
+
+
+# Finds the Channels and TestPoints of a Group which have been updated since the cursor
+# Note: Both queries are served by the (group_id, last_updated) and (channel_id, last_updated) indexes
+def group_changes(group_id, since):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import Channel, TestPoint
+
+    channels = Channel.query \
+        .filter(Channel.group_id == group_id, Channel.last_updated > since) \
+        .order_by(Channel.last_updated).all()
+    testpoints = TestPoint.query.join(Channel) \
+        .filter(Channel.group_id == group_id, TestPoint.last_updated > since) \
+        .order_by(TestPoint.last_updated).all()
+
+    return {
+        "channels": [channel_change(channel) for channel in channels],
+        "testpoints": [testpoint_change(testpoint) for testpoint in testpoints]
+    }
+
+
+# Builds the payload needed to refresh a Channel row on another user's page
+# Note: The progress is calculated from the status counters so no TestPoints are loaded
+def channel_change(channel):
+
+    stats = counter_stats(channel)
+    num_testpoints = sum(stats.values())
+
+    return {
+        "channel_id": channel.id,
+        "name": channel.name,
+        "status": channel.status,
+        "notes": channel.notes,
+        "interface": channel.interface,
+        "num_passed": stats[TestResult.PASS.value],
+        "num_testpoints": num_testpoints,
+        "progress": calc_testpoint_progress(stats, num_testpoints),
+        "last_updated": channel.last_updated
+    }
+
+
+# Builds the payload needed to refresh a TestPoint row on another user's page
+def testpoint_change(testpoint):
+    return {
+        "testpoint_id": testpoint.id,
+        "channel_id": testpoint.channel_id,
+        "measured_injection_value": testpoint.measured_injection_value,
+        "measured_test_value": testpoint.measured_test_value,
+        "measured_error": testpoint.measured_error,
+        "test_result": testpoint.test_result,
+        "last_updated": testpoint.last_updated
+    }
+
+
+# Calculates the maximum error allowed on a testpoint's measurement in the channel's engineering units
+def calc_max_error(error_type, max_error, full_scale_range, nominal_test_value, measured_test_value=None):
+
+    # Returns an error in the engineering units provided
+    # ex. max_error = +/- 0.05 VDC
+    if error_type == ErrorType.ENG_UNITS.value: 
+        return max_error
+
+    # Returns an error calculated from the channel's full scale range
+    # ex. max_error of 0.05 %FS is equivalent to 0.125 psi on a 0-250 psi full scale range
+    elif error_type == ErrorType.PERCENT_FULL_SCALE.value:
+        return full_scale_range * (max_error / 100)
+
+    # Returns an error based on the measured/read value being evaluated
+    # ex. max_error of 0.1 %RDG is equivalent to 0.015 Hz at a measured value of 15 Hz
+    elif error_type == ErrorType.PERCENT_READING.value:
+        if measured_test_value == None:
+            return nominal_test_value * (max_error / 100)
+        else:
+            return measured_test_value * (max_error / 100)
+
+
+# Batches smaller than this are quicker to calculate in pure Python than to convert into NumPy arrays
+NUMPY_MIN_BATCH_SIZE = 64
+
+
+# Calculates the limits, error and result of a batch of TestPoints at once
+# Note: Each argument holds a value for every TestPoint, and None is returned for anything that can't be calculated
+def calc_testpoint_limits(error_types, max_errors, full_scale_ranges, nominal_test_values, measured_test_values):
+
+    if numpy is not None and len(nominal_test_values) >= NUMPY_MIN_BATCH_SIZE:
+        return numpy_testpoint_limits(error_types, max_errors, full_scale_ranges, nominal_test_values, measured_test_values)
+
+    limits = {"max_error": [], "lower_limit": [], "upper_limit": [], "error": [], "result": []}
+    for error_type, max_error, full_scale_range, nominal_test_value, measured_test_value in \
+            zip(error_types, max_errors, full_scale_ranges, nominal_test_values, measured_test_values):
+
+        # Same as calc_max_error, but with None for a tolerance that is missing a value
+        tolerance = None
+        if max_error is not None and nominal_test_value is not None:
+            if error_type == ErrorType.ENG_UNITS.value:
+                tolerance = max_error
+            elif error_type == ErrorType.PERCENT_FULL_SCALE.value and full_scale_range is not None:
+                tolerance = full_scale_range * (max_error / 100)
+            elif error_type == ErrorType.PERCENT_READING.value:
+                reading = nominal_test_value if measured_test_value is None else measured_test_value
+                tolerance = reading * (max_error / 100)
+
+        lower_limit = upper_limit = None
+        if tolerance is not None:
+            lower_limit = nominal_test_value - tolerance
+            upper_limit = nominal_test_value + tolerance
+
+        error = None
+        result = TestResult.UNTESTED.value
+        if measured_test_value is not None and nominal_test_value is not None:
+            error = measured_test_value - nominal_test_value
+            if tolerance is not None:
+                result = TestResult.PASS.value if lower_limit <= measured_test_value <= upper_limit \
+                    else TestResult.FAIL.value
+
+        limits["max_error"].append(tolerance)
+        limits["lower_limit"].append(lower_limit)
+        limits["upper_limit"].append(upper_limit)
+        limits["error"].append(error)
+        limits["result"].append(result)
+
+    return limits
+
+
+# The NumPy version of calc_testpoint_limits, which works on whole columns of values rather than each TestPoint
+# Note: A missing value is carried through each calculation as NaN and handed back as None
+def numpy_testpoint_limits(error_types, max_errors, full_scale_ranges, nominal_test_values, measured_test_values):
+
+    error_types = numpy.array(error_types, dtype=object)
+    max_errors = numpy.array(max_errors, dtype=float)
+    full_scale_ranges = numpy.array(full_scale_ranges, dtype=float)
+    nominal_test_values = numpy.array(nominal_test_values, dtype=float)
+    measured_test_values = numpy.array(measured_test_values, dtype=float)
+    is_measured = ~numpy.isnan(measured_test_values) & ~numpy.isnan(nominal_test_values)
+
+    readings = numpy.where(is_measured, measured_test_values, nominal_test_values)
+    tolerances = numpy.select(
+        [error_types == ErrorType.ENG_UNITS.value, error_types == ErrorType.PERCENT_FULL_SCALE.value,
+            error_types == ErrorType.PERCENT_READING.value],
+        [max_errors, full_scale_ranges * (max_errors / 100), readings * (max_errors / 100)],
+        numpy.nan)
+    lower_limits = nominal_test_values - tolerances
+    upper_limits = nominal_test_values + tolerances
+    errors = measured_test_values - nominal_test_values
+
+    has_limits = is_measured & ~numpy.isnan(tolerances)
+    passed = (lower_limits <= measured_test_values) & (measured_test_values <= upper_limits)
+    results = numpy.where(has_limits, numpy.where(passed, TestResult.PASS.value, TestResult.FAIL.value),
+        TestResult.UNTESTED.value)
+
+    def to_list(values):
+        return [None if math.isnan(value) else value for value in values.tolist()]
+
+    return {
+        "max_error": to_list(tolerances),
+        "lower_limit": to_list(lower_limits),
+        "upper_limit": to_list(upper_limits),
+        "error": to_list(errors),
+        "result": results.tolist()
+    }
+
+
+# The number of Channel tolerances kept by channel_tolerance
+CHANNEL_TOLERANCE_CACHE_SIZE = 4096
+
+# The number of decimal places a TestPoint's measured error is stored with, the same as it is displayed
+MEASURED_ERROR_DECIMALS = 3
+
+
+# Works out a Channel's tolerance once rather than for every measurement entered against it
+# Note: The values the tolerance depends on are part of the key, so an edited Channel never uses a stale tolerance
+# - Returns the fixed tolerance, or for a %RDG tolerance the fraction of the reading, with None for the other
+@lru_cache(maxsize=CHANNEL_TOLERANCE_CACHE_SIZE)
+def channel_tolerance(channel_id, error_type, max_error, full_scale_range):
+
+    if max_error is None:
+        return None, None
+    if error_type == ErrorType.ENG_UNITS.value:
+        return max_error, None
+    if error_type == ErrorType.PERCENT_FULL_SCALE.value and full_scale_range is not None:
+        return full_scale_range * (max_error / 100), None
+    if error_type == ErrorType.PERCENT_READING.value:
+        return None, max_error / 100
+
+    return None, None
+
+
+# Evaluates a measured test value against its Channel's tolerance, returning the measured error and test result
+# Note: The measured error is how far the reading is from the nominal value, the same as the channels page shows
+def evaluate_measurement(channel, nominal_test_value, measured_test_value):
+
+    if measured_test_value is None or nominal_test_value is None:
+        return None, TestResult.UNTESTED.value
+
+    tolerance, reading_fraction = channel_tolerance(channel.id, channel.error_type, channel.max_error,
+        channel.full_scale_range)
+    if reading_fraction is not None:
+        tolerance = measured_test_value * reading_fraction
+
+    measured_error = round(measured_test_value - nominal_test_value, MEASURED_ERROR_DECIMALS)
+    if tolerance is None:
+        return measured_error, TestResult.UNTESTED.value
+
+    passed = nominal_test_value - tolerance <= measured_test_value <= nominal_test_value + tolerance
+    return measured_error, TestResult.PASS.value if passed else TestResult.FAIL.value
+
+
+# Evaluates the measured test values of a batch of TestPoints at once, storing each one's measured error and result
+# Note: The TestPoints' Channels should already be loaded, so that no query is made for each TestPoint
+def evaluate_testpoints(testpoints):
+
+    limits = calc_testpoint_limits(
+        [testpoint.channel.error_type for testpoint in testpoints],
+        [testpoint.channel.max_error for testpoint in testpoints],
+        [testpoint.channel.full_scale_range for testpoint in testpoints],
+        [testpoint.nominal_test_value for testpoint in testpoints],
+        [testpoint.measured_test_value for testpoint in testpoints])
+
+    for testpoint, error, result in zip(testpoints, limits["error"], limits["result"]):
+        testpoint.measured_error = None if error is None else round(error, MEASURED_ERROR_DECIMALS)
+        testpoint.test_result = result
+
+
+# Calculates the nominal injection and test values of a new channel's testpoints
+# Note: A custom list uses the values entered by the user, a standard list spreads the points evenly over each range
+def calc_testpoint_values(num_testpoints, testpoint_list_type, min_injection_range, max_injection_range,
+    min_range, max_range, injection_value_list=None, test_value_list=None):
+
+    if testpoint_list_type == TestPointListType.CUSTOM.value:
+        return list(zip(injection_value_list[:num_testpoints], test_value_list[:num_testpoints]))
+
+    elif testpoint_list_type == TestPointListType.STANDARD.value:
+
+        # Calculates the nominal signal injection values
+        delta = (max_injection_range - min_injection_range) / (num_testpoints - 1)
+        injection_values = [min_injection_range]
+        for i in range(1, num_testpoints):
+            injection_values.append(injection_values[i-1] + delta)
+
+        # Calculates the nominal test values for the channel's measurement points
+        delta = (max_range - min_range) / (num_testpoints - 1)
+        test_values = [min_range]
+        for i in range(1, num_testpoints):
+            test_values.append(test_values[i-1] + delta)
+
+        return list(zip(injection_values, test_values))
+
+    return []
+
+
+# Adds a batch of new Channels to a Group with their TestPoints and required TestEquipmentTypes
+# Note: Each table is filled with a single batched insert and the caller saves the whole batch in one commit
+def bulk_add_channels(group, names, channel_fields, testpoint_values, required_test_equipment_types):
+
+    test_equipment_type_ids = [test_equipment_type.id for test_equipment_type in required_test_equipment_types]
+    return bulk_add_channel_rows(group, [
+        (dict(channel_fields, name=name), testpoint_values, test_equipment_type_ids) for name in names
+    ])
+
+
+# Adds a batch of new Channels to a Group where each Channel has its own fields, TestPoints and required TestEquipmentTypes
+# Note: Each row is a tuple of the Channel's fields, its (injection, test) values and its TestEquipmentType ids
+def bulk_add_channel_rows(group, rows):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import Channel, TestPoint, channel_required_equipment
+
+    last_updated = datetime.utcnow()
+    required_client_approval = (group.job.phase == JobPhase.ATP.value)
+
+    # Insert the Channels with their status counters already set for their new TestPoints
+    # Note: return_defaults fetches each new channel's id for the rows that reference it
+    channels = [
+        dict(channel_fields,
+            group_id=group.id,
+            last_updated=last_updated,
+            status=TestResult.UNTESTED.value,
+            num_untested=len(testpoint_values),
+            num_passed=0,
+            num_failed=0,
+            required_supplier_approval=True,
+            required_client_approval=required_client_approval
+        ) for channel_fields, testpoint_values, test_equipment_type_ids in rows
+    ]
+    db.session.bulk_insert_mappings(Channel, channels, return_defaults=True)
+    channel_ids = [channel["id"] for channel in channels]
+
+    # Insert the TestPoints of every new Channel
+    db.session.bulk_insert_mappings(TestPoint, [
+        dict(
+            channel_id=channel_id,
+            last_updated=last_updated,
+            nominal_injection_value=injection_value,
+            nominal_test_value=test_value,
+            test_result=TestResult.UNTESTED.value
+        ) for channel_id, (channel_fields, testpoint_values, test_equipment_type_ids) in zip(channel_ids, rows)
+        for injection_value, test_value in testpoint_values
+    ])
+
+    # Link every new Channel to its required TestEquipmentTypes
+    required_test_equipment = [
+        dict(channel_id=channel_id, test_equipment_type_id=test_equipment_type_id)
+        for channel_id, (channel_fields, testpoint_values, test_equipment_type_ids) in zip(channel_ids, rows)
+        for test_equipment_type_id in test_equipment_type_ids
+    ]
+    if len(required_test_equipment) > 0:
+        db.session.execute(channel_required_equipment.insert(), required_test_equipment)
+
+    # Add the new Channels and TestPoints to the counters of the Group and its parents
+    group.record_channel_status(None, TestResult.UNTESTED.value, len(channel_ids))
+    group.record_testpoint_count(sum(len(testpoint_values) for channel_fields, testpoint_values, ids in rows))
+
+    return channel_ids
+
+
+# Maps each status to the counter column that keeps a running tally of it
+STATUS_COUNTERS = {
+    TestResult.UNTESTED.value: 'num_untested',
+    TestResult.PASS.value: 'num_passed',
+    TestResult.FAIL.value: 'num_failed',
+    Status.IN_PROGRESS.value: 'num_in_progress'
+}
+
+
+# Determines a Channel's status from the stats of its TestPoints
+def testpoint_status(stats, num_testpoints):
+
+    if num_testpoints == stats[TestResult.UNTESTED.value]:
+        return TestResult.UNTESTED.value
+
+    elif num_testpoints == stats[TestResult.PASS.value]:
+        return TestResult.PASS.value
+
+    elif stats[TestResult.FAIL.value] > 0:
+        return TestResult.FAIL.value
+
+    else:
+        return Status.IN_PROGRESS.value
+
+
+# Determines a Group, Job or Project's status from the stats of its Channels
+def rollup_status(stats, num_channels):
+
+    if num_channels == stats[TestResult.UNTESTED.value]:
+        return Status.NOT_STARTED.value
+
+    elif num_channels == stats[TestResult.PASS.value]:
+        return Status.COMPLETE.value
+
+    else:
+        return Status.IN_PROGRESS.value
+
+
+# Every counter column adjusted by a running tally
+COUNTER_COLUMNS = list(STATUS_COUNTERS.values()) + ['num_testpoints']
+
+
+# Returns the stored status counters of an item in the same format as channel_stats
+def counter_stats(item):
+    flush_counters(item)
+    return {status: getattr(item, counter, 0) or 0 for status, counter in STATUS_COUNTERS.items()}
+
+
+# Adds an amount to one of an item's counters
+# Note: A saved item is incremented by the UPDATE itself (SET counter = counter + amount) rather than writing back
+#       the value read earlier, so concurrent requests each add their own change and the row stays locked until commit
+def increment_counter(item, counter, amount):
+
+    pending = item.__dict__.get(counter)
+    if isinstance(pending, ClauseElement):
+        setattr(item, counter, pending + amount)
+    elif inspect(item).persistent:
+        setattr(item, counter, db.func.coalesce(getattr(type(item), counter), 0) + amount)
+    else:
+        setattr(item, counter, (getattr(item, counter) or 0) + amount)
+
+
+# Saves any of an item's counters still waiting to be incremented by the database, so they're read back afresh
+# Note: Returns whether anything had to be saved
+def flush_counters(item):
+
+    if any(isinstance(item.__dict__.get(counter), ClauseElement) for counter in COUNTER_COLUMNS):
+        db.session.flush()
+        return True
+    return False
+
+
+# Overwrites the status counters of an item with a freshly calculated set of stats
+def set_status_counters(item, stats):
+    for status, counter in STATUS_COUNTERS.items():
+        if hasattr(item, counter):
+            setattr(item, counter, stats.get(status, 0))
+
+
+# Adds the net change in the number of child items with each status to an item's counters
+# Note: The changes are also added to the parent's changes, if any, to be passed up the tree
+def add_status_changes(item, changes, parent_changes):
+    for status, count in changes.items():
+        if count != 0:
+            increment_counter(item, STATUS_COUNTERS[status], count)
+            if parent_changes is not None:
+                parent_changes[status] += count
+
+
+# Loads the items with the given ids in a single query, replacing any values already loaded
+def reload_items(item_class, item_ids):
+    if len(item_ids) == 0:
+        return []
+    return item_class.query.filter(item_class.id.in_(list(item_ids))).order_by(item_class.id) \
+        .populate_existing().all()
+
+
+# Moves a number of child items, one by default, from one status counter to another
+# Note: A previous_status of None adds new children and a new_status of None removes them
+def adjust_status_counters(item, previous_status, new_status, count=1):
+
+    # Nothing to adjust if the status hasn't changed
+    if previous_status == new_status:
+        return
+
+    if previous_status is not None:
+        increment_counter(item, STATUS_COUNTERS[previous_status], -count)
+
+    if new_status is not None:
+        increment_counter(item, STATUS_COUNTERS[new_status], count)
+
+
+# Calculates the status counters every Channel, Group, Job and Project should have from their TestPoints
+# Note: Returns the counters, number of TestPoints and status each item should have, keyed by the item
+def calc_status_counters():
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import TestPoint, Channel, Group, Job, Project
+
+    expected = {}
+
+    # Fills in the counters an item has from a set of stats, with zero for any status missing from the stats
+    def counters(item, stats):
+        stats = {status: stats.get(status, 0) for status in STATUS_COUNTERS}
+        values = {counter: stats[status] for status, counter in STATUS_COUNTERS.items() if hasattr(item, counter)}
+        return stats, values
+
+    # Tally the TestPoint results of every Channel in a single query
+    testpoint_stats = defaultdict(lambda: defaultdict(int))
+    results = db.session.query(TestPoint.channel_id, TestPoint.test_result, db.func.count(TestPoint.id)) \
+        .group_by(TestPoint.channel_id, TestPoint.test_result).all()
+    for channel_id, test_result, count in results:
+        testpoint_stats[channel_id][test_result or TestResult.UNTESTED.value] += count
+
+    # Work out each Channel's counters and status while tallying the results of each Group
+    group_stats = defaultdict(lambda: defaultdict(int))
+    group_testpoints = defaultdict(int)
+    for channel in Channel.query.all():
+        stats, expected[channel] = counters(channel, testpoint_stats[channel.id])
+        num_testpoints = sum(testpoint_stats[channel.id].values())
+        expected[channel]["status"] = testpoint_status(stats, num_testpoints)
+        group_stats[channel.group_id][expected[channel]["status"]] += 1
+        group_testpoints[channel.group_id] += num_testpoints
+
+    # Roll the Channel stats up through each Group, Job and Project
+    job_stats = defaultdict(lambda: defaultdict(int))
+    job_testpoints = defaultdict(int)
+    for group in Group.query.all():
+        stats, expected[group] = counters(group, group_stats[group.id])
+        expected[group]["status"] = rollup_status(stats, sum(stats.values()))
+        expected[group]["num_testpoints"] = group_testpoints[group.id]
+        for status, count in stats.items():
+            job_stats[group.job_id][status] += count
+        job_testpoints[group.job_id] += group_testpoints[group.id]
+
+    project_stats = defaultdict(lambda: defaultdict(int))
+    project_testpoints = defaultdict(int)
+    for job in Job.query.all():
+        stats, expected[job] = counters(job, job_stats[job.id])
+        expected[job]["status"] = rollup_status(stats, sum(stats.values()))
+        expected[job]["num_testpoints"] = job_testpoints[job.id]
+        for status, count in stats.items():
+            project_stats[job.project_id][status] += count
+        project_testpoints[job.project_id] += job_testpoints[job.id]
+
+    for project in Project.query.all():
+        stats, expected[project] = counters(project, project_stats[project.id])
+        expected[project]["status"] = rollup_status(stats, sum(stats.values()))
+        expected[project]["num_testpoints"] = project_testpoints[project.id]
+
+    return expected
+
+
+# Recalculates the status counters of every Channel, Group, Job and Project from scratch
+def rebuild_status_counters():
+
+    expected = calc_status_counters()
+    for item, values in expected.items():
+        for name, value in values.items():
+            setattr(item, name, value)
+
+    # Save the changes
+    db.session.commit()
+
+    return len(expected)
+
+
+# Compares the stored status counters of every Channel, Group, Job and Project against their TestPoints
+# Note: Returns each stored value that differs as an (item, name, stored value, expected value) tuple
+def check_status_counters():
+
+    differences = []
+    for item, values in calc_status_counters().items():
+        for name, value in values.items():
+            stored = getattr(item, name)
+            if stored != value and not (stored is None and value == 0):
+                differences.append((item, name, stored, value))
+
+    return differences
+
+
+# Summarizes the progress of a list of Projects, Jobs or Groups from their stored counters
+# Note: Nothing is queried, as the counters are kept up to date as each Channel and TestPoint changes
+def progress_summaries(items):
+
+    summaries = {}
+    for item in items:
+        stats = counter_stats(item)
+        num_channels = sum(stats.values())
+        summaries[item.id] = {
+            "stats": stats,
+            "num_channels": num_channels,
+            "num_testpoints": item.num_testpoints or 0,
+            "progress": calc_channel_progress(stats, num_channels),
+            "last_updated": getattr(item, 'last_updated', None)
+        }
+
+    return summaries
+
+
+# Rolls the status of a set of Groups up from their Channels, then through each of their Jobs and Projects
+# Note: Each item is recalculated from its children rather than adjusted, so it doesn't matter how many changes
+#       were made or in which order, only that the Channels are up to date
+# - Takes the time each Group was last changed, keyed by the Group's id
+# - The rows of each Group, Job and Project are locked before they're totalled, always in that order and by id, so
+#   that rollups in other processes wait for this one to commit rather than overwriting it with an older total
+def rollup_group_status(group_timestamps):
+
+    # Import the Models directly here to avoid a circular import
+    from app.models import Channel, Group, Job, Project
+
+    # Returns the items with the given ids, locking their rows until the transaction is committed
+    def lock(item_class, item_ids):
+        return item_class.query.filter(item_class.id.in_(list(item_ids))).order_by(item_class.id) \
+            .with_for_update().populate_existing().all()
+
+    groups = lock(Group, group_timestamps)
+
+    # Tally the Channel statuses of every Group in a single query
+    group_stats = defaultdict(lambda: defaultdict(int))
+    results = db.session.query(Channel.group_id, Channel.status, db.func.count(Channel.id)) \
+        .filter(Channel.group_id.in_(list(group_timestamps))).group_by(Channel.group_id, Channel.status).all()
+    for group_id, status, count in results:
+        group_stats[group_id][status or TestResult.UNTESTED.value] += count
+
+    job_timestamps = {}
+    for group in groups:
+        stats = group_stats[group.id]
+        set_status_counters(group, stats)
+        group.status = rollup_status(counter_stats(group), sum(stats.values()))
+        group.last_updated = max(group_timestamps[group.id], group.last_updated or group_timestamps[group.id])
+        job_timestamps[group.job_id] = max(group.last_updated, job_timestamps.get(group.job_id, group.last_updated))
+
+    # Total the counters of every Group within each Job, then every Job within each Project
+    def rollup(parent_class, child_class, parent_key, parent_ids):
+        parents = lock(parent_class, parent_ids)
+        counters = [getattr(child_class, counter) for counter in STATUS_COUNTERS.values()]
+        totals = db.session.query(getattr(child_class, parent_key), *[db.func.sum(counter) for counter in counters]) \
+            .filter(getattr(child_class, parent_key).in_(list(parent_ids))).group_by(getattr(child_class, parent_key)).all()
+        totals = {parent_id: dict(zip(STATUS_COUNTERS, sums)) for parent_id, *sums in totals}
+
+        for parent in parents:
+            stats = {status: count or 0 for status, count in totals.get(parent.id, {}).items()}
+            set_status_counters(parent, stats)
+            parent.status = rollup_status(counter_stats(parent), sum(stats.values()))
+        return parents
+
+    jobs = rollup(Job, Group, 'job_id', job_timestamps)
+    for job in jobs:
+        job.last_updated = max(job_timestamps[job.id], job.last_updated or job_timestamps[job.id])
+    rollup(Project, Job, 'project_id', {job.project_id for job in jobs})
+
+
 # Calculates the percent value of a number and out of its total
 def calc_percent(value, total):
     return 0 if (total == 0) else round((value / total) * 100)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""Compares the statements, commits and latency of adding a batch of Channels one at a time
+against the bulk insert used by add_channel.
+
+Usage: python -m benchmarks.add_channel [--channels 100 1000] [--testpoints 10] [--equipment 2]
+"""
+import argparse
+from benchmarks.common import *
+
+CHANNEL_FIELDS = dict(
+    measurement_type=MeasurementType.PRESSURE.value,
+    measurement_units=EngUnits.PSI.value,
+    min_range=0,
+    max_range=100,
+    full_scale_range=100,
+    max_error=0.5,
+    error_type=ErrorType.ENG_UNITS.value,
+    min_injection_range=4,
+    max_injection_range=20,
+    injection_units=EngUnits.AMPS_MILLI.value
+)
+
+
+# The channel creation loop as it was before the bulk insert, which committed twice per channel
+def legacy_add_channels(group, names, num_testpoints, required_test_equipment_types):
+
+    for name in names:
+        channel = Channel(name=name, group_id=group.id, **CHANNEL_FIELDS)
+        db.session.add(channel)
+        db.session.commit()
+
+        channel.build_testpoint_list(num_testpoints, TestPointListType.STANDARD.value, [], [])
+        for test_equipment_type in required_test_equipment_types:
+            channel.add_test_equipment_type(test_equipment_type)
+        channel.update_required_approvals()
+        channel.group.record_channel_status(None, channel.status)
+        db.session.commit()
+
+
+def current_add_channels(group, names, num_testpoints, required_test_equipment_types):
+
+    testpoint_values = calc_testpoint_values(num_testpoints, TestPointListType.STANDARD.value,
+        CHANNEL_FIELDS['min_injection_range'], CHANNEL_FIELDS['max_injection_range'],
+        CHANNEL_FIELDS['min_range'], CHANNEL_FIELDS['max_range'])
+    bulk_add_channels(group, names, CHANNEL_FIELDS, testpoint_values, required_test_equipment_types)
+    db.session.commit()
+
+
+# Adds a batch of Channels to an empty Group and reports what it cost
+def run_batch(add_channels, num_channels, num_testpoints, required_test_equipment_types):
+
+    group = seed_group(0, num_testpoints)
+    names = [f'CH{i:05d}' for i in range(num_channels)]
+
+    with StatementCounter(db.engine) as counter:
+        latencies = time_calls(lambda i: add_channels(group, names, num_testpoints,
+            required_test_equipment_types), 1)
+
+    assert group.channels.count() == num_channels
+    return {
+        'total_ms': round(latencies[0], 1),
+        'commits': counter.commits,
+        'statements': counter.statements
+    }
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--testpoints', type=int, default=10)
+    parser.add_argument('--equipment', type=int, default=2)
+    args = parser.parse_args()
+
+    create_benchmark_app()
+    addStandardTestEquipmentTypes()
+    required_test_equipment_types = TestEquipmentType.query.limit(args.equipment).all()
+
+    print(f'Adding channels with {args.testpoints} testpoints and {args.equipment} required equipment types')
+    print(f'{"":<28}{"before":>12}{"after":>12}')
+    for num_channels in args.channels:
+        before = run_batch(legacy_add_channels, num_channels, args.testpoints, required_test_equipment_types)
+        after = run_batch(current_add_channels, num_channels, args.testpoints, required_test_equipment_types)
+        for key in before:
+            label = f'{num_channels} channels {key}'
+            print(f'{label:<28}{before[key]:>12}{after[key]:>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""Compares saving a rig's readings one update_testpoint request at a time against a single
+update_testpoints batch request.
+
+Usage: python -m benchmarks.batch_update [--channels 5000] [--testpoints 5] [--readings 500]
+"""
+import argparse
+from benchmarks.common import *
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=5000)
+    parser.add_argument('--testpoints', type=int, default=5)
+    parser.add_argument('--readings', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    client = logged_in_client(app)
+    seed_group(args.channels, args.testpoints)
+    # Each way saves the first readings of its own Channels, so both change the status of every Channel they touch
+    rows = db.session.query(TestPoint.id, TestPoint.channel_id, TestPoint.nominal_test_value) \
+        .order_by(TestPoint.id).limit(args.readings * 2).all()
+    single_testpoints, batch_testpoints = rows[:args.readings], rows[args.readings:]
+    db.session.remove()
+
+    # Each reading saved by its own request
+    def save_each_reading(i):
+        for testpoint_id, channel_id, nominal_test_value in single_testpoints:
+            response = client.post('/update_testpoint', data={'testpoint_id': testpoint_id,
+                'channel_id': channel_id, 'measured_test_value': nominal_test_value + 0.1})
+            assert response.status_code == 200, response.data
+
+    # Every reading saved by a single batch request
+    def save_batch(i):
+        response = client.post('/update_testpoints', json={'testpoints': [
+            {'testpoint_id': testpoint_id, 'measured_test_value': nominal_test_value + 0.2}
+            for testpoint_id, channel_id, nominal_test_value in batch_testpoints
+        ]})
+        assert response.status_code == 200, response.data
+
+    print(f'Saving {len(batch_testpoints)} readings on a {args.channels}-channel group')
+    print(f'{"":>20}{"ms":>12}{"commits":>12}{"statements":>12}')
+    for label, f in [('single requests', save_each_reading), ('batch request', save_batch)]:
+        with StatementCounter(db.engine) as counter:
+            latencies = time_calls(f, 1)
+        print(f'{label:>20}{latencies[0]:>12.1f}{counter.commits:>12}{counter.statements:>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import os, statistics, tempfile
+from sqlalchemy import event
+from app import create_app, db
+from app.models import *
+from app.utils import *
+from config import Config
+from time import perf_counter
+
+
+class BenchmarkConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+
+    # Use an on-disk database by default so that each commit pays for a real fsync
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCHMARK_DATABASE_URL') or \
+        'sqlite:///' + os.path.join(tempfile.gettempdir(), 'icats_benchmark.db')
+
+
+# Creates an app instance with an empty database for a benchmark to run against
+def create_benchmark_app(config_class=BenchmarkConfig):
+
+    app = create_app(config_class)
+    app.app_context().push()
+    db.drop_all()
+    db.create_all()
+
+    return app
+
+
+# Creates a test client that is logged in as a new benchmark User
+def logged_in_client(app):
+
+    # Create the User that will make each request
+    company = Company(name='Benchmark Co.', category=CompanyCategory.SUPPLIER.value)
+    db.session.add(company)
+    db.session.commit()
+    user = User(username='benchmark', first_name='Bench', last_name='Mark',
+        email='benchmark@example.com', company_id=company.id)
+    user.set_password('benchmark')
+    db.session.add(user)
+    db.session.commit()
+
+    # Log the User in by storing it in the client's session
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user.id)
+        session['_fresh'] = True
+
+    return client
+
+
+# Bulk inserts a single Project/Job/Group holding a large number of Channels and TestPoints
+def seed_group(num_channels, num_testpoints):
+
+    project = Project(name='Benchmark Project', number=1)
+    db.session.add(project)
+    db.session.commit()
+    job = Job(project_id=project.id, name='Benchmark Job', stage=JobStage.IN_HOUSE.value,
+        phase=JobPhase.COMMISSIONING.value)
+    db.session.add(job)
+    db.session.commit()
+    group = Group(name='Benchmark Group', job_id=job.id)
+    db.session.add(group)
+    db.session.commit()
+
+    # Insert the Channels in a single batch
+    db.session.bulk_insert_mappings(Channel, [
+        dict(
+            name=f'CH{i:05d}',
+            group_id=group.id,
+            measurement_type=MeasurementType.PRESSURE.value,
+            measurement_units=EngUnits.PSI.value,
+            min_range=0,
+            max_range=100,
+            full_scale_range=100,
+            max_error=0.5,
+            error_type=ErrorType.ENG_UNITS.value,
+            min_injection_range=4,
+            max_injection_range=20,
+            injection_units=EngUnits.AMPS_MILLI.value,
+            status=TestResult.UNTESTED.value
+        ) for i in range(num_channels)
+    ])
+
+    # Insert the TestPoints of every Channel in a single batch
+    channel_ids = [channel_id for channel_id, in db.session.query(Channel.id).filter_by(group_id=group.id)]
+    db.session.bulk_insert_mappings(TestPoint, [
+        dict(
+            channel_id=channel_id,
+            nominal_injection_value=4 + 16 * i / (num_testpoints - 1),
+            nominal_test_value=100 * i / (num_testpoints - 1),
+            test_result=TestResult.UNTESTED.value
+        ) for channel_id in channel_ids for i in range(num_testpoints)
+    ])
+    db.session.commit()
+
+    # Bring the status counters in line with the inserted rows
+    rebuild_status_counters()
+
+    return group
+
+
+# Counts the SQL statements and commits sent to the database while it is active
+class StatementCounter(object):
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = 0
+        self.commits = 0
+
+    def count_statement(self, *args):
+        self.statements += 1
+
+    def count_commit(self, *args):
+        self.commits += 1
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self.count_statement)
+        event.listen(self.engine, 'commit', self.count_commit)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, 'before_cursor_execute', self.count_statement)
+        event.remove(self.engine, 'commit', self.count_commit)
+
+
+# Times a callable over a number of iterations and returns the latency of each call in milliseconds
+def time_calls(f, num_iterations):
+
+    latencies = []
+    for i in range(num_iterations):
+        start = perf_counter()
+        f(i)
+        latencies.append((perf_counter() - start) * 1000)
+
+    return latencies
+
+
+# Summarizes a list of latencies into the percentiles reported by each benchmark
+def latency_summary(latencies):
+
+    ordered = sorted(latencies)
+    return {
+        'mean_ms': round(statistics.mean(ordered), 3),
+        'p50_ms': round(ordered[int(0.50 * (len(ordered) - 1))], 3),
+        'p95_ms': round(ordered[int(0.95 * (len(ordered) - 1))], 3),
+        'max_ms': round(ordered[-1], 3)
+    }
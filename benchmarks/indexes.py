@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+"""Compares the query plans and latency of the hot foreign key lookups with and without the
+foreign key indexes, on a database seeded with many Groups of Channels and their records.
+
+Usage: python -m benchmarks.indexes [--groups 20] [--channels 1000] [--testpoints 5] [--iterations 200]
+"""
+import argparse, random
+from datetime import datetime, timedelta
+from benchmarks.common import *
+
+# The indexes added by the foreign key index migration
+INDEX_NAMES = [
+    'ix_approval_record_channel_id_user_id',
+    'ix_approval_record_user_id',
+    'ix_calibration_record_test_equipment_id_calibration_due_date',
+    'ix_channel_last_updated',
+    'ix_channel_equipment_record_channel_id_test_equipment_type_id_timestamp',
+    'ix_channel_equipment_record_test_equipment_id',
+    'ix_channel_required_equipment_channel_id_test_equipment_type_id',
+    'ix_channel_required_equipment_test_equipment_type_id',
+    'ix_company_projects_company_id_project_id',
+    'ix_company_projects_project_id',
+    'ix_group_job_id',
+    'ix_job_project_id',
+    'ix_project_equipment_project_id_test_equipment_id',
+    'ix_project_equipment_test_equipment_id',
+    'ix_project_members_project_id_user_id',
+    'ix_project_members_user_id',
+    'ix_test_equipment_test_equipment_type_id',
+    'ix_user_company_id'
+]
+
+
+# Seeds the equipment, calibration and approval records of every Channel
+def seed_records(num_equipment_types, num_equipment, num_users):
+
+    db.session.bulk_insert_mappings(TestEquipmentType, [
+        dict(name=f'Type {i}') for i in range(num_equipment_types)
+    ])
+    type_ids = [type_id for type_id, in db.session.query(TestEquipmentType.id)]
+    db.session.bulk_insert_mappings(TestEquipment, [
+        dict(asset_id=f'A{i:04d}', name=f'Equipment {i}', test_equipment_type_id=type_ids[i % len(type_ids)])
+        for i in range(num_equipment)
+    ])
+    equipment_ids = [equipment_id for equipment_id, in db.session.query(TestEquipment.id)]
+    db.session.bulk_insert_mappings(CalibrationRecord, [
+        dict(test_equipment_id=equipment_id, calibration_date=datetime(2020 + year, 1, 1),
+            calibration_due_date=datetime(2021 + year, 1, 1))
+        for equipment_id in equipment_ids for year in range(3)
+    ])
+    db.session.bulk_insert_mappings(User, [
+        dict(username=f'user{i}', email=f'user{i}@example.com') for i in range(num_users)
+    ])
+    user_ids = [user_id for user_id, in db.session.query(User.id)]
+
+    # Record a few uses of the equipment and a couple of approvals for every Channel
+    channel_ids = [channel_id for channel_id, in db.session.query(Channel.id)]
+    start = datetime(2024, 1, 1)
+    db.session.bulk_insert_mappings(ChannelEquipmentRecord, [
+        dict(channel_id=channel_id, test_equipment_type_id=type_id,
+            test_equipment_id=random.choice(equipment_ids), timestamp=start + timedelta(minutes=i))
+        for channel_id in channel_ids for i, type_id in enumerate(type_ids[:3] * 2)
+    ])
+    db.session.bulk_insert_mappings(ApprovalRecord, [
+        dict(channel_id=channel_id, user_id=user_id, timestamp=start)
+        for channel_id in channel_ids for user_id in random.sample(user_ids, 2)
+    ])
+    db.session.commit()
+
+    return channel_ids, type_ids, equipment_ids, user_ids
+
+
+# Returns the database's plan for a query with its parameters filled in
+def query_plan(query):
+
+    statement = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    explain = 'EXPLAIN QUERY PLAN' if db.engine.dialect.name == 'sqlite' else 'EXPLAIN'
+    rows = db.session.execute(f'{explain} {statement}').fetchall()
+
+    return ' | '.join(str(row[-1]) for row in rows)
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--groups', type=int, default=20)
+    parser.add_argument('--channels', type=int, default=1000)
+    parser.add_argument('--testpoints', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=200)
+    args = parser.parse_args()
+
+    create_benchmark_app()
+    random.seed(0)
+    for i in range(args.groups):
+        seed_group(args.channels, args.testpoints)
+    channel_ids, type_ids, equipment_ids, user_ids = seed_records(5, 200, 50)
+    job_ids = [job_id for job_id, in db.session.query(Job.id)]
+
+    # The lookups behind Channel.current_test_equipment, Channel.has_approval_from_user,
+    # Job.num_channels, the index page's recent activity and the equipment list's due dates
+    lookups = [
+        ('current_test_equipment', lambda i: ChannelEquipmentRecord.query
+            .filter_by(channel_id=channel_ids[i % len(channel_ids)], test_equipment_type_id=type_ids[i % 3])
+            .order_by(ChannelEquipmentRecord.timestamp.desc()).limit(1)),
+        ('has_approval_from_user', lambda i: db.session.query(db.func.count(ApprovalRecord.id))
+            .filter_by(channel_id=channel_ids[i % len(channel_ids)], user_id=user_ids[i % len(user_ids)])),
+        ('job_channels', lambda i: db.session.query(db.func.count(Channel.id)).select_from(Channel).join(Group)
+            .filter(Group.job_id == job_ids[i % len(job_ids)])),
+        ('recent_activity', lambda i: db.session.query(Channel.id)
+            .order_by(Channel.last_updated.desc()).limit(10)),
+        ('equipment_due_dates', lambda i: db.session.query(CalibrationRecord.test_equipment_id,
+            db.func.max(CalibrationRecord.calibration_due_date))
+            .filter(CalibrationRecord.test_equipment_id.in_(equipment_ids[:20]))
+            .group_by(CalibrationRecord.test_equipment_id))
+    ]
+
+    indexes = [index for table in db.metadata.sorted_tables for index in table.indexes if index.name in INDEX_NAMES]
+
+    def run_lookups():
+        results = {}
+        for label, build_query in lookups:
+            plan = query_plan(build_query(0))
+            summary = latency_summary(time_calls(lambda i: build_query(i).all(), args.iterations))
+            results[label] = (plan, summary)
+        return results
+
+    # Start each run on new connections so that no statement prepared against the other run's indexes is reused
+    def set_indexes(create):
+        db.session.remove()
+        for index in indexes:
+            index.create(db.engine) if create else index.drop(db.engine)
+        db.engine.dispose()
+
+    set_indexes(False)
+    try:
+        without_indexes = run_lookups()
+    finally:
+        set_indexes(True)
+    with_indexes = run_lookups()
+
+    print(f'{len(channel_ids)} channels in {args.groups} groups, {args.iterations} iterations of each lookup')
+    print(f'{"":>24}{"without (ms)":>14}{"with (ms)":>12}')
+    for label, build_query in lookups:
+        print(f'{label:>24}{without_indexes[label][1]["mean_ms"]:>14.3f}{with_indexes[label][1]["mean_ms"]:>12.3f}')
+    for label, build_query in lookups:
+        print(f'\n{label}')
+        print(f'  without: {without_indexes[label][0]}')
+        print(f'  with:    {with_indexes[label][0]}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+"""Compares exporting every Job of a Project one report at a time against the project report,
+written as a single workbook or as a zip whose workbooks are built by a pool of processes.
+
+Usage: python -m benchmarks.project_report [--jobs 8] [--channels 500] [--testpoints 5] [--workers 1 2 4 8]
+"""
+import argparse, io, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from app.reports import build_job_report, build_project_report
+from benchmarks.common import *
+
+
+# Seeds a Project holding a number of Jobs, each with a single large Group
+def seed_project(num_jobs, num_channels, num_testpoints):
+
+    groups = [seed_group(num_channels, num_testpoints) for i in range(num_jobs)]
+    project_id = groups[0].job.project_id
+    for group in groups:
+        group.job.project_id = project_id
+    db.session.commit()
+
+    return project_id
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--jobs', type=int, default=8)
+    parser.add_argument('--channels', type=int, default=500)
+    parser.add_argument('--testpoints', type=int, default=5)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    create_benchmark_app()
+    project_id = seed_project(args.jobs, args.channels, args.testpoints)
+    job_ids = [job_id for job_id, in db.session.query(Job.id).filter_by(project_id=project_id)]
+
+    print(f'Exporting {args.jobs} jobs of {args.channels} channels with {args.testpoints} testpoints '
+        f'on {os.cpu_count()} cores')
+
+    # Each Job exported as its own report, as before the project report existed
+    latencies = time_calls(lambda i: [build_job_report(job_id, io.BytesIO()) for job_id in job_ids], 1)
+    print(f'{"sequential job reports":<28}{latencies[0]:>12.1f} ms')
+
+    # The single workbook is always written by one process
+    latencies = time_calls(lambda i: build_project_report(project_id, io.BytesIO(), 'xlsx'), 1)
+    print(f'{"project xlsx":<28}{latencies[0]:>12.1f} ms')
+
+    for num_workers in args.workers:
+        with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+
+            # Start every worker before timing, as the pool is kept running by the app
+            list(pool.map(abs, range(num_workers)))
+            latencies = time_calls(lambda i: build_project_report(project_id, io.BytesIO(), 'zip', pool,
+                num_workers), 1)
+
+        label = f'project zip, {num_workers} workers'
+        print(f'{label:<28}{latencies[0]:>12.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""Times the hot routes against a large generated database and writes the results as JSON, so that
+the results of one commit can be compared against another's.
+
+Each route is timed over a number of requests, counting the SQL statements and commits it sends,
+then run once more under tracemalloc to find its peak memory. A report request is timed until
+its report has finished building in the background.
+
+Usage: python -m benchmarks.routes [--projects 2] [--jobs 3] [--groups 5] [--channels 500]
+           [--testpoints 5] [--iterations 50] [--report-iterations 3] [--output FILE]
+           [--compare BASELINE] [--threshold 1.25]
+"""
+import argparse, contextlib, io, json, platform, subprocess, sys, tracemalloc
+from datetime import datetime, timedelta
+from app.generator import generate_test_data
+from benchmarks.common import *
+from time import sleep
+
+# The results compared against a baseline, where a larger value is worse
+COMPARED_RESULTS = ['mean_ms', 'p95_ms', 'statements_per_request', 'peak_memory_kb']
+
+
+class RouteBenchmarkConfig(BenchmarkConfig):
+    TMP_DIRECTORY = tempfile.mkdtemp() + '/'
+
+
+# Returns the commit being benchmarked, or None outside of a git checkout
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Times a request over a number of iterations, then runs it once more to find its peak memory
+# Note: The route's own output is swallowed so that it doesn't bury the results
+def run_route(request, num_iterations):
+
+    with contextlib.redirect_stdout(io.StringIO()):
+
+        # Warm up the route's templates and queries before timing it
+        request(0)
+
+        with StatementCounter(db.engine) as counter:
+            latencies = time_calls(request, num_iterations)
+
+        tracemalloc.start()
+        try:
+            request(num_iterations)
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    summary = latency_summary(latencies)
+    summary['statements_per_request'] = round(counter.statements / num_iterations, 2)
+    summary['commits_per_request'] = round(counter.commits / num_iterations, 2)
+    summary['peak_memory_kb'] = round(peak / 1024, 1)
+    return summary
+
+
+# Compares the results against a baseline, returning each result that has grown by more than the threshold
+def compare_results(results, baseline, threshold):
+
+    regressions = []
+    for route, summary in results.items():
+        for name in COMPARED_RESULTS:
+            before = baseline.get('results', {}).get(route, {}).get(name)
+            after = summary.get(name)
+            if before and after is not None and after / before > threshold:
+                regressions.append((route, name, before, after))
+
+    return regressions
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--projects', type=int, default=2)
+    parser.add_argument('--jobs', type=int, default=3)
+    parser.add_argument('--groups', type=int, default=5)
+    parser.add_argument('--channels', type=int, default=500)
+    parser.add_argument('--testpoints', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--report-iterations', type=int, default=3)
+    parser.add_argument('--output', help='The JSON file to write, by default routes-<commit>.json')
+    parser.add_argument('--compare', help='A JSON file written by an earlier run to compare against')
+    parser.add_argument('--threshold', type=float, default=1.25,
+        help='How many times worse than the baseline a result must be to count as a regression')
+    args = parser.parse_args()
+
+    app = create_benchmark_app(RouteBenchmarkConfig)
+    client = logged_in_client(app)
+    with contextlib.redirect_stdout(io.StringIO()):
+        counts = generate_test_data(args.projects, args.jobs, args.groups, args.channels, args.testpoints, seed=0)
+
+    # Drive every route on the first Group of the first Job
+    group = Group.query.order_by(Group.id).first()
+    group_id, job_id = group.id, group.job_id
+    testpoints = db.session.query(TestPoint.id, TestPoint.channel_id, TestPoint.nominal_test_value) \
+        .join(Channel).filter(Channel.group_id == group_id).order_by(TestPoint.id).all()
+    channel_ids = sorted({channel_id for testpoint_id, channel_id, nominal_test_value in testpoints})
+    cursor = str(datetime.utcnow() - timedelta(minutes=5))
+    db.session.remove()
+
+    def post(url, **kwargs):
+        response = client.post(url, **kwargs)
+        assert response.status_code in [200, 202], (url, response.status_code, response.data[:200])
+        return response
+
+    def get(url):
+        response = client.get(url)
+        assert response.status_code == 200, (url, response.status_code)
+        return response
+
+    # Saves a measurement that passes or fails on alternate requests
+    def save_measurement(i):
+        testpoint_id, channel_id, nominal_test_value = testpoints[i % len(testpoints)]
+        post('/update_testpoint', data={'testpoint_id': testpoint_id, 'channel_id': channel_id,
+            'measured_test_value': nominal_test_value + (0.001 if i % 2 == 0 else 1000)})
+
+    # Requests a report of the Job's latest data and waits for it to be built
+    # Note: A measurement is saved first so that each request builds a new report rather than reusing the last one
+    def build_report(i):
+        save_measurement(i)
+        report = post(f'/generate_channel_report/{job_id}').get_json()
+        while report['status'] not in [ReportStatus.DONE.value, ReportStatus.FAILED.value]:
+            sleep(0.01)
+            report = get(report['status_url']).get_json()
+        assert report['status'] == ReportStatus.DONE.value, report
+
+    routes = [
+        ('channels', lambda i: get(f'/group/{group_id}/channels?page=1'), args.iterations),
+        ('update_testpoint', save_measurement, args.iterations),
+        ('update_channel', lambda i: post('/update_channel', data={
+            'channel_id': channel_ids[i % len(channel_ids)], 'notes': f'Benchmark note {i}'}), args.iterations),
+        ('projects', lambda i: get('/projects'), args.iterations),
+        ('get_updated_group_data', lambda i: post('/get_updated_group_data', data={
+            'group_id': group_id, 'cursor': cursor}), args.iterations),
+        ('generate_channel_report', build_report, args.report_iterations)
+    ]
+
+    results = {}
+    for route, request, num_iterations in routes:
+        results[route] = run_route(request, num_iterations)
+        db.session.remove()
+
+    output = {
+        'benchmark': 'routes',
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'database': db.engine.dialect.name,
+        'parameters': vars(args),
+        'data': counts,
+        'results': results
+    }
+    path = args.output or f'routes-{(output["commit"] or "unknown")[:10]}.json'
+    with open(path, 'w') as file:
+        json.dump(output, file, indent=2)
+
+    print(f'{counts["channels"]} channels with {counts["testpoints"]} testpoints, '
+        f'{args.channels} channels in the benchmarked group')
+    columns = [('mean_ms', 'mean ms'), ('p50_ms', 'p50 ms'), ('p95_ms', 'p95 ms'), ('max_ms', 'max ms'),
+        ('statements_per_request', 'statements'), ('peak_memory_kb', 'peak kb')]
+    print(f'{"":>24}' + ''.join(f'{label:>12}' for column, label in columns))
+    for route, summary in results.items():
+        print(f'{route:>24}' + ''.join(f'{summary[column]:>12}' for column, label in columns))
+    print(f'Wrote the results to {path}')
+
+    # Fail the run if any result has regressed against the baseline
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare_results(results, baseline, args.threshold)
+        for route, name, before, after in regressions:
+            print(f'Regression: {route} {name} went from {before} to {after}')
+        if len(regressions) > 0:
+            sys.exit(1)
+        print(f'No regressions against {baseline.get("commit") or args.compare}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Compares the commits and latency of a single TestPoint save before and after the
+single-transaction status rollup, and with the coalesced rollup worker.
+
+Usage: python -m benchmarks.status_rollup [--channels 5000] [--testpoints 5] [--requests 50]
+"""
+import argparse
+from app.rollups import rollup_worker
+from benchmarks.common import *
+
+
+# The status rollup as it was before the unit-of-work change, where each level rescanned
+# its children and committed on its own
+def legacy_update_each_parent_status(self, timestamp):
+
+    self.update_status()
+    db.session.commit()
+    self.group.update_status()
+    db.session.commit()
+    self.group.job.update_status()
+    db.session.commit()
+    self.group.job.project.update_status()
+    db.session.commit()
+
+    self.group.last_updated = timestamp
+    self.group.job.last_updated = timestamp
+
+
+# Saves a measurement on a different TestPoint for each request
+def run_requests(client, testpoints, num_requests):
+
+    def save_measurement(i):
+        testpoint_id, channel_id = testpoints[i % len(testpoints)]
+        response = client.post('/update_testpoint', data={
+            'testpoint_id': testpoint_id,
+            'channel_id': channel_id,
+            'measured_test_value': 50.1
+        })
+        assert response.status_code == 200, response.data
+
+    with StatementCounter(db.engine) as counter:
+        latencies = time_calls(save_measurement, num_requests)
+
+    summary = latency_summary(latencies)
+    summary['commits_per_request'] = round(counter.commits / num_requests, 2)
+    summary['statements_per_request'] = round(counter.statements / num_requests, 2)
+    return summary
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=5000)
+    parser.add_argument('--testpoints', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    client = logged_in_client(app)
+    group = seed_group(args.channels, args.testpoints)
+    testpoints = db.session.query(TestPoint.id, TestPoint.channel_id).limit(args.requests).all()
+    db.session.remove()
+
+    # Run the legacy rollup first, then the current single-transaction rollup
+    current_update_each_parent_status = Channel.update_each_parent_status
+    Channel.update_each_parent_status = legacy_update_each_parent_status
+    try:
+        before = run_requests(client, testpoints, args.requests)
+    finally:
+        Channel.update_each_parent_status = current_update_each_parent_status
+    after = run_requests(client, testpoints, args.requests)
+
+    # Leave the parents to the coalesced worker, then time the flush that rolls them all up at once
+    rollup_worker.coalesced = True
+    try:
+        coalesced = run_requests(client, testpoints, args.requests)
+        flush_latency = time_calls(lambda i: rollup_worker.flush(), 1)[0]
+    finally:
+        rollup_worker.coalesced = False
+
+    print(f'update_testpoint on a {args.channels}-channel group ({args.requests} requests)')
+    print(f'{"":>24}{"before":>12}{"after":>12}{"coalesced":>12}')
+    for key in before:
+        print(f'{key:>24}{before[key]:>12}{after[key]:>12}{coalesced[key]:>12}')
+    print(f'{"flush_ms":>24}{"":>12}{"":>12}{round(flush_latency, 3):>12}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""Compares calculating the limits of every TestPoint one object at a time against the batch
+calculation, in both pure Python and NumPy (when it is installed).
+
+Usage: python -m benchmarks.testpoint_limits [--channels 5000] [--testpoints 5] [--iterations 5]
+"""
+import argparse
+import app.utils
+from benchmarks.common import *
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=5000)
+    parser.add_argument('--testpoints', type=int, default=5)
+    parser.add_argument('--iterations', type=int, default=5)
+    args = parser.parse_args()
+
+    create_benchmark_app()
+    group = seed_group(args.channels, args.testpoints)
+
+    # Measure half of the TestPoints so that both branches of each result are taken
+    testpoints = TestPoint.query.join(Channel).filter(Channel.group_id == group.id).all()
+    for i, testpoint in enumerate(testpoints):
+        if i % 2 == 0:
+            testpoint.measured_test_value = testpoint.nominal_test_value + (0.4 if i % 4 == 0 else 0.6)
+    db.session.commit()
+
+    # Read every value the calculations need before timing, so that only the calculations are compared
+    columns = (
+        [testpoint.channel.error_type for testpoint in testpoints],
+        [testpoint.channel.max_error for testpoint in testpoints],
+        [testpoint.channel.full_scale_range for testpoint in testpoints],
+        [testpoint.nominal_test_value for testpoint in testpoints],
+        [testpoint.measured_test_value for testpoint in testpoints]
+    )
+
+    print(f'Calculating the limits of {len(testpoints)} testpoints')
+
+    def per_object(i):
+        for testpoint in testpoints:
+            testpoint.lower_limit()
+            testpoint.upper_limit()
+
+    def pure_python(i):
+        numpy = app.utils.numpy
+        app.utils.numpy = None
+        try:
+            calc_testpoint_limits(*columns)
+        finally:
+            app.utils.numpy = numpy
+
+    runs = [('per object methods', per_object), ('batch, pure python', pure_python)]
+    if app.utils.numpy is not None:
+        runs.append(('batch, numpy', lambda i: numpy_testpoint_limits(*columns)))
+
+    for label, f in runs:
+        summary = latency_summary(time_calls(f, args.iterations))
+        print(f'{label:<24}{summary["mean_ms"]:>12.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
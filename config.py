@@ -35,6 +35,53 @@ class Config(object):
     # Pre-emptive Pagination Setup
     ITEMS_PER_PAGE = 3
 
+    # Change Feed Setup
+    # - Each poll looks back this many seconds before its cursor to catch changes committed late
+    CHANGE_FEED_OVERLAP_SECONDS = 2
+
+    # Live Update Setup
+    # - 'memory' shares the group events within one process, so it only works when the app is served by a single
+    #   worker process, 'database' shares them between every worker and must be used when there's more than one
+    EVENT_BACKEND = os.environ.get('EVENT_BACKEND') or 'memory'
+    EVENT_POLL_INTERVAL_SECONDS = 0.5
+    EVENT_RETENTION_SECONDS = 60
+    # - How far back each poll re-reads the events, to catch those committed after an event with a higher id
+    EVENT_OVERLAP_SECONDS = 5
+    EVENT_HEARTBEAT_SECONDS = 15
+    # - Each event stream holds a worker thread, so a stream is closed after this long for the browser to reconnect
+    #   and no more than EVENT_MAX_SUBSCRIBERS are held open by a process, leaving its other threads for requests
+    # - The pages beyond the limit poll for their changes instead
+    EVENT_STREAM_MAX_SECONDS = 300
+    EVENT_MAX_SUBSCRIBERS = int(os.environ.get('EVENT_MAX_SUBSCRIBERS') or 8)
+
+    # Measurement Setup
+    # - The most TestPoints that can be updated by a single batch request
+    TESTPOINT_BATCH_MAX_SIZE = 5000
+
+    # Status Rollup Setup
+    # - 'immediate' rolls each TestPoint write up through its Group, Job and Project as it is saved,
+    #   'coalesced' leaves it to a background worker that rolls up every changed Group together
+    STATUS_ROLLUP = os.environ.get('STATUS_ROLLUP') or 'immediate'
+    # - The coalesced worker rolls the changed Groups up at most once in this many seconds
+    STATUS_ROLLUP_INTERVAL_SECONDS = 1
+
+    # Dashboard Setup
+    # - The counts and recent activity shown on the index page are reused for this many seconds
+    DASHBOARD_CACHE_SECONDS = 10
+
+    # Report Setup
+    # - Reports are built in the background by a pool of either 'thread' or 'process' workers
+    REPORT_EXECUTOR = os.environ.get('REPORT_EXECUTOR') or 'thread'
+    REPORT_WORKERS = int(os.environ.get('REPORT_WORKERS') or 2)
+    # - The workbooks of a project's zip report are built in parallel by this many processes
+    REPORT_SHEET_WORKERS = int(os.environ.get('REPORT_SHEET_WORKERS') or 2)
+    # - A report still unfinished after this many seconds is assumed lost and is queued again
+    REPORT_TIMEOUT_SECONDS = 600
+    # - Built reports are cached until they total this many bytes, removing the least recently used first
+    REPORT_CACHE_MAX_BYTES = 200 * 1024 * 1024
+    # - Built reports are also removed once they have gone unused for this many seconds
+    REPORT_CACHE_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
     # File Directories
     if basedir == '/app':
         # Removes the additional '/app' from the basedir on Heroku
@@ -1,11 +1,28 @@
 #!/usr/bin/env python
-from app.main.routes import test_equipment
 import unittest
 from app import create_app, db
-from app.models import *
-from app.utils import *
+from app.models import ApprovalRecord, CalibrationRecord, Channel, ChannelEquipmentRecord, Company, Group, \
+    GroupEvent, Job, Project, Report, TestEquipment, TestEquipmentType, TestPoint, User
+from app.utils import CompanyCategory, EngUnits, ErrorType, JobPhase, ReportStatus, Status, TestPointListType, \
+    TestResult, bulk_add_channels, bulk_channel_progress, calc_percent, calc_testpoint_limits, \
+    calc_testpoint_values, channel_progress, channel_stats, channel_views, check_status_counters, counter_stats, \
+    evaluate_measurement, float_or_none, group_changes, init_test_db, none_if_empty, number_list_choices, \
+    numpy_testpoint_limits, progress_summaries, rebuild_status_counters, unit_of_work
 from config import Config
-from datetime import datetime
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from flask import json
+from app.events import EventHub, hub
+from app.rollups import rollup_worker
+from app.dashboard import PENDING_INVALIDATION, dashboard_cache
+from app.generator import generate_test_data
+from app.reports import XLSX_MIMETYPE, ZIP_MIMETYPE, build_job_report, build_project_report, get_sheet_pool, \
+    job_data_version, report_queue
+from app.exports import CSV_MIMETYPE, EXPORT_COLUMNS, PARQUET_MIMETYPE, parquet_available, pyarrow
+from app.imports import ChannelImport, IMPORT_COLUMNS, read_import_rows
+import app.imports, app.utils
+from app import cli
+import csv, io, openpyxl, os, queue, shutil, tempfile, zipfile
 
 class TestConfig(Config):
     TESTING = True
@@ -305,6 +322,65 @@ class TestPointModel(unittest.TestCase):
         self.assertEqual(t.upper_limit(), 17)
         self.assertEqual(t.lower_limit(), 14)
 
+    def test_calc_testpoint_limits(self):
+        c1 = Channel(error_type=ErrorType.ENG_UNITS.value, max_error=1.5)
+        c2 = Channel(error_type=ErrorType.PERCENT_FULL_SCALE.value, max_error=0.05, full_scale_range=250)
+        c3 = Channel(error_type=ErrorType.PERCENT_READING.value, max_error=0.1)
+        t1 = TestPoint(nominal_test_value=15.5, measured_test_value=16)
+        t2 = TestPoint(nominal_test_value=100, measured_test_value=100.5)
+        t3 = TestPoint(nominal_test_value=15)
+        t4 = TestPoint(nominal_test_value=15, measured_test_value=15.01)
+        db.session.add_all([c1, c2, c3, t1, t2, t3, t4])
+        c1.add_testpoint(t1)
+        c2.add_testpoint(t2)
+        c3.add_testpoint(t3)
+        c3.add_testpoint(t4)
+        db.session.commit()
+
+        testpoints = [t1, t2, t3, t4]
+        limits = calc_testpoint_limits(
+            [t.channel.error_type for t in testpoints], [t.channel.max_error for t in testpoints],
+            [t.channel.full_scale_range for t in testpoints], [t.nominal_test_value for t in testpoints],
+            [t.measured_test_value for t in testpoints])
+
+        # Check the batch matches each TestPoint's own calculations
+        self.assertEqual(limits["max_error"], [t.calc_max_error() for t in testpoints])
+        self.assertEqual(limits["lower_limit"], [t.lower_limit() for t in testpoints])
+        self.assertEqual(limits["upper_limit"], [t.upper_limit() for t in testpoints])
+        # Note: The error is the reading less the nominal value, the same as the measured error
+        self.assertEqual(limits["error"], [-t1.calc_error(), -t2.calc_error(), None, -t4.calc_error()])
+        self.assertEqual(limits["result"], [TestResult.PASS.value, TestResult.FAIL.value,
+            TestResult.UNTESTED.value, TestResult.PASS.value])
+
+        # Check anything missing a value is returned as None rather than raising an error
+        limits = calc_testpoint_limits([ErrorType.PERCENT_FULL_SCALE.value, ErrorType.ENG_UNITS.value],
+            [0.05, None], [None, None], [10, 10], [10, 10])
+        self.assertEqual(limits["lower_limit"], [None, None])
+        self.assertEqual(limits["error"], [0, 0])
+        self.assertEqual(limits["result"], [TestResult.UNTESTED.value] * 2)
+
+    @unittest.skipUnless(app.utils.numpy, 'NumPy is not installed')
+    def test_numpy_testpoint_limits(self):
+        error_types = [ErrorType.ENG_UNITS.value, ErrorType.PERCENT_FULL_SCALE.value,
+            ErrorType.PERCENT_READING.value, ErrorType.PERCENT_READING.value, ErrorType.PERCENT_FULL_SCALE.value]
+        max_errors = [1.5, 0.05, 0.1, 0.1, 0.05]
+        full_scale_ranges = [None, 250, None, None, None]
+        nominal_test_values = [15.5, 100, 15, 15, 10]
+        measured_test_values = [16, 100.5, None, 15.01, 10]
+
+        # Check the NumPy version matches the pure Python version, including the None values
+        limits = calc_testpoint_limits(error_types, max_errors, full_scale_ranges, nominal_test_values,
+            measured_test_values)
+        numpy_limits = numpy_testpoint_limits(error_types, max_errors, full_scale_ranges, nominal_test_values,
+            measured_test_values)
+        self.assertEqual(numpy_limits["result"], limits["result"])
+        for key in ["max_error", "lower_limit", "upper_limit", "error"]:
+            for value, numpy_value in zip(limits[key], numpy_limits[key]):
+                if value is None:
+                    self.assertIsNone(numpy_value)
+                else:
+                    self.assertAlmostEqual(value, numpy_value)
+
 
 class ChannelModel(unittest.TestCase):
 
@@ -554,9 +630,70 @@ class ChannelModel(unittest.TestCase):
         self.assertEqual(progress["percent_passed"], 50)
         self.assertEqual(progress["percent_failed"], 25)
 
+    def test_record_testpoint_result(self):
+        c = Channel()
+        t1 = TestPoint()
+        t2 = TestPoint()
+        db.session.add_all([c, t1, t2])
+        db.session.commit()
+
+        # Check that adding TestPoints increments the untested counter
+        c.add_testpoint(t1)
+        c.add_testpoint(t2)
+        db.session.commit()
+        self.assertEqual(c.num_untested, 2)
+
+        # Check that a change in result moves the TestPoint between counters
+        t1.test_result = TestResult.PASS.value
+        c.record_testpoint_result(TestResult.UNTESTED.value, TestResult.PASS.value)
+        db.session.commit()
+        self.assertEqual(c.num_untested, 1)
+        self.assertEqual(c.num_passed, 1)
+
+        # Check that removing a TestPoint decrements its counter
+        c.remove_testpoint(t1)
+        db.session.commit()
+        self.assertEqual(c.num_untested, 1)
+        self.assertEqual(c.num_passed, 0)
+
     def test_update_each_parent_status(self):
-        
-        pass
+        p = Project()
+        j = Job(project_id=1)
+        g = Group(job_id=1)
+        c1 = Channel(group_id=1)
+        c2 = Channel(group_id=1)
+        db.session.add_all([p, j, g, c1, c2])
+        db.session.commit()
+
+        # Add the new Channels and their TestPoints to the status counters
+        for c in [c1, c2]:
+            c.add_testpoint(TestPoint())
+            c.add_testpoint(TestPoint())
+            g.record_channel_status(None, c.status)
+        db.session.commit()
+        self.assertEqual(g.num_untested, 2)
+        self.assertEqual(p.status, Status.NOT_STARTED.value)
+
+        # Check that a passed TestPoint moves each parent into progress
+        c1.record_testpoint_result(TestResult.UNTESTED.value, TestResult.PASS.value)
+        c1.update_each_parent_status(datetime.utcnow())
+        db.session.commit()
+        self.assertEqual(c1.status, Status.IN_PROGRESS.value)
+        for item in [g, j, p]:
+            self.assertEqual(item.num_untested, 1)
+            self.assertEqual(item.num_in_progress, 1)
+            self.assertEqual(item.status, Status.IN_PROGRESS.value)
+
+        # Check that passing every TestPoint completes each parent
+        c1.record_testpoint_result(TestResult.UNTESTED.value, TestResult.PASS.value)
+        c1.update_each_parent_status(datetime.utcnow())
+        c2.record_testpoint_result(TestResult.UNTESTED.value, TestResult.PASS.value)
+        c2.record_testpoint_result(TestResult.UNTESTED.value, TestResult.PASS.value)
+        c2.update_each_parent_status(datetime.utcnow())
+        db.session.commit()
+        for item in [g, j, p]:
+            self.assertEqual(item.num_passed, 2)
+            self.assertEqual(item.status, Status.COMPLETE.value)
 
     def test_update_test_equipment_type(self):
         c = Channel()
@@ -792,6 +929,36 @@ class GroupModel(unittest.TestCase):
         # Check that the new status is COMPLETE
         g.update_status()
         self.assertEqual(g.status, Status.COMPLETE.value)
+        self.assertEqual(g.num_passed, 5)
+
+    def test_record_channel_status(self):
+        p = Project()
+        j = Job(project_id=1)
+        g = Group(job_id=1)
+        db.session.add_all([p, j, g])
+        db.session.commit()
+
+        # Check that a new Channel is added to the counters of each parent
+        g.record_channel_status(None, TestResult.PASS.value)
+        db.session.commit()
+        for item in [g, j, p]:
+            self.assertEqual(item.num_passed, 1)
+            self.assertEqual(item.status, Status.COMPLETE.value)
+
+        # Check that a change in status moves the Channel between counters
+        g.record_channel_status(TestResult.PASS.value, TestResult.FAIL.value)
+        db.session.commit()
+        for item in [g, j, p]:
+            self.assertEqual(item.num_passed, 0)
+            self.assertEqual(item.num_failed, 1)
+            self.assertEqual(item.status, Status.IN_PROGRESS.value)
+
+        # Check that a removed Channel is taken out of the counters
+        g.record_channel_status(TestResult.FAIL.value, None)
+        db.session.commit()
+        for item in [g, j, p]:
+            self.assertEqual(item.num_failed, 0)
+            self.assertEqual(item.status, Status.NOT_STARTED.value)
 
 
 class JobModel(unittest.TestCase):
@@ -817,7 +984,7 @@ class JobModel(unittest.TestCase):
         db.session.commit()
 
         # Check for the list of Channels under the job if no Channels are added
-        self.assertEqual(j.channels(), [])
+        self.assertEqual(j.channels().all(), [])
 
         # Add some Channels into the Job's Groups
         c1 = Channel(group_id=1)
@@ -827,7 +994,11 @@ class JobModel(unittest.TestCase):
         db.session.commit()
 
         # Check for the total list of Channels under the Job
-        self.assertEqual(j.channels(), [c1, c2, c3])
+        self.assertEqual(j.channels().all(), [c1, c2, c3])
+
+        # Check that the Channels can be filtered and counted within the database
+        self.assertEqual(j.channels().filter(Group.id == 2).all(), [c3])
+        self.assertEqual(j.channels().count(), 3)
 
     def test_num_channels(self):
         j = Job()
@@ -1009,7 +1180,7 @@ class ProjectModel(unittest.TestCase):
         db.session.commit()
 
         # Check for the list of Channels under the Project if no Channels are added
-        self.assertEqual(p.channels(), [])
+        self.assertEqual(p.channels().all(), [])
 
         # Add some Channels into the Project's Job's Groups
         c1 = Channel(group_id=1)
@@ -1018,8 +1189,19 @@ class ProjectModel(unittest.TestCase):
         db.session.add_all([c1, c2, c3])
         db.session.commit()
 
-        # Check for the total list of Channels under the Job
-        self.assertEqual(p.channels(), [c1, c2, c3])
+        # Check for the total list of Channels under the Project
+        self.assertEqual(p.channels().all(), [c1, c2, c3])
+
+        # Check that the Channels are found with a single statement
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            self.assertEqual(p.channels().filter(Channel.id != c2.id).all(), [c1, c3])
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(len(statements), 1)
 
     def test_num_channels(self):
         p = Project()
@@ -1246,6 +1428,9 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(stats[TestResult.FAIL.value], 1)
         self.assertEqual(stats[Status.IN_PROGRESS.value], 2)
 
+        # Check that a query of the Channels is tallied the same way
+        self.assertEqual(channel_stats(Channel.query.order_by('name')), stats)
+
     def test_channel_progress(self):
         g = Group()
         db.session.add(g)
@@ -1274,11 +1459,317 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(progress["percent_failed"], 20)
         self.assertEqual(progress["percent_in_progress"], 20)
 
+    def test_rebuild_status_counters(self):
+        p = Project()
+        j = Job(project_id=1)
+        g1 = Group(job_id=1)
+        g2 = Group(job_id=1)
+        c1 = Channel(group_id=1)
+        c2 = Channel(group_id=2)
+        t1 = TestPoint(channel_id=1, test_result=TestResult.PASS.value)
+        t2 = TestPoint(channel_id=1, test_result=TestResult.PASS.value)
+        t3 = TestPoint(channel_id=2, test_result=TestResult.FAIL.value)
+        t4 = TestPoint(channel_id=2, test_result=TestResult.UNTESTED.value)
+        db.session.add_all([p, j, g1, g2, c1, c2, t1, t2, t3, t4])
+        db.session.commit()
+
+        # Rebuild the counters from the TestPoints added without the counters
+        self.assertEqual(rebuild_status_counters(), 6)
+
+        # Check the Channel counters and status
+        self.assertEqual(c1.num_passed, 2)
+        self.assertEqual(c1.status, TestResult.PASS.value)
+        self.assertEqual(c2.num_failed, 1)
+        self.assertEqual(c2.num_untested, 1)
+        self.assertEqual(c2.status, TestResult.FAIL.value)
+
+        # Check the counters and status rolled up through each parent
+        self.assertEqual(g1.status, Status.COMPLETE.value)
+        self.assertEqual(g2.num_failed, 1)
+        self.assertEqual(g2.status, Status.IN_PROGRESS.value)
+        for item in [j, p]:
+            self.assertEqual(item.num_passed, 1)
+            self.assertEqual(item.num_failed, 1)
+            self.assertEqual(item.status, Status.IN_PROGRESS.value)
+            self.assertEqual(item.num_testpoints, 4)
+        self.assertEqual(g1.num_testpoints, 2)
+
+    def test_check_status_counters(self):
+        p = Project()
+        j = Job(project_id=1)
+        g = Group(job_id=1)
+        c = Channel(group_id=1)
+        t = TestPoint(channel_id=1, test_result=TestResult.PASS.value)
+        db.session.add_all([p, j, g, c, t])
+        db.session.commit()
+
+        # Check the counters of items added without them are found to be out of date
+        differences = check_status_counters()
+        self.assertIn((c, 'num_passed', 0, 1), differences)
+        self.assertIn((p, 'num_testpoints', 0, 1), differences)
+        self.assertIn((g, 'status', Status.NOT_STARTED.value, Status.COMPLETE.value), differences)
+
+        # Check there are no differences once the counters are rebuilt
+        rebuild_status_counters()
+        self.assertEqual(check_status_counters(), [])
+
+        # Check the command reports the differences
+        c.num_passed = 0
+        db.session.commit()
+        cli.register(self.app)
+        result = self.app.test_cli_runner().invoke(args=['status', 'check'])
+        self.assertEqual(result.exit_code, 1)
+        self.assertIn('num_passed 0, expected 1', result.output)
+
+    def test_counters_increment_in_sql(self):
+        p = Project()
+        j = Job(project_id=1)
+        g = Group(job_id=1)
+        c = Channel(group_id=1)
+        db.session.add_all([p, j, g, c])
+        db.session.commit()
+        rebuild_status_counters()
+        t = TestPoint()
+        c.add_testpoint(t)
+        db.session.commit()
+
+        # Another request adds a Channel with a TestPoint to the Group after this one has read the counters
+        self.assertEqual((g.num_untested, g.num_testpoints), (1, 1))
+        db.session.execute(Group.__table__.update().values(num_untested=2, num_testpoints=2))
+
+        # Check the counters are incremented by the database rather than written back
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            t.test_result = TestResult.FAIL.value
+            c.record_testpoint_result(TestResult.UNTESTED.value, TestResult.FAIL.value)
+            c.add_testpoint(TestPoint())
+            c.update_each_parent_status(datetime.utcnow())
+            db.session.commit()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertTrue(any('num_failed=(coalesce(channel.num_failed' in statement for statement in statements))
+        self.assertEqual((c.num_untested, c.num_failed), (1, 1))
+        self.assertEqual((g.num_testpoints, g.num_untested, g.num_failed), (3, 1, 1))
+
+    def test_progress_summaries(self):
+        p = Project()
+        j = Job(project_id=1)
+        g = Group(job_id=1)
+        c1 = Channel(group_id=1)
+        c2 = Channel(group_id=1)
+        db.session.add_all([p, j, g, c1, c2])
+        db.session.add_all([TestPoint(channel_id=1, test_result=TestResult.PASS.value) for i in range(2)])
+        db.session.add_all([TestPoint(channel_id=2) for i in range(3)])
+        db.session.commit()
+        rebuild_status_counters()
+
+        # Check the stored summaries match the summaries calculated from the Channels
+        for item in [g, j, p]:
+            summary = progress_summaries([item])[item.id]
+            live_summary = bulk_channel_progress([item])[item.id]
+            self.assertEqual(summary["stats"], live_summary["stats"])
+            self.assertEqual(summary["progress"], live_summary["progress"])
+            self.assertEqual(summary["num_channels"], 2)
+            self.assertEqual(summary["num_testpoints"], 5)
+
+    def test_unit_of_work(self):
+        c = Channel(name='Channel')
+        db.session.add(c)
+        db.session.commit()
+
+        @unit_of_work
+        def rename_channel(name):
+            c.name = name
+            return name
+
+        @unit_of_work
+        def rename_channel_with_error(name):
+            c.name = name
+            raise ValueError('Rename failed')
+
+        # Check that the changes are committed once the function has finished
+        self.assertEqual(rename_channel('Renamed'), 'Renamed')
+        self.assertEqual(db.session.query(Channel.name).scalar(), 'Renamed')
+
+        # Check that the changes are rolled back if the function raises an error
+        with self.assertRaises(ValueError):
+            rename_channel_with_error('Error')
+        self.assertEqual(db.session.query(Channel.name).scalar(), 'Renamed')
+
+    def test_bulk_channel_progress(self):
+        p1 = Project()
+        p2 = Project()
+        j1 = Job(project_id=1)
+        j2 = Job(project_id=2)
+        g1 = Group(job_id=1)
+        g2 = Group(job_id=1)
+        c1 = Channel(group_id=1, status=TestResult.PASS.value)
+        c2 = Channel(group_id=1, status=TestResult.FAIL.value)
+        c3 = Channel(group_id=2, status=TestResult.PASS.value)
+        c4 = Channel(group_id=2, status=Status.IN_PROGRESS.value)
+        db.session.add_all([p1, p2, j1, j2, g1, g2, c1, c2, c3, c4])
+        db.session.commit()
+
+        # Check the summaries of the Groups
+        summaries = bulk_channel_progress([g1, g2])
+        self.assertEqual(summaries[1]["stats"], g1.channel_stats())
+        self.assertEqual(summaries[1]["progress"], g1.channel_progress())
+        self.assertEqual(summaries[2]["num_channels"], 2)
+
+        # Check the summaries of the Jobs including one without any Channels
+        summaries = bulk_channel_progress([j1, j2])
+        self.assertEqual(summaries[1]["stats"], j1.channel_stats())
+        self.assertEqual(summaries[1]["num_channels"], 4)
+        self.assertEqual(summaries[2]["num_channels"], 0)
+        self.assertEqual(summaries[2]["progress"]["percent_untested"], 100)
+
+        # Check the summaries of the Projects
+        summaries = bulk_channel_progress([p1, p2])
+        self.assertEqual(summaries[1]["progress"], p1.channel_progress())
+        self.assertEqual(summaries[1]["progress"]["percent_passed"], 50)
+
+        # Check that an empty list has no summaries
+        self.assertEqual(bulk_channel_progress([]), {})
+
+    def test_channel_views(self):
+        u = User(username='michael')
+        tet1 = TestEquipmentType(name='Multimeter')
+        tet2 = TestEquipmentType(name='Calibrator')
+        te = TestEquipment(name='Multimeter')
+        c1 = Channel(name='Channel 1', max_error=0.5, error_type=ErrorType.ENG_UNITS.value)
+        c2 = Channel(name='Channel 2', max_error=1, error_type=ErrorType.ENG_UNITS.value)
+        t1 = TestPoint(nominal_injection_value=10, nominal_test_value=10, test_result=TestResult.PASS.value)
+        t2 = TestPoint(nominal_injection_value=0, nominal_test_value=0, test_result=TestResult.FAIL.value)
+        db.session.add_all([u, tet1, tet2, te, c1, c2, t1, t2])
+        db.session.commit()
+        c1.add_testpoint(t1)
+        c1.add_testpoint(t2)
+        c1.required_test_equipment.append(tet1)
+        c1.required_test_equipment.append(tet2)
+        r1 = ChannelEquipmentRecord(channel_id=c1.id, test_equipment_type_id=tet1.id, test_equipment_id=te.id)
+        r2 = ApprovalRecord(channel_id=c1.id, user_id=u.id, company_category=CompanyCategory.CLIENT.value)
+        db.session.add_all([r1, r2])
+        db.session.commit()
+
+        # Check the view of a Channel matches its own methods
+        v1, v2 = channel_views([c1, c2])
+        self.assertEqual([t["testpoint"] for t in v1["testpoints"]], [t2, t1])
+        self.assertEqual(v1["testpoints"][1]["upper_limit"], t1.upper_limit())
+        self.assertEqual(v1["progress"], c1.testpoint_progress())
+        self.assertEqual(v1["num_passed"], 1)
+        self.assertEqual(v1["num_testpoints"], 2)
+        self.assertEqual([e["test_equipment_type"] for e in v1["test_equipment"]], [tet2, tet1])
+        self.assertEqual(v1["test_equipment"][1]["current_test_equipment"], te)
+        self.assertEqual(v1["client_approval_record"], c1.client_approval_record())
+        self.assertEqual(v1["supplier_approval_record"], None)
+
+        # Check the view of a Channel without any TestPoints
+        self.assertEqual(v2["testpoints"], [])
+        self.assertEqual(v2["progress"], c2.testpoint_progress())
+
+        # Check that an empty list has no views
+        self.assertEqual(channel_views([]), [])
+
+    def test_calc_testpoint_values(self):
+
+        # Check a standard list is spread evenly over both ranges
+        values = calc_testpoint_values(3, TestPointListType.STANDARD.value, 4, 20, 0, 100)
+        self.assertEqual(values, [(4, 0), (12, 50), (20, 100)])
+
+        # Check a custom list uses the values entered by the user
+        values = calc_testpoint_values(2, TestPointListType.CUSTOM.value, 4, 20, 0, 100, [5, 6], [10, 20])
+        self.assertEqual(values, [(5, 10), (6, 20)])
+
+    def test_bulk_add_channels(self):
+        p = Project()
+        j = Job(project_id=1, phase=JobPhase.ATP.value)
+        g = Group(job_id=1)
+        tet1 = TestEquipmentType(name='Multimeter')
+        tet2 = TestEquipmentType(name='Calibrator')
+        db.session.add_all([p, j, g, tet1, tet2])
+        db.session.commit()
+
+        # Add a batch of Channels to the Group
+        channel_ids = bulk_add_channels(g, ['PT001', 'PT002', 'PT003'], dict(max_error=0.5,
+            error_type=ErrorType.ENG_UNITS.value), [(4, 0), (20, 100)], [tet1, tet2])
+        db.session.commit()
+
+        # Check the Channels and their TestPoints and required TestEquipmentTypes
+        self.assertEqual(len(channel_ids), 3)
+        c = Channel.query.get(channel_ids[0])
+        self.assertEqual(c.name, 'PT001')
+        self.assertEqual(c.max_error, 0.5)
+        self.assertTrue(c.required_client_approval)
+        self.assertEqual([t.nominal_test_value for t in c.testpoints.order_by('nominal_test_value')], [0, 100])
+        self.assertEqual(c.required_test_equipment.count(), 2)
+        self.assertEqual(TestPoint.query.count(), 6)
+
+        # Check the status counters match a full rescan of the Channels
+        self.assertEqual(c.num_untested, 2)
+        self.assertEqual(g.num_untested, 3)
+        self.assertEqual(p.num_untested, 3)
+        self.assertEqual(g.status, Status.NOT_STARTED.value)
+        c.update_status()
+        self.assertEqual(c.num_untested, 2)
+
+    def test_group_changes(self):
+        page_load = datetime(2021, 5, 1)
+        g1 = Group()
+        g2 = Group()
+        c1 = Channel(group_id=1, last_updated=datetime(2021, 4, 1))
+        c2 = Channel(group_id=1, last_updated=datetime(2021, 5, 2), num_passed=1, num_untested=1)
+        c3 = Channel(group_id=2, last_updated=datetime(2021, 5, 2))
+        t1 = TestPoint(channel_id=1, last_updated=datetime(2021, 5, 3), test_result=TestResult.PASS.value)
+        t2 = TestPoint(channel_id=1, last_updated=datetime(2021, 4, 1))
+        t3 = TestPoint(channel_id=3, last_updated=datetime(2021, 5, 3))
+        db.session.add_all([g1, g2, c1, c2, c3, t1, t2, t3])
+        db.session.commit()
+
+        # Check that only the changes to the Group since the page was loaded are found
+        changes = group_changes(g1.id, page_load)
+        self.assertEqual([c["channel_id"] for c in changes["channels"]], [c2.id])
+        self.assertEqual([t["testpoint_id"] for t in changes["testpoints"]], [t1.id])
+
+        # Check the payloads of the changes
+        self.assertEqual(changes["channels"][0]["num_testpoints"], 2)
+        self.assertEqual(changes["channels"][0]["progress"]["percent_passed"], 50)
+        self.assertEqual(changes["testpoints"][0]["test_result"], TestResult.PASS.value)
+
+        # Check that there are no changes after the latest update
+        changes = group_changes(g1.id, datetime(2021, 6, 1))
+        self.assertEqual(changes, {"channels": [], "testpoints": []})
+
     def test_none_if_empty(self):
         self.assertEqual(none_if_empty(""), None)
         self.assertEqual(none_if_empty("Test"), "Test")
         self.assertEqual(none_if_empty(4.223), 4.223)
 
+    def test_float_or_none(self):
+        self.assertEqual(float_or_none("1.5"), 1.5)
+        self.assertIsNone(float_or_none(""))
+        self.assertIsNone(float_or_none("NaN"))
+        self.assertRaises(ValueError, float_or_none, "Test")
+
+    def test_evaluate_measurement(self):
+        c1 = Channel(id=1, error_type=ErrorType.ENG_UNITS.value, max_error=0.5)
+        c2 = Channel(id=2, error_type=ErrorType.PERCENT_READING.value, max_error=1)
+
+        # Check the measured error and result against a fixed tolerance
+        self.assertEqual(evaluate_measurement(c1, 10, 10.25), (0.25, TestResult.PASS.value))
+        self.assertEqual(evaluate_measurement(c1, 10, 9.4), (-0.6, TestResult.FAIL.value))
+        self.assertEqual(evaluate_measurement(c1, 10, None), (None, TestResult.UNTESTED.value))
+
+        # Check a %RDG tolerance is taken from the measured value
+        self.assertEqual(evaluate_measurement(c2, 100, 101), (1, TestResult.PASS.value))
+        self.assertEqual(evaluate_measurement(c2, 100, 98.9), (-1.1, TestResult.FAIL.value))
+
+        # Check an edited Channel's tolerance isn't taken from the cache
+        c1.max_error = 0.1
+        self.assertEqual(evaluate_measurement(c1, 10, 10.25), (0.25, TestResult.FAIL.value))
+
     def test_calc_percent(self):
         self.assertEqual(calc_percent(3, 5), 60)
         self.assertEqual(calc_percent(0, 5), 0)
@@ -1290,5 +1781,1008 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(number_list_choices(1, 3, 3), [(1, '001'), (2, '002'), (3, '003')])
 
 
+class ChannelsPage(unittest.TestCase):
+
+    # Special method for enabling the Test Config
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        init_test_db()
+        self.client = self.app.test_client()
+        user = User.query.first()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+
+    # Special method for stopping the Test Config
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    # Adds Channels with a few TestPoints to a Group
+    def add_channels(self, group, num_channels):
+        for i in range(num_channels):
+            c = Channel(name=f'Channel {i}', group_id=group.id, max_error=0.1,
+                error_type=ErrorType.ENG_UNITS.value)
+            db.session.add(c)
+            db.session.commit()
+            c.build_testpoint_list(3, TestPointListType.CUSTOM.value, [0, 5, 10], [0, 50, 100])
+            c.required_test_equipment.append(TestEquipmentType.query.first())
+        db.session.commit()
+
+    def test_update_testpoint(self):
+        g = Group.query.first()
+        self.add_channels(g, 1)
+        t = TestPoint.query.first()
+        data = {'testpoint_id': t.id, 'channel_id': t.channel_id}
+
+        # Check the measured error and result are evaluated from the measured value
+        response = self.client.post('/update_testpoint', data=dict(data, measured_test_value='0.05'))
+        self.assertEqual(response.json['measured_error'], 0.05)
+        self.assertEqual(response.json['test_result'], TestResult.PASS.value)
+        self.assertEqual(response.json['num_passed'], 1)
+        self.assertEqual(response.json['status'], Status.IN_PROGRESS.value)
+        self.assertEqual(TestPoint.query.get(data['testpoint_id']).test_result, TestResult.PASS.value)
+
+        # Check only the changed fields are sent back
+        response = self.client.post('/update_testpoint', data=dict(data, measured_test_value='0.06'))
+        self.assertEqual(set(response.json), {'last_updated', 'measured_error'})
+        response = self.client.post('/update_testpoint', data=dict(data, measured_injection_value='0.5'))
+        self.assertEqual(set(response.json), {'last_updated'})
+
+        # Check a measurement outside the tolerance fails and clearing it leaves the TestPoint untested
+        response = self.client.post('/update_testpoint', data=dict(data, measured_test_value='0.2'))
+        self.assertEqual(response.json['test_result'], TestResult.FAIL.value)
+        response = self.client.post('/update_testpoint', data=dict(data, measured_test_value=''))
+        self.assertIsNone(response.json['measured_error'])
+        self.assertEqual(response.json['test_result'], TestResult.UNTESTED.value)
+        self.assertEqual(response.json['status'], TestResult.UNTESTED.value)
+
+        # Check the result can't be sent by the client
+        with self.assertRaises(ValueError):
+            self.client.post('/update_testpoint', data=dict(data, test_result=TestResult.PASS.value))
+
+    def test_update_testpoint_of_another_channel(self):
+        g = Group.query.first()
+        self.add_channels(g, 2)
+        rebuild_status_counters()
+        c1, c2 = Channel.query.order_by(Channel.id).all()
+        t = c1.testpoints.first()
+
+        # Check a TestPoint can't be updated through another Channel, leaving both Channels' counters alone
+        response = self.client.post('/update_testpoint',
+            data={'testpoint_id': t.id, 'channel_id': c2.id, 'measured_test_value': '0.05'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(check_status_counters(), [])
+        self.assertEqual(TestPoint.query.get(t.id).test_result, TestResult.UNTESTED.value)
+
+        # Check an unknown TestPoint isn't found
+        response = self.client.post('/update_testpoint',
+            data={'testpoint_id': 999, 'channel_id': c1.id, 'measured_test_value': '0.05'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_testpoint_counters(self):
+        g = Group.query.first()
+        self.add_channels(g, 2)
+
+        # Check adding Channels counts their TestPoints in each parent item
+        c1, c2 = Channel.query.order_by(Channel.id).all()
+        self.assertEqual([g.num_testpoints, g.job.num_testpoints, g.job.project.num_testpoints], [6, 6, 6])
+
+        # The helper adds the Channels without counting their status, so bring those counters up to date
+        rebuild_status_counters()
+
+        # Check deleting a TestPoint and then a whole Channel removes them from the counters
+        t = c1.testpoints.first()
+        self.client.post('/delete_testpoint', data={'channel_id': c1.id, 'testpoint_id': t.id})
+        self.assertEqual(Group.query.get(g.id).num_testpoints, 5)
+        self.client.post('/delete_channel', data={'channel_id': c2.id})
+        g = Group.query.get(g.id)
+        self.assertEqual([g.num_testpoints, g.job.num_testpoints, g.job.project.num_testpoints], [2, 2, 2])
+        self.assertEqual(check_status_counters(), [])
+
+    def test_update_testpoints(self):
+        g = Group.query.first()
+        self.add_channels(g, 2)
+        t1, t2, t3, t4, t5, t6 = TestPoint.query.order_by(TestPoint.id).all()
+
+        # Check a batch of readings is evaluated and rolled up to each Channel
+        response = self.client.post('/update_testpoints', json={'testpoints': [
+            {'testpoint_id': t1.id, 'measured_test_value': 0.05, 'measured_injection_value': 0.01},
+            {'testpoint_id': t2.id, 'measured_test_value': 50.5},
+            {'testpoint_id': t3.id, 'measured_test_value': 100},
+            {'testpoint_id': t4.id, 'measured_test_value': 0}
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(t['measured_error'], t['test_result']) for t in response.json['testpoints']], [
+            (0.05, TestResult.PASS.value), (0.5, TestResult.FAIL.value),
+            (0, TestResult.PASS.value), (0, TestResult.PASS.value)])
+        self.assertEqual(response.json['channels'], [
+            {'channel_id': t1.channel_id, 'status': TestResult.FAIL.value},
+            {'channel_id': t4.channel_id, 'status': Status.IN_PROGRESS.value}])
+        for c in Channel.query.all():
+            stats = c.testpoint_stats()
+            self.assertEqual({result: counter_stats(c)[result] for result in stats}, stats)
+        self.assertEqual(TestPoint.query.get(t1.id).measured_injection_value, 0.01)
+
+        # Check nothing is saved when any record is invalid
+        response = self.client.post('/update_testpoints', json={'testpoints': [
+            {'testpoint_id': t5.id, 'measured_test_value': 50},
+            {'testpoint_id': t6.id, 'test_result': TestResult.PASS.value},
+            {'testpoint_id': 999, 'measured_test_value': 1}
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json['errors']), 2)
+        self.assertEqual(TestPoint.query.get(t5.id).test_result, TestResult.UNTESTED.value)
+        self.assertEqual(self.client.post('/update_testpoints', data='Test').status_code, 400)
+
+    def test_update_testpoints_rollup(self):
+        g = Group.query.first()
+        self.add_channels(g, 20)
+        rebuild_status_counters()
+        testpoints = [(t.id, t.nominal_test_value) for t in TestPoint.query.order_by(TestPoint.id)]
+
+        # Pass every reading, changing the status of every Channel
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        db.session.remove()
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = self.client.post('/update_testpoints', json={'testpoints': [
+                {'testpoint_id': testpoint_id, 'measured_test_value': nominal_test_value}
+                for testpoint_id, nominal_test_value in testpoints]})
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({c['status'] for c in response.json['channels']}, {TestResult.PASS.value})
+
+        # Check the Group, Job and Project are each updated once for the whole batch rather than once for each Channel
+        for table in ['"group"', 'job', 'project']:
+            self.assertEqual(len([s for s in statements if s.startswith(f'UPDATE {table} ')]), 2)
+        # Note: Only the Channels' counters are incremented one Channel at a time
+        self.assertLess(len(statements), 20 + 20)
+        self.assertEqual(check_status_counters(), [])
+
+    # Counts the SQL statements executed while rendering a Group's Channels
+    def count_queries(self, group_id):
+        statements = []
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        db.session.remove()
+        event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            response = self.client.get(f'/group/{group_id}/channels')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(response.status_code, 200)
+        return len(statements)
+
+    def test_query_count(self):
+        g1, g2 = Group.query.order_by(Group.id).limit(2).all()
+        self.add_channels(g1, 2)
+        self.add_channels(g2, 10)
+        group_ids = [g1.id, g2.id]
+
+        # Check the number of queries doesn't grow with the number of Channels
+        self.assertEqual(self.count_queries(group_ids[0]), self.count_queries(group_ids[1]))
+
+    def test_pagination(self):
+        g = Group.query.first()
+        self.add_channels(g, 5)
+        per_page = self.app.config['ITEMS_PER_PAGE']
+
+        # Check that only the first page of Channels is rendered
+        response = self.client.get(f'/group/{g.id}/channels?page=1')
+        html = response.get_data(as_text=True)
+        self.assertEqual(html.count('id="channel-id-'), per_page)
+        self.assertIn(f'/group/{g.id}/channel_rows?page=2', html)
+
+        # Check that the rest of the Channels are lazy-loaded with unique form ids
+        response = self.client.get(f'/group/{g.id}/channel_rows?page=2').get_json()
+        self.assertEqual(response['num_channels'], 5)
+        self.assertEqual(response['html'].count('id="channel-id-'), 5 - per_page)
+        self.assertIn(f'channels-{per_page}-interface', response['html'])
+        self.assertEqual(response['next_url'], None)
+
+        # Check that every Channel is rendered without a page
+        html = self.client.get(f'/group/{g.id}/channels').get_data(as_text=True)
+        self.assertEqual(html.count('id="channel-id-'), 5)
+
+    def test_change_feed(self):
+        g = Group.query.first()
+        self.add_channels(g, 2)
+        page_load = datetime.utcnow() + timedelta(seconds=60)
+
+        # Check that the first poll continues from the page load and finds nothing new
+        response = self.client.post('/get_updated_group_data',
+            data={'group_id': g.id, 'page_load_timestamp': str(page_load)}).get_json()
+        self.assertEqual(response['channels'], [])
+        self.assertEqual(response['testpoints'], [])
+
+        # Update a TestPoint after the cursor
+        t = TestPoint.query.first()
+        t.measured_test_value = 0.05
+        t.last_updated = page_load + timedelta(seconds=60)
+        db.session.commit()
+
+        # Check that the next poll finds the TestPoint and returns a new cursor
+        response = self.client.post('/get_updated_group_data',
+            data={'group_id': g.id, 'cursor': str(page_load)}).get_json()
+        self.assertEqual([c['testpoint_id'] for c in response['testpoints']], [t.id])
+        self.assertEqual(response['testpoints'][0]['measured_test_value'], 0.05)
+        self.assertIn('cursor', response)
+
+        # Check that a malformed or missing cursor is rejected
+        response = self.client.post('/get_updated_group_data', data={'group_id': g.id, 'cursor': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/get_updated_group_data', data={'group_id': g.id})
+        self.assertEqual(response.status_code, 400)
+
+    def test_event_stream(self):
+        g = Group.query.first()
+        self.add_channels(g, 1)
+        t = TestPoint.query.first()
+        group_id, channel_id, testpoint_id = g.id, t.channel_id, t.id
+
+        # Open the Group's event stream
+        response = self.client.get(f'/group/{group_id}/events', buffered=False)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        stream = iter(response.response)
+        self.assertEqual(next(stream), b'retry: 3000\n\n')
+
+        # Check that updating a TestPoint streams the TestPoint and Channel changes
+        self.client.post('/update_testpoint', data={'testpoint_id': testpoint_id,
+            'channel_id': channel_id, 'measured_test_value': 0.01})
+        testpoint_event = json.loads(next(stream)[len(b'data: '):])
+        channel_event = json.loads(next(stream)[len(b'data: '):])
+        self.assertEqual(testpoint_event['type'], 'testpoint')
+        self.assertEqual(testpoint_event['data']['test_result'], TestResult.PASS.value)
+        self.assertEqual(channel_event['data']['num_passed'], 1)
+        response.close()
+
+    def test_event_stream_limits(self):
+        g = Group.query.first()
+        self.app.config['EVENT_STREAM_MAX_SECONDS'] = 0.1
+        self.app.config['EVENT_HEARTBEAT_SECONDS'] = 0.05
+
+        # Check that a stream ends once it has been open for its maximum time
+        response = self.client.get(f'/group/{g.id}/events', buffered=False)
+        messages = list(response.response)
+        self.assertEqual(messages[0], b'retry: 3000\n\n')
+        self.assertEqual(set(messages[1:]), {b': heartbeat\n\n'})
+        response.close()
+        self.assertEqual(hub.num_subscribers(), 0)
+
+        # Check that a stream beyond the most a process holds open is turned away for the page to poll instead
+        hub.max_subscribers = 1
+        self.app.config['EVENT_STREAM_MAX_SECONDS'] = 60
+        try:
+            response = self.client.get(f'/group/{g.id}/events', buffered=False)
+            self.assertEqual(next(iter(response.response)), b'retry: 3000\n\n')
+            self.assertEqual(self.client.get(f'/group/{g.id}/events').status_code, 204)
+            response.close()
+        finally:
+            hub.max_subscribers = self.app.config['EVENT_MAX_SUBSCRIBERS']
+
+    def test_dashboard(self):
+        g = Group.query.first()
+        self.add_channels(g, 2)
+        rebuild_status_counters()
+        c = Channel.query.order_by(Channel.id).first()
+        c.last_updated = datetime.utcnow() + timedelta(seconds=60)
+        db.session.commit()
+
+        # Check that the index page shows the counts and the most recently updated Channel first
+        response = self.client.get('/index')
+        self.assertEqual(response.status_code, 200)
+        summary = dashboard_cache.get()
+        self.assertEqual(summary['counts']['companies'], Company.query.count())
+        self.assertEqual(summary['counts']['channels'], 2)
+        self.assertEqual(summary['counts']['testpoints'], 6)
+        self.assertEqual(summary['recent_activity'][0]['channel_name'], c.name)
+        self.assertEqual(summary['recent_activity'][0]['group_id'], g.id)
+
+        # Check that the summary is reused until it is invalidated
+        db.session.add(Company(name='Uncounted'))
+        db.session.commit()
+        self.assertIs(dashboard_cache.get(), summary)
+
+        # Check that a rolled back invalidation is discarded, and a committed one clears the summary
+        dashboard_cache.invalidate()
+        db.session.rollback()
+        self.assertNotIn(PENDING_INVALIDATION, db.session.info)
+        summary = dashboard_cache.get()
+        db.session.add(Company(name='Counted'))
+        dashboard_cache.invalidate()
+        db.session.commit()
+        self.assertIsNot(dashboard_cache.get(), summary)
+        self.assertEqual(dashboard_cache.get()['counts']['companies'], Company.query.count())
+
+
+class CoalescedRollupTestConfig(TestConfig):
+    STATUS_ROLLUP = 'coalesced'
+
+    # Keep the background worker from rolling up during a test, leaving it to the test's flush
+    STATUS_ROLLUP_INTERVAL_SECONDS = 3600
+
+
+class CoalescedRollupCase(unittest.TestCase):
+
+    # Special method for enabling the Test Config
+    def setUp(self):
+        self.app = create_app(CoalescedRollupTestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        init_test_db()
+        self.client = self.app.test_client()
+        user = User.query.first()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+
+    # Special method for stopping the Test Config
+    def tearDown(self):
+        rollup_worker.dirty = {}
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_flush(self):
+        g = Group.query.first()
+        c = Channel(name='Channel 0', group_id=g.id, max_error=0.1, error_type=ErrorType.ENG_UNITS.value)
+        db.session.add(c)
+        db.session.commit()
+        c.build_testpoint_list(2, TestPointListType.CUSTOM.value, [0, 10], [0, 100])
+        db.session.commit()
+        rebuild_status_counters()
+        t1, t2 = c.testpoints.order_by(TestPoint.id).all()
+        group_id, channel_id = g.id, c.id
+
+        # Check a write only updates the Channel and leaves its Group dirty
+        for testpoint_id, value in [(t1.id, 0.05), (t2.id, 100)]:
+            self.client.post('/update_testpoint', data={'testpoint_id': testpoint_id, 'channel_id': channel_id,
+                'measured_test_value': value})
+        self.assertEqual(Channel.query.get(channel_id).status, TestResult.PASS.value)
+        self.assertEqual(Group.query.get(group_id).num_passed, 0)
+        self.assertEqual(list(rollup_worker.dirty), [group_id])
+
+        # Check the flush rolls the Group up through its Job and Project
+        self.assertEqual(rollup_worker.flush(), 1)
+        g = Group.query.get(group_id)
+        self.assertEqual((g.num_passed, g.num_untested, g.status), (1, 0, Status.COMPLETE.value))
+        self.assertEqual((g.job.num_passed, g.job.status), (1, Status.COMPLETE.value))
+        self.assertEqual(g.job.project.num_passed, 1)
+        self.assertEqual(rollup_worker.flush(), 0)
+
+        # Check the rollup matches the counters rebuilt from scratch
+        counters = [counter_stats(item) for item in [g, g.job, g.job.project]]
+        rebuild_status_counters()
+        self.assertEqual([counter_stats(item) for item in [g, g.job, g.job.project]], counters)
+
+    def test_unknown_mode(self):
+        self.app.config['STATUS_ROLLUP'] = 'Test'
+        self.assertRaises(ValueError, rollup_worker.init_app, self.app)
+
+
+class ReportTestConfig(TestConfig):
+    TMP_DIRECTORY = tempfile.mkdtemp() + '/'
+    REPORT_SHEET_WORKERS = 2
+
+
+class ReportCase(unittest.TestCase):
+
+    # Special method for enabling the Test Config
+    def setUp(self):
+        self.app = create_app(ReportTestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+        user = User(username='reporter')
+        db.session.add(user)
+        db.session.commit()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+
+    # Special method for stopping the Test Config
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+        shutil.rmtree(report_queue.directory, ignore_errors=True)
+
+    def test_build_job_report(self):
+        j = Job()
+        g = Group(job_id=1, name='Speeds')
+        c1 = Channel(group_id=1, name='SP001', max_error=0.5, error_type=ErrorType.ENG_UNITS.value,
+            measurement_units='rpm', injection_units='Hz')
+        c2 = Channel(group_id=1, name='SP002', max_error=1, error_type=ErrorType.PERCENT_FULL_SCALE.value,
+            full_scale_range=200, measurement_units='rpm', injection_units='Hz')
+        t1 = TestPoint(channel_id=1, nominal_injection_value=0, nominal_test_value=0)
+        t2 = TestPoint(channel_id=1, nominal_injection_value=10, nominal_test_value=100)
+        t3 = TestPoint(channel_id=2, nominal_injection_value=10, nominal_test_value=100)
+        db.session.add_all([j, g, c1, c2, t1, t2, t3])
+        db.session.commit()
+
+        # Build the report and read it back
+        report = build_job_report(j.id, io.BytesIO())
+        report.seek(0)
+        sheet = openpyxl.load_workbook(report)['Report']
+
+        # Check the header and Group rows
+        self.assertEqual(sheet['D1'].value, 'Injection Value')
+        self.assertEqual(sheet['A1'].style, 'Report Header Number')
+        self.assertEqual(sheet['A2'].value, 'Speeds')
+        self.assertIn('A2:I2', sheet.merged_cells)
+
+        # Check each Channel takes up at least five rows beside its TestPoints
+        self.assertEqual(sheet['A3'].value, c1.id)
+        self.assertEqual(sheet['C3'].value, 'Tolerance: 0.5 rpm')
+        self.assertEqual(sheet['E4'].value, f'{t2.lower_limit()} rpm')
+        self.assertEqual(sheet['A8'].value, c2.id)
+        self.assertEqual(sheet['C8'].value, 'Tolerance: 1.0 %FS')
+        self.assertEqual(sheet['G8'].value, f'{t3.upper_limit()} rpm')
+        self.assertEqual(sheet['B11'].value, 'MDS: _________________________')
+
+    def test_generate_channel_report(self):
+        p = Project(name='Turbine')
+        j = Job(project_id=1)
+        g = Group(job_id=1, name='Speeds')
+        c = Channel(group_id=1, name='SP001', max_error=0.5, error_type=ErrorType.ENG_UNITS.value)
+        db.session.add_all([p, j, g, c])
+        db.session.commit()
+        client = self.client
+
+        # Check a report can't be requested without logging in
+        response = self.app.test_client().post(f'/generate_channel_report/{j.id}')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/auth/login', response.location)
+        self.assertEqual(Report.query.count(), 0)
+
+        # Check a report is queued and its id is returned straight away
+        response = client.post(f'/generate_channel_report/{j.id}')
+        self.assertEqual(response.status_code, 202)
+        report = response.get_json()
+        self.assertEqual(report['status'], ReportStatus.QUEUED.value)
+        self.assertIsNone(report['download_url'])
+
+        # Check the report can be downloaded once it has been built
+        report_queue.wait(report['report_id'])
+        report = client.get(report['status_url']).get_json()
+        self.assertEqual(report['status'], ReportStatus.DONE.value)
+        response = client.get(report['download_url'])
+        self.assertEqual(response.mimetype, XLSX_MIMETYPE)
+        self.assertIn('attachment; filename=Job_Report_', response.headers['Content-Disposition'])
+        sheet = openpyxl.load_workbook(io.BytesIO(response.data))['Report']
+        self.assertEqual(sheet['A2'].value, 'Speeds')
+        response.close()
+
+        # Check the built report is reused while the Job's data is unchanged
+        response = client.post(f'/generate_channel_report/{j.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['report_id'], report['report_id'])
+        response = client.get(f'/generate_channel_report/{j.id}')
+        self.assertIn(report['download_url'].encode(), response.data)
+
+        # Check a new report is queued once the Job's data changes
+        db.session.add(TestPoint(channel_id=c.id, nominal_injection_value=4, nominal_test_value=0))
+        db.session.commit()
+        response = client.post(f'/generate_channel_report/{j.id}')
+        self.assertEqual(response.status_code, 202)
+        self.assertNotEqual(response.get_json()['report_id'], report['report_id'])
+        report_queue.wait(response.get_json()['report_id'])
+
+    def test_download_unfinished_report(self):
+        j = Job()
+        r = Report(job_id=1, data_version='abc')
+        db.session.add_all([j, r])
+        db.session.commit()
+
+        # Check a report can't be downloaded before it has been built
+        response = self.client.get(f'/report/{r.id}/download')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json()['status'], ReportStatus.QUEUED.value)
+
+        # Check a report can't be checked on or downloaded without logging in
+        for url in [f'/report/{r.id}/status', f'/report/{r.id}/download']:
+            response = self.app.test_client().get(url)
+            self.assertEqual(response.status_code, 302)
+            self.assertIn('/auth/login', response.location)
+
+        # Check a report is built again if its file has gone missing
+        r.status = ReportStatus.DONE.value
+        db.session.commit()
+        self.assertFalse(report_queue.is_usable(r))
+
+
+    def test_build_project_report(self):
+        p = Project(name='Turbine')
+        j1 = Job(project_id=1, name='Commissioning')
+        j2 = Job(project_id=1, name='ATP: Site/2')
+        g1 = Group(job_id=1, name='Speeds')
+        g2 = Group(job_id=2, name='Pressures')
+        c1 = Channel(group_id=1, name='SP001', max_error=0.5, error_type=ErrorType.ENG_UNITS.value)
+        c2 = Channel(group_id=2, name='PT001', max_error=1, error_type=ErrorType.ENG_UNITS.value)
+        t = TestPoint(channel_id=2, nominal_injection_value=4, nominal_test_value=0)
+        db.session.add_all([p, j1, j2, g1, g2, c1, c2, t])
+        db.session.commit()
+
+        # Check the workbook has a sheet for each Job laid out the same as a Job's own report
+        report = build_project_report(p.id, io.BytesIO(), 'xlsx')
+        report.seek(0)
+        wb = openpyxl.load_workbook(report)
+        self.assertEqual(wb.sheetnames, ['1 - Commissioning', '2 - ATP Site2'])
+        self.assertEqual(wb['1 - Commissioning']['A2'].value, 'Speeds')
+        self.assertEqual(wb['2 - ATP Site2']['A3'].value, c2.id)
+        self.assertEqual(wb['2 - ATP Site2']['E3'].value, f'{t.lower_limit()} None')
+        self.assertIn('A2:I2', wb['2 - ATP Site2'].merged_cells)
+
+        # Check the zip holds a workbook for each Job, whether they're built by the pool or not
+        for pool in [get_sheet_pool(2), None]:
+            report = build_project_report(p.id, io.BytesIO(), 'zip', pool, max_pending=1)
+            with zipfile.ZipFile(report) as archive:
+                self.assertEqual(archive.namelist(), ['1 - Commissioning.xlsx', '2 - ATP Site2.xlsx'])
+                sheet = openpyxl.load_workbook(io.BytesIO(archive.read('1 - Commissioning.xlsx')))['1 - Commissioning']
+                self.assertEqual(sheet['B3'].value, 'Name: SP001')
+
+    def test_generate_project_report(self):
+        p = Project(name='Turbine')
+        j = Job(project_id=1, name='Commissioning')
+        db.session.add_all([p, j])
+        db.session.commit()
+        client = self.client
+
+        # Check a report can't be requested without logging in
+        response = self.app.test_client().post(f'/generate_project_report/{p.id}?format=zip')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Report.query.count(), 0)
+
+        # Check a zip of the Job reports is queued and can be downloaded once built
+        response = client.post(f'/generate_project_report/{p.id}?format=zip')
+        self.assertEqual(response.status_code, 202)
+        report = response.get_json()
+        self.assertEqual(report['project_id'], p.id)
+        report_queue.wait(report['report_id'])
+        report = client.get(report['status_url']).get_json()
+        response = client.get(report['download_url'])
+        self.assertEqual(response.mimetype, ZIP_MIMETYPE)
+        self.assertIn('filename=Project_Report_', response.headers['Content-Disposition'])
+        response.close()
+
+        # Check the workbook is cached separately from the zip
+        response = client.post(f'/generate_project_report/{p.id}')
+        self.assertEqual(response.status_code, 202)
+        report_queue.wait(response.get_json()['report_id'])
+
+        # Check only the known formats can be requested
+        response = client.post(f'/generate_project_report/{p.id}?format=pdf')
+        self.assertEqual(response.status_code, 400)
+
+    def test_job_data_version(self):
+        j = Job()
+        g = Group(job_id=1, name='Speeds')
+        c = Channel(group_id=1, name='SP001')
+        db.session.add_all([j, g, c])
+        db.session.commit()
+        version = job_data_version(j.id)
+        self.assertEqual(job_data_version(j.id), version)
+
+        # Check the version changes as rows are edited, added and deleted
+        c.last_updated = datetime.utcnow() + timedelta(seconds=1)
+        db.session.commit()
+        self.assertNotEqual(job_data_version(j.id), version)
+        version = job_data_version(j.id)
+
+        t = TestPoint(channel_id=c.id, last_updated=c.last_updated)
+        db.session.add(t)
+        db.session.commit()
+        self.assertNotEqual(job_data_version(j.id), version)
+        version = job_data_version(j.id)
+
+        db.session.delete(t)
+        db.session.commit()
+        self.assertNotEqual(job_data_version(j.id), version)
+
+    def test_prune_cache(self):
+        j = Job()
+        db.session.add(j)
+        db.session.commit()
+        os.makedirs(report_queue.directory)
+
+        # Write cached reports last used one, two and three hours ago
+        now = datetime.utcnow()
+        reports = []
+        for hours in [1, 2, 3]:
+            report = Report(job_id=j.id, data_version=f'v{hours}', status=ReportStatus.DONE.value,
+                requested=now - timedelta(hours=hours), completed=now - timedelta(hours=hours))
+            reports.append(report)
+            db.session.add(report)
+        db.session.commit()
+
+        def write(path, hours):
+            with open(path, 'wb') as file:
+                file.write(b'x' * 100)
+            last_used = (now - timedelta(hours=hours) - datetime(1970, 1, 1)).total_seconds()
+            os.utime(path, (last_used, last_used))
+
+        paths = [report_queue.path(report) for report in reports]
+        for path, hours in zip(paths, [1, 2, 3]):
+            write(path, hours)
+
+        # Write an orphaned report, a partial report and a report saved by the app's previous version
+        orphan = os.path.join(report_queue.directory, 'Job_9_abc.xlsx')
+        partial = paths[0] + '.1-1.part'
+        legacy = os.path.join(report_queue.tmp_directory, 'Job_Report_01-01-2021_000000.xlsx')
+        write(orphan, 1)
+        write(partial, 0)
+        write(legacy, 1)
+
+        # Check the least recently used report is evicted once the cache is too large
+        report_queue.max_cache_size = 300
+        self.assertEqual(report_queue.prune_cache(), 3)
+        self.assertTrue(os.path.exists(paths[0]))
+        self.assertTrue(os.path.exists(paths[1]))
+        self.assertFalse(os.path.exists(paths[2]))
+        self.assertTrue(os.path.exists(partial))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertFalse(os.path.exists(legacy))
+        self.assertEqual(Report.query.count(), 2)
+
+        # Check a report is rebuilt when it is downloaded after being evicted
+        response = self.client.get(f'/report/{reports[0].id}/download')
+        self.assertEqual(response.status_code, 200)
+        os.remove(paths[0])
+        response = self.client.get(f'/report/{reports[0].id}/download')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(f'/generate_channel_report/{j.id}', response.location)
+
+        # Check the reports are removed once they go unused for too long
+        report_queue.max_cache_age = timedelta(minutes=90)
+        self.assertEqual(report_queue.prune_cache(), 1)
+        self.assertFalse(os.path.exists(paths[1]))
+        self.assertEqual(Report.query.count(), 0)
+
+class ExportCase(unittest.TestCase):
+
+    # Special method for enabling the Test Config
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        init_test_db()
+        self.client = self.app.test_client()
+        user = User.query.first()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+
+    # Special method for stopping the Test Config
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    # Adds a Job holding a single Channel with a measured and an untested TestPoint
+    def add_job(self, project, name):
+        j = Job(project_id=project.id, name=name)
+        db.session.add(j)
+        db.session.commit()
+        g = Group(job_id=j.id, name='Pressures')
+        db.session.add(g)
+        db.session.commit()
+        c = Channel(group_id=g.id, name='PT001', max_error=1, error_type=ErrorType.PERCENT_FULL_SCALE.value,
+            full_scale_range=200, measurement_units=EngUnits.PSI.value)
+        db.session.add(c)
+        db.session.commit()
+        db.session.add_all([
+            TestPoint(channel_id=c.id, nominal_injection_value=4, nominal_test_value=0, measured_test_value=0.5,
+                test_result=TestResult.PASS.value),
+            TestPoint(channel_id=c.id, nominal_injection_value=20, nominal_test_value=200)
+        ])
+        db.session.commit()
+        return j
+
+    def test_export_testpoints(self):
+        p = Project.query.first()
+        j1 = self.add_job(p, 'Commissioning')
+        j2 = self.add_job(p, 'ATP')
+
+        # Check every TestPoint of the Project is streamed as a csv row along with its error and limits
+        response = self.client.get(f'/projects/{p.id}/export_testpoints')
+        self.assertEqual(response.mimetype, CSV_MIMETYPE)
+        self.assertIn('attachment; filename=TestPoints_', response.headers['Content-Disposition'])
+        self.assertTrue(response.is_streamed)
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(list(rows[0]), EXPORT_COLUMNS)
+        self.assertEqual(rows[0]['job_name'], 'Commissioning')
+        # The error is the reading less the nominal value, the same as the measured error shown in the app
+        self.assertEqual(float(rows[0]['error']), 0.5)
+        c = Channel.query.filter_by(group_id=j1.groups.first().id).first()
+        self.assertEqual(float(rows[0]['error']), evaluate_measurement(c, 0, 0.5)[0])
+        self.assertEqual(float(rows[0]['lower_limit']), -2)
+        self.assertEqual(float(rows[0]['upper_limit']), 2)
+        self.assertEqual(rows[0]['test_result'], TestResult.PASS.value)
+        self.assertEqual(rows[1]['error'], '')
+
+        # Check the export can be limited to a single Job
+        response = self.client.get(f'/projects/{p.id}/export_testpoints?job_id={j2.id}')
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual([row['job_name'] for row in rows], ['ATP', 'ATP'])
+
+        # Check only the known formats can be requested
+        response = self.client.get(f'/projects/{p.id}/export_testpoints?format=xml')
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_command(self):
+        p = Project.query.first()
+        self.add_job(p, 'Commissioning')
+        cli.register(self.app)
+
+        # Check the command writes the same csv to stdout
+        result = self.app.test_cli_runner().invoke(args=['export', 'testpoints', str(p.id)])
+        self.assertEqual(result.exit_code, 0)
+        rows = list(csv.DictReader(io.StringIO(result.output)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]['nominal_test_value'], '200.0')
+
+    @unittest.skipUnless(parquet_available(), 'pyarrow is not installed')
+    def test_export_parquet(self):
+        p = Project.query.first()
+        self.add_job(p, 'Commissioning')
+
+        # Check the parquet file holds the same columns and values as the csv
+        response = self.client.get(f'/projects/{p.id}/export_testpoints?format=parquet')
+        self.assertEqual(response.mimetype, PARQUET_MIMETYPE)
+        table = pyarrow.parquet.read_table(io.BytesIO(response.data))
+        response.close()
+        self.assertEqual(table.column_names, EXPORT_COLUMNS)
+        self.assertEqual(table.column('upper_limit').to_pylist(), [2, 202])
+        self.assertEqual(table.column('measured_test_value').to_pylist(), [0.5, None])
+
+class ImportTestConfig(TestConfig):
+    WTF_CSRF_ENABLED = False
+
+
+class ImportCase(unittest.TestCase):
+
+    # Special method for enabling the Test Config
+    def setUp(self):
+        self.app = create_app(ImportTestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        init_test_db()
+        self.client = self.app.test_client()
+        user = User.query.first()
+        with self.client.session_transaction() as session:
+            session['_user_id'] = str(user.id)
+            session['_fresh'] = True
+        self.group = Group(job_id=Job.query.first().id, name='Imported')
+        db.session.add(self.group)
+        db.session.commit()
+
+    # Special method for stopping the Test Config
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_import_csv(self):
+        lines = [
+            'Name,Measurement Type,Measurement Units,Min Range,Max Range,Full Scale Range,Max Error,Error Type,'
+                'Min Injection Range,Max Injection Range,Injection Units,Num TestPoints,Required Test Equipment',
+            'PT001,Pressure,psi,0,100,100,1,%FS,4,20,mA,5,Multifunction Calibrator;digital pressure gauge',
+            'PT002,pressure,PSI,0,100,,0.5,Eng Units,4,20,mA,3,',
+            ',,,,,,,,,,,,',
+            'PT003,Pressure,bar,0,100,,0.5,Eng Units,4,20,mA,5,',
+            'PT004,Pressure,psi,100,0,,abc,Eng Units,4,20,mA,12,',
+            'PT005,Pressure,psi,0,100,,1,%FS,4,20,mA,5,Flux Capacitor',
+            'PT001,Pressure,psi,0,100,,1,Eng Units,4,20,mA,5,',
+            'PT006,Pressure,psi,0,100,,1,%RDG,4,20,mA,5,'
+        ]
+        file = io.BytesIO('\n'.join(lines).encode())
+
+        # Check the valid rows are imported in batches while every invalid row is reported
+        app.imports.IMPORT_BATCH_SIZE = 2
+        try:
+            channel_import = ChannelImport(self.group).import_rows(read_import_rows(file, 'channels.csv'))
+        finally:
+            app.imports.IMPORT_BATCH_SIZE = 1000
+        self.assertEqual(channel_import.num_imported, 3)
+        self.assertEqual([row_number for row_number, message in channel_import.errors], [5, 6, 7, 8])
+        errors = dict(channel_import.errors)
+        self.assertIn('measurement_units "bar" must be one of', errors[5])
+        self.assertIn('max_range must be greater than min_range', errors[6])
+        self.assertIn('max_error "abc" is not a number', errors[6])
+        self.assertIn('num_testpoints must be between 2 and 10', errors[6])
+        self.assertIn('full_scale_range is required', errors[7])
+        self.assertIn('Unknown test equipment type "Flux Capacitor"', errors[7])
+        self.assertIn('A channel named "PT001" already exists', errors[8])
+
+        # Check the Channels were added with their TestPoints, TestEquipmentTypes and status counters
+        channels = self.group.channels.order_by(Channel.name).all()
+        self.assertEqual([c.name for c in channels], ['PT001', 'PT002', 'PT006'])
+        self.assertEqual(channels[1].measurement_units, EngUnits.PSI.value)
+        self.assertEqual([t.nominal_test_value for t in channels[1].testpoints], [0, 50, 100])
+        self.assertEqual([t.name for t in channels[0].required_test_equipment],
+            ['Multifunction Calibrator', 'Digital Pressure Gauge'])
+        self.assertEqual(self.group.num_untested, 3)
+
+    def test_import_xlsx(self):
+        wb = openpyxl.Workbook()
+        sheet = wb.active
+        sheet.append(IMPORT_COLUMNS)
+        sheet.append(['TT001', 'Temperature', 'degC', 0, 200, None, 0.5, 'Eng Units', 100, 175.86, 'Ohms', 4, None])
+        sheet.append(['TT002', 'Temperature', 'degC', 0, 200, None, 0.5, 'Eng Units', 100, 175.86, 'Ohms', 4, None])
+        file = io.BytesIO()
+        wb.save(file)
+        file.seek(0)
+
+        # Check an uploaded workbook is imported into the Group
+        response = self.client.post(f'/group/{self.group.id}/import_channels',
+            data={'file': (file, 'channels.xlsx')}, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'2 new channels have been added to the Imported group, 0 rows had errors.', response.data)
+        self.assertEqual(self.group.channels.count(), 2)
+        self.assertEqual(self.group.channels.first().testpoints.count(), 4)
+
+    def test_import_invalid_file(self):
+
+        # Check a file without the required columns is rejected before any row is imported
+        file = io.BytesIO(b'Name,Units\nPT001,psi\n')
+        channel_import = ChannelImport(self.group).import_rows(read_import_rows(file, 'channels.csv'))
+        self.assertEqual(channel_import.num_imported, 0)
+        self.assertIn('Missing the required columns: measurement_type', channel_import.errors[0][1])
+
+        # Check a file which can't be read is reported
+        response = self.client.post(f'/group/{self.group.id}/import_channels',
+            data={'file': (io.BytesIO(b'not a workbook'), 'channels.xlsx')}, content_type='multipart/form-data')
+        self.assertIn(b'The file could not be read', response.data)
+        self.assertEqual(self.group.channels.count(), 0)
+
+        # Check a zip archive which isn't a workbook is reported as an unreadable file
+        file = io.BytesIO()
+        with zipfile.ZipFile(file, 'w') as archive:
+            archive.writestr('channels.txt', 'PT001')
+        file.seek(0)
+        with self.assertRaises(app.imports.InvalidFileException):
+            list(read_import_rows(file, 'channels.xlsx'))
+
+class EventHubCase(unittest.TestCase):
+
+    # Special method for enabling the Test Config
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    # Special method for stopping the Test Config
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_memory_backend(self):
+        hub = EventHub(self.app)
+        subscriber = hub.subscribe(1)
+
+        # Check that an event is only delivered once its transaction is committed
+        hub.publish(1, 'channel', {'channel_id': 2})
+        self.assertTrue(subscriber.empty())
+        db.session.commit()
+        self.assertEqual(json.loads(subscriber.get_nowait()), {'type': 'channel', 'data': {'channel_id': 2}})
+
+        # Check that a rolled back event is discarded
+        hub.publish(1, 'channel', {'channel_id': 3})
+        db.session.rollback()
+        db.session.commit()
+        self.assertTrue(subscriber.empty())
+
+        # Check that an unsubscribed client no longer receives events
+        hub.unsubscribe(1, subscriber)
+        hub.publish(1, 'channel', {'channel_id': 4})
+        db.session.commit()
+        self.assertTrue(subscriber.empty())
+
+    def test_database_backend(self):
+        self.app.config['EVENT_BACKEND'] = 'database'
+        hub = EventHub(self.app)
+        subscriber = queue.Queue()
+        hub.subscribers[1] = {subscriber}
+        hub.backend.poll()
+
+        # Check that a committed event is written to the table and delivered by the next poll
+        hub.publish(1, 'testpoint', {'testpoint_id': 5})
+        hub.publish(2, 'testpoint', {'testpoint_id': 6})
+        db.session.commit()
+        self.assertEqual(GroupEvent.query.count(), 2)
+        self.assertEqual(hub.backend.poll(), 2)
+        self.assertEqual(json.loads(subscriber.get_nowait())['data'], {'testpoint_id': 5})
+        self.assertTrue(subscriber.empty())
+
+        # Check that the events aren't delivered twice
+        self.assertEqual(hub.backend.poll(), 0)
+
+        # Check that an event committed after an event with a higher id is still delivered
+        db.session.add_all([GroupEvent(id=10, group_id=1, message='{}'), GroupEvent(id=12, group_id=1, message='{}')])
+        db.session.commit()
+        self.assertEqual(hub.backend.poll(), 2)
+        db.session.add(GroupEvent(id=11, group_id=1, message='{}'))
+        db.session.commit()
+        self.assertEqual(hub.backend.poll(), 1)
+        self.assertEqual(hub.backend.poll(), 0)
+
+    def test_unknown_backend(self):
+        self.app.config['EVENT_BACKEND'] = 'carrier-pigeon'
+        with self.assertRaises(ValueError):
+            EventHub(self.app)
+
+
+
+class GeneratorCase(unittest.TestCase):
+
+    # Special method for enabling the Test Config
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+
+    # Special method for stopping the Test Config
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_generate_test_data(self):
+        counts = generate_test_data(2, 3, 2, 10, 4, seed=1)
+
+        # Check the number of each item generated
+        self.assertEqual(Project.query.count(), 2)
+        self.assertEqual(Job.query.count(), 6)
+        self.assertEqual(Group.query.count(), 12)
+        self.assertEqual(Channel.query.count(), 120)
+        self.assertEqual(TestPoint.query.count(), 480)
+        self.assertEqual(counts['testpoints'], 480)
+        self.assertEqual(counts['calibration_records'], CalibrationRecord.query.count())
+
+        # Check the results are a mix of outcomes and every status counter is already up to date
+        results = dict(db.session.query(TestPoint.test_result, db.func.count(TestPoint.id))
+            .group_by(TestPoint.test_result).all())
+        self.assertGreater(results[TestResult.PASS.value], 0)
+        self.assertGreater(results[TestResult.UNTESTED.value], 0)
+        self.assertEqual(check_status_counters(), [])
+
+        # Check each tested Channel has a record of the TestEquipment used on it
+        tested = Channel.query.filter(Channel.status != TestResult.UNTESTED.value).first()
+        self.assertGreater(tested.equipment_records.count(), 0)
+        self.assertIsNotNone(tested.current_test_equipment(tested.required_test_equipment.first().id))
+
+        # Check the same seed generates the same results again
+        generate_test_data(1, 1, 1, 10, 4, seed=1)
+        first, second = Group.query.order_by(Group.id).filter(Group.id.in_([1, 13])).all()
+        self.assertEqual(counter_stats(first), counter_stats(second))
+
+    def test_generate_command(self):
+        cli.register(self.app)
+        result = self.app.test_cli_runner().invoke(args=['testdata', 'generate', '--projects', '1',
+            '--jobs', '1', '--groups', '1', '--channels', '5', '--testpoints', '3', '--seed', '1'])
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('15 testpoints', result.output)
+
+        # Check a fail rate that leaves nothing to pass is refused
+        result = self.app.test_cli_runner().invoke(args=['testdata', 'generate', '--fail-rate', '1'])
+        self.assertEqual(result.exit_code, 2)
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file